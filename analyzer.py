@@ -1,240 +1,1022 @@
-import re
-import pandas as pd
-from datetime import datetime
-import time
-
-from transformers import pipeline
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-from tqdm.auto import tqdm
-
-import config as cfg
-from store import TweetStore
-import checkpoints as ckp
-from twitter_scraper import fetch_tweets_in_periods
-
-# ===== Stopwords (PL) =====
-try:
-    import stopwordsiso as _siso
-    STOPWORDS_PL = set(_siso.stopwords("pl") or [])
-    print("✅ Załadowano stopwords z pakietu stopwordsiso (pełna lista).")
-except Exception:
-    STOPWORDS_PL = {
-        "i","w","się","na","z","do","że","to","jest","jak","o","od","dla","nie","a","tak","ale",
-        "czy","po","przez","jego","jej","ich","mnie","mi","ty","on","ona","ono","my","wy","bez",
-        "ten","ta","to","te","tych","tego","tej","jestem","być","byl",
-    }
-    print("⚠️ Nie znaleziono 'stopwordsiso'. Używam ograniczonego fallbacku.")
-
-def remove_stopwords(text: str, stopwords: set) -> str:
-    return " ".join(token for token in text.split() if token not in stopwords)
-
-def clean_tweet(text: str) -> str:
-    text = re.sub(r'http\S+', '', text)
-    text = re.sub(r'@\w+', '', text)
-    text = re.sub(r'[^A-Za-z0-9ąćęłńóśźżĄĆĘŁŃÓŚŹŻ ]', ' ', text)
-    text = re.sub(r'\s{2,}', ' ', text)
-    return text.strip().lower()
-
-# ===== Model sentymentu =====
-sentiment_pl = pipeline(
-    "sentiment-analysis",
-    model="bardsai/twitter-sentiment-pl-base",
-    tokenizer="bardsai/twitter-sentiment-pl-base",
-    device=-1
-)
-
-def signed_score_from_label(label, score):
-    if label == 'positive': return score
-    elif label == 'negative': return -score
-    else: return 0.0
-
-# ===== DB-first dataset + top-up z Twittera =====
-def prepare_dataset(keyword: str,
-                    collection_name: str,
-                    since: str,
-                    until: str,
-                    max_tweets: int,
-                    allow_scrape: bool = True,
-                    resume_raw: bool = False,
-                    refresh: bool = False):
-    store = TweetStore(cfg.DB_PATH)
-
-    rows = store.fetch_collection_in_range(collection_name, since, until)
-    have = len(rows)
-
-    if allow_scrape:
-        need = max_tweets - have
-        if refresh:
-            need = max(max_tweets, need)
-        if need > 0:
-            print(f"🔄 Top-up z Twittera: potrzebuję ~{need} tweetów w oknie {since}..{until}")
-            fetch_tweets_in_periods(keyword, since, until, need, collection_name=collection_name, resume_raw=resume_raw)
-            rows = store.fetch_collection_in_range(collection_name, since, until)
-
-    store.close()
-
-    if len(rows) > max_tweets:
-        rows = rows[:max_tweets]
-
-    ids   = [r[0] for r in rows]
-    texts = [r[1] for r in rows]
-    dates = [pd.to_datetime(r[2]) if r[2] else pd.NaT for r in rows]
-    urls  = [r[3] for r in rows]
-    return ids, texts, dates, urls
-
-# ===== Analiza i wizualizacja (z resume) + PROGRESS BAR + Parquet/CSV =====
-def analyze_and_visualize(keyword, since, until, max_tweets,
-                          collection_name=None,
-                          use_db_only=False,
-                          resume_analysis=False,
-                          refresh=False):
-    allow_scrape = not use_db_only
-    collection_name = collection_name or keyword
-
-    ids, raws, dates, urls = prepare_dataset(
-        keyword=keyword,
-        collection_name=collection_name,
-        since=since,
-        until=until,
-        max_tweets=max_tweets,
-        allow_scrape=allow_scrape,
-        resume_raw=resume_analysis,
-        refresh=refresh
-    )
-
-    if not ids:
-        print("❌ Brak tweetów do analizy.")
-        return
-
-    root = (collection_name or keyword).replace(" ", "_")
-    rng  = f"{since}_to_{until}"
-    path = cfg.RESULTS_DIR / root / rng
-    path.mkdir(parents=True, exist_ok=True)
-
-    df = pd.DataFrame({'id': ids, 'raw_text': raws, 'date': dates, 'url': urls}).drop_duplicates('id')
-
-    df['date'] = pd.to_datetime(df['date'], errors='coerce')
-    df['clean']    = df['raw_text'].apply(clean_tweet)
-    df['clean_ns'] = df['clean'].apply(lambda txt: remove_stopwords(txt, STOPWORDS_PL))
-
-    for c in ('sentiment','score','polarity'):
-        if c not in df.columns:
-            df[c] = None
-
-    # Resume analysis (merge po id)
-    if resume_analysis:
-        chk = ckp.load_analysis_progress_latest(collection_name, since, until)
-        if chk is not None and 'id' in chk.columns:
-            chk = chk.drop_duplicates(subset='id', keep='last')
-            for c in ['sentiment','score','polarity','clean','clean_ns']:
-                if c in chk.columns:
-                    df = df.merge(chk[['id', c]].rename(columns={c: f'{c}_chk'}), on='id', how='left')
-                    if c in df.columns:
-                        df[c] = df[c].combine_first(df.get(f'{c}_chk'))
-                    else:
-                        df[c] = df.get(f'{c}_chk')
-                    df.drop(columns=[f'{c}_chk'], inplace=True)
-            already = df['sentiment'].notna().sum()
-            if already:
-                print(f"↩️ Resume ANALYSIS: wykryto {already} już policzonych rekordów.")
-
-    # policz tylko brakujące — PROGRESS BAR
-    todo_mask = df['sentiment'].isna() | (df['sentiment'] == '')
-    todo_idx = df.index[todo_mask].tolist()
-
-    if len(todo_idx) > 0:
-        batch_size = 32
-        last_analysis_save = time.time()
-        pbar = tqdm(total=len(todo_idx), desc="Analyzing (sentiment)", unit="tw")
-        for start in range(0, len(todo_idx), batch_size):
-            idxs = todo_idx[start:start+batch_size]
-            batch = df.loc[idxs, 'clean_ns'].tolist()
-            try:
-                out = sentiment_pl(batch)
-            except Exception as e:
-                print("⚠️ Błąd w transformerze dla batcha:", e)
-                out = [{'label':'neutral','score':0.5} for _ in batch]
-
-            for row_i, r in zip(idxs, out):
-                df.at[row_i, 'sentiment'] = r['label']
-                df.at[row_i, 'score']     = float(r['score'])
-                df.at[row_i, 'polarity']  = signed_score_from_label(r['label'], float(r['score']))
-
-            pbar.update(len(idxs))
-            pbar.set_postfix_str(f"done {min(start+batch_size, len(todo_idx))}/{len(todo_idx)}")
-
-            now = time.time()
-            if (now - last_analysis_save) >= cfg.AN_PROGRESS_MIN_INTERVAL_SEC or (start + batch_size) >= len(todo_idx):
-                ckp.save_analysis_progress(collection_name, since, until, df)
-                last_analysis_save = now
-        pbar.close()
-    else:
-        print("ℹ️ Nic do policzenia — wszystko już przeanalizowane.")
-
-    # Final + wykresy + zapisy
-    csv_file = path / f"{root}_{since}_to_{until}.csv"
-    parquet_file = path / f"{root}_{since}_to_{until}.parquet"
-
-    wrote_any = False
-    if cfg.SAVE_CSV:
-        df.to_csv(csv_file, index=False, encoding='utf-8-sig')
-        print(f"💾 CSV zapisane: {csv_file}")
-        wrote_any = True
-    else:
-        print("⏭️ Pomiń zapis CSV (flaga --no-csv).")
-
-    if cfg.SAVE_PARQUET:
-        try:
-            df.to_parquet(parquet_file, index=False)
-            print(f"💾 Parquet zapisany: {parquet_file}")
-            wrote_any = True
-        except Exception as e:
-            print(f"⚠️ Nie udało się zapisać Parquet ({e}). Zainstaluj 'pyarrow' lub 'fastparquet'.")
-    else:
-        print("⏭️ Pomiń zapis Parquet (flaga --no-parquet).")
-
-    if not wrote_any:
-        print("⚠️ Uwaga: wyłączone zapisy CSV i Parquet — wyniki nie zostały zserializowane do plików.")
-
-    counts = df['sentiment'].value_counts().reindex(['positive','neutral','negative']).fillna(0)
-    fig, ax = plt.subplots()
-    counts.plot.bar(ax=ax)
-    ax.set_title("Rozkład nastrojów")
-    ax.set_ylabel("Liczba tweetów")
-    plt.tight_layout()
-    bar = path / "sentiment_distribution.png"
-    plt.savefig(bar); plt.close()
-    print(f"💾 Wykres zapisany do {bar}")
-
-    df_t = df.dropna(subset=['date']).copy()
-    if not df_t.empty:
-        df_t['day'] = df_t['date'].dt.date
-        trend = df_t.groupby('day')['polarity'].mean()
-        fig, ax = plt.subplots()
-        ax.plot(trend.index, trend.values, marker='o')
-        ax.set_title("Średnia polaryzacja w kolejnych dniach")
-        ax.set_ylabel("Polaryzacja (–1 do +1)")
-        ax.set_xlabel("Data")
-        ax.xaxis.set_major_locator(mdates.AutoDateLocator())
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
-        plt.xticks(rotation=45, ha='right'); plt.tight_layout()
-        tr = path / "polarity_trend.png"
-        plt.savefig(tr); plt.close()
-        print(f"💾 Wykres zapisany do {tr}")
-    else:
-        print("⚠️ Brak dat do wykresu trendu polaryzacji.")
-
-    all_txt = " ".join(df['clean_ns'])
-    if all_txt.strip():
-        wc = WordCloud(width=800, height=400, background_color='white').generate(all_txt)
-        fig, ax = plt.subplots(figsize=(10,5))
-        ax.imshow(wc, interpolation='bilinear')
-        ax.axis('off')
-        ax.set_title("Chmura słów (bez stopwords)")
-        wc_file = path / "wordcloud.png"
-        plt.savefig(wc_file); plt.close()
-        print(f"💾 Chmura słów zapisana do {wc_file}")
-    else:
-        print("⚠️ Brak tekstu po usunięciu stopwords — pomijam chmurę słów.")
+import json
+import queue
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+import pandas as pd
+from datetime import datetime
+from pathlib import Path
+import time
+
+from tqdm.auto import tqdm
+
+import config as cfg
+import metrics
+from text_clean import STOPWORDS_PL, remove_stopwords, clean_tweet
+from near_dup import assign_clusters
+import lang_id
+from store import TweetStore
+import checkpoints as ckp
+from charts import (ChartStage, render_distribution, render_trend, render_wordcloud,
+                    render_distribution_ci, render_trend_ci)
+import sampling
+from twitter_scraper import iter_tweets_in_periods
+
+# ===== Model sentymentu =====
+# Ładowany przy pierwszym użyciu, nie przy imporcie: procesy pomocnicze (pula wykresów, sweep --autotune)
+# pod metodą spawn importują main → analyzer i nie potrzebują własnej kopii modelu.
+_sentiment_pl = None
+_sentiment_lock = threading.Lock()
+
+def sentiment_pipeline():
+    global _sentiment_pl
+    if _sentiment_pl is None:
+        with _sentiment_lock:
+            if _sentiment_pl is None:
+                from transformers import pipeline
+                _sentiment_pl = pipeline(
+                    "sentiment-analysis",
+                    model=cfg.SENTIMENT_MODEL,
+                    tokenizer=cfg.SENTIMENT_MODEL,
+                    device=-1
+                )
+    return _sentiment_pl
+
+WORDCLOUD_MAX_WORDS = 200  # = domyślne max_words WordCloud
+BATCH_SIZE = 32
+
+LABELS = ['positive', 'neutral', 'negative']
+LABEL_DTYPE = pd.CategoricalDtype(LABELS)
+RESULT_COLS = ['sentiment', 'score', 'polarity']
+try:
+    import pyarrow  # noqa: F401  — teksty jako string[pyarrow] (bufor Arrow zamiast obiektów Pythona)
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    TEXT_DTYPE = pd.StringDtype("python")
+_LABEL_CODE = {l: i for i, l in enumerate(LABELS)}
+_LABELS_ARR = np.array(LABELS, dtype=object)
+_LABEL_SIGN = np.array([1.0, 0.0, -1.0], dtype=np.float32)  # w kolejności LABELS
+
+def signed_score_from_label(label, score):
+    if label == 'positive': return score
+    elif label == 'negative': return -score
+    else: return 0.0
+
+def _result_arrays(out):
+    """Wyjście modelu ([{label, score}]) → (kody etykiet int8, score float32, polarity float32); nieznana etykieta = neutral."""
+    codes = np.fromiter((_LABEL_CODE.get(r['label'], 1) for r in out), dtype=np.int8, count=len(out))
+    score = np.fromiter((r['score'] for r in out), dtype=np.float32, count=len(out))
+    return codes, score, score * _LABEL_SIGN[codes]
+
+class _ResultColumns:
+    """
+    Kolumny wyników analizy jako tablice numpy (pozycja = wiersz df): partie modelu i kopie dla
+    near-duplikatów zapisują wycinki wektorowo, a do df trafiają hurtem (sync) przed checkpointem i na końcu.
+    """
+    def __init__(self, df):
+        self.df = df
+        self.ids = df['id'].to_numpy(dtype=object)
+        self.codes = df['sentiment'].cat.codes.to_numpy().copy()
+        self.score = df['score'].to_numpy(dtype=np.float32, copy=True)
+        self.polarity = df['polarity'].to_numpy(dtype=np.float32, copy=True)
+
+    def put(self, pos, out):
+        self.put_arrays(pos, *_result_arrays(out)[:2])
+
+    def put_arrays(self, pos, codes, score):
+        self.codes[pos], self.score[pos], self.polarity[pos] = codes, score, score * _LABEL_SIGN[codes]
+
+    def copy(self, dst, src):
+        for a in (self.codes, self.score, self.polarity):
+            a[dst] = a[src]
+
+    def rows(self, pos):
+        """Krotki (id, label, score, polarity) dla save_sentiment; float32 → 6 miejsc, bez szumu w DB."""
+        return zip(self.ids[pos], _LABELS_ARR[self.codes[pos]],
+                   self.score[pos].astype(np.float64).round(6).tolist(),
+                   self.polarity[pos].astype(np.float64).round(6).tolist())
+
+    def sync(self):
+        self.df['sentiment'] = pd.Categorical.from_codes(self.codes, dtype=LABEL_DTYPE)
+        self.df['score'] = self.score
+        self.df['polarity'] = self.polarity
+
+# ===== profil autotune (wczytywany leniwie: main może jeszcze zmienić cfg.AUTOTUNE_PROFILE) =====
+_PIPE_KW = {}
+_tuning_loaded = False
+
+def load_tuning(force: bool = False):
+    """Jednorazowo stosuje profil --autotune dla hosta/modelu: BATCH_SIZE, wątki torch, argumenty pipeline."""
+    global BATCH_SIZE, _PIPE_KW, _tuning_loaded
+    if _tuning_loaded and not force:
+        return
+    _tuning_loaded = True
+    if not cfg.USE_AUTOTUNE_PROFILE:
+        return
+    import autotune
+    profile = autotune.load_profile()
+    if not profile:
+        return
+    try:
+        autotune.apply_profile(profile)
+        BATCH_SIZE = int(profile["batch_size"])
+        _PIPE_KW = autotune.pipeline_kwargs(profile)
+    except Exception as e:
+        print(f"⚠️ Nie udało się zastosować profilu autotune: {e}")
+        return
+    print(f"🔧 Profil autotune: batch={BATCH_SIZE}, intra-op={profile['intra_op']}, "
+          f"inter-op={profile['inter_op']}, max_length={profile['max_length']} "
+          f"({profile.get('throughput')} tw/s, {profile.get('tuned_at')})")
+
+# ===== kaskada: liniowy pre-klasyfikator przed transformerem (cascade.py) =====
+_cascade_model = None
+_cascade_loaded = False
+
+def load_cascade(force: bool = False):
+    """Model kaskady z cfg.CASCADE_PATH (raz na proces) albo None."""
+    global _cascade_model, _cascade_loaded
+    if _cascade_loaded and not force:
+        return _cascade_model
+    _cascade_loaded = True
+    from cascade import LinearCascade
+    try:
+        _cascade_model = LinearCascade.load()
+    except Exception as e:
+        print(f"⚠️ Nie udało się wczytać modelu kaskady: {e}")
+        _cascade_model = None
+    return _cascade_model
+
+@metrics.timed("analysis.cascade")
+def _cascade_pass(df, todo_idx, followers, results, store, model, threshold):
+    """
+    Pre-klasyfikator ocenia wszystkie wiersze do policzenia; pewne (max p >= threshold, niepuste)
+    dostają jego etykietę od razu (razem z near-duplikatami) i trafiają do DB jako source='cascade'.
+    Losowe cfg.CASCADE_AUDIT z pewnych i tak liczy transformer — do pomiaru zgodności.
+    Zwraca (pozostałe todo_idx, pozycje audytu, etykiety kaskady dla audytu).
+    """
+    idxs = np.asarray(todo_idx, dtype=np.int64)
+    texts = df['clean_ns'].to_numpy(dtype=object)[idxs]
+    proba = model.proba(texts.tolist())
+    nonempty = np.fromiter((bool(t) for t in texts), dtype=bool, count=len(texts))
+    conf = (proba.max(axis=1) >= threshold) & nonempty
+    audit = conf & (np.random.default_rng(0).random(len(idxs)) < cfg.CASCADE_AUDIT)
+    take = conf & ~audit
+
+    pos = idxs[take]
+    if len(pos):
+        results.put_arrays(pos, proba[take].argmax(axis=1).astype(np.int8),
+                           proba[take].max(axis=1).astype(np.float32))
+        fl = [(f, row_i) for row_i in pos.tolist() for f in followers.get(row_i, ())]
+        if fl:
+            dst, src = np.array(fl).T
+            results.copy(dst, src)
+            pos = np.concatenate([pos, dst])
+        try:
+            store.save_sentiment(results.rows(pos), source='cascade')
+        except Exception as e:
+            print(f"⚠️ Błąd zapisu wyników do DB: {e}")
+    metrics.incr("analysis.cascade_rows", int(take.sum()))
+    metrics.incr("analysis.cascade_inherited", len(pos) - int(take.sum()))
+    metrics.incr("analysis.cascade_fallback", int((~take).sum()))
+    return idxs[~take].tolist(), idxs[audit], proba[audit].argmax(axis=1).astype(np.int8)
+
+def _forward_vec(texts):
+    """
+    Jeden przebieg modelu dla partii: etykiety jak z pipeline (softmax logitów) oraz wektor zdania —
+    ostatni stan ukryty uśredniony po tokenach (maska uwagi) — jako float16 [n, hidden].
+    """
+    import torch
+    pipe = sentiment_pipeline()
+    tok, model = pipe.tokenizer, pipe.model
+    enc = tok(list(texts), padding=True, truncation=True, return_tensors="pt",
+              max_length=_PIPE_KW.get("max_length") or min(tok.model_max_length, 512))
+    with torch.inference_mode():
+        o = model(**enc, output_hidden_states=True)
+    score, idx = o.logits.softmax(-1).max(-1)
+    out = [{'label': model.config.id2label[i], 'score': sc} for i, sc in zip(idx.tolist(), score.tolist())]
+    h = o.hidden_states[-1]
+    m = enc["attention_mask"].unsqueeze(-1).to(h.dtype)
+    vecs = (h * m).sum(1) / m.sum(1).clamp(min=1)
+    return out, vecs.float().numpy().astype(np.float16)
+
+@metrics.timed("analysis.inference")
+def _infer(texts, with_vec: bool = False):
+    """Wyniki modelu dla partii; with_vec → (wyniki, wektory zdań) z tego samego przebiegu."""
+    metrics.incr("analysis.inference_batches")
+    metrics.incr("analysis.inference_rows", len(texts))
+    if with_vec:
+        return _forward_vec(texts)
+    return sentiment_pipeline()(texts, **_PIPE_KW)
+
+def _neutral(texts):
+    return [{'label':'neutral','score':0.5} for _ in texts]
+
+def score_batch(texts, with_vec: bool = False):
+    try:
+        return _infer(texts, with_vec)
+    except Exception as e:
+        print("⚠️ Błąd w transformerze dla batcha:", e)
+        return (_neutral(texts), None) if with_vec else _neutral(texts)
+
+# ===== Cache inferencji: te same wejścia modelu liczone raz (partia, przebieg, kolejne uruchomienia) =====
+class InferenceMemo:
+    """
+    Adresowany treścią cache wyników modelu: klucz = blake2b(clean_ns). Najpierw LRU
+    w procesie, potem tabela inference_cache w DB; do modelu trafiają tylko unikalne chybienia.
+    """
+    def __init__(self, maxsize: int = None):
+        self.maxsize = maxsize or cfg.INFER_MEMO_SIZE
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).digest()
+
+    def _remember(self, items):
+        with self._lock:
+            for k, v in items:
+                self._lru[k] = v
+                self._lru.move_to_end(k)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def score(self, texts, store: TweetStore = None, with_vec: bool = False):
+        """
+        Jak score_batch(texts): lista {'label', 'score'} w kolejności wejścia; with_vec →
+        (lista, wektory zdań [n, hidden] float16 albo None po błędzie modelu). Przy with_vec
+        wpis bez wektora jest chybieniem — model liczy etykietę i wektor jednym przebiegiem.
+        """
+        keys = [self.key(t) for t in texts]
+        found = {}
+        with self._lock:
+            for k in keys:
+                v = self._lru.get(k)
+                if v is not None and (not with_vec or v[2] is not None):
+                    self._lru.move_to_end(k)
+                    found[k] = v
+        n_lru = sum(1 for k in keys if k in found)
+
+        missing = list(OrderedDict.fromkeys(k for k in keys if k not in found))
+        n_db = 0
+        if missing and store is not None:
+            try:
+                from_db = {k: (v[0], v[1], np.frombuffer(v[2], dtype=np.float16) if len(v) > 2 else None)
+                           for k, v in store.memo_get(missing, with_vec=with_vec).items()}
+            except Exception as e:
+                print(f"⚠️ Błąd odczytu cache inferencji: {e}")
+                from_db = {}
+            if from_db:
+                found.update(from_db)
+                self._remember(from_db.items())
+                n_db = sum(1 for k in keys if k in from_db)
+                missing = [k for k in missing if k not in from_db]
+
+        ok = True
+        if missing:
+            text_of = dict(zip(keys, texts))
+            batch = [text_of[k] for k in missing]
+            try:
+                out, vecs = _infer(batch, True) if with_vec else (_infer(batch), None)
+            except Exception as e:
+                print("⚠️ Błąd w transformerze dla batcha:", e)
+                out, vecs, ok = _neutral(batch), None, False  # awaryjnego wyniku nie zapamiętujemy
+            fresh = [(k, (r['label'], float(r['score']), None if vecs is None else vecs[i]))
+                     for i, (k, r) in enumerate(zip(missing, out))]
+            found.update(fresh)
+            if ok:
+                self._remember(fresh)
+                if store is not None:
+                    try:
+                        store.memo_put((k, label, score) if vec is None else (k, label, score, vec.tobytes())
+                                       for k, (label, score, vec) in fresh)
+                    except Exception as e:
+                        print(f"⚠️ Błąd zapisu cache inferencji: {e}")
+
+        metrics.incr("inference.memo_lru_hits", n_lru)
+        metrics.incr("inference.memo_db_hits", n_db)
+        metrics.incr("inference.memo_batch_dups", len(keys) - n_lru - n_db - len(missing))
+        metrics.incr("inference.memo_misses", len(missing))
+        results = [{'label': found[k][0], 'score': found[k][1]} for k in keys]
+        if not with_vec:
+            return results
+        return results, (np.stack([found[k][2] for k in keys]) if ok else None)
+
+_memo = InferenceMemo()
+
+def score_texts(texts, store: TweetStore = None, with_vec: bool = False):
+    """Wejście analizy: score_batch za cache inferencji (o ile INFER_MEMO); with_vec → (wyniki, wektory)."""
+    if not cfg.INFER_MEMO:
+        return score_batch(texts, with_vec)
+    return _memo.score(texts, store, with_vec)
+
+def save_vectors(store: TweetStore, ids, vecs, copies=()):
+    """Wektory zdań partii do DB: ids[i] ↔ vecs[i]; copies — [(tweet_id, i)] (near-duplikaty dostają wektor lidera)."""
+    if vecs is None:
+        return
+    rows = [(tid, v.tobytes()) for tid, v in zip(ids, vecs)]
+    rows += [(tid, vecs[i].tobytes()) for tid, i in copies]
+    try:
+        store.save_embeddings(rows)
+    except Exception as e:
+        print(f"⚠️ Błąd zapisu wektorów zdań do DB: {e}")
+
+def memo_report(before: dict):
+    """Drukuje trafienia cache inferencji od stanu `before` (liczniki metrics)."""
+    lru, db, dups, miss = (metrics.counter(n) - before.get(n, 0) for n in _MEMO_COUNTERS)
+    total = lru + db + dups + miss
+    if total:
+        print(f"🧠 Cache inferencji: {(total - miss) / total:.1%} trafień "
+              f"(LRU {lru}, DB {db}, duplikaty w partii {dups}, model {miss} z {total} tekstów).")
+
+def cascade_report(results, audit_pos, audit_codes, n_cascade: int, n_total: int, model):
+    """Udział wierszy bez transformera i zgodność kaskady z transformerem na audycie (oraz z treningu)."""
+    n_audit = len(audit_pos)
+    agree = int(np.count_nonzero(results.codes[audit_pos] == audit_codes)) if n_audit else 0
+    metrics.incr("analysis.cascade_audit", n_audit)
+    metrics.incr("analysis.cascade_audit_agree", agree)
+    hold = model.meta.get("holdout_agreement")
+    print(f"🪜 Kaskada: {n_cascade / max(n_total, 1):.1%} reprezentantów bez transformera "
+          f"({n_cascade}/{n_total}); zgodność z transformerem w audycie "
+          f"{f'{agree / n_audit:.1%} (n={n_audit})' if n_audit else '-'}"
+          f"{f', na holdoucie przy treningu {hold:.1%}' if hold is not None else ''}.")
+
+_MEMO_COUNTERS = ("inference.memo_lru_hits", "inference.memo_db_hits",
+                  "inference.memo_batch_dups", "inference.memo_misses")
+
+def memo_counters() -> dict:
+    return {n: metrics.counter(n) for n in _MEMO_COUNTERS}
+
+# ===== Pipeline: scraping (producent) → czyszczenie + inferencja (konsument) =====
+class PipelineConsumer:
+    """
+    Konsument partii ze scrapera: czyści, liczy sentyment i zapisuje wyniki do DB
+    (oraz checkpoint analizy) na bieżąco, w osobnym wątku — Chrome scrolluje,
+    a model w tym czasie liczy. Wyniki trafiają do .results {id: (clean, clean_ns, label, score, polarity)}.
+    """
+    _STOP = object()
+
+    def __init__(self, collection_name: str, since: str, until: str, store: TweetStore):
+        self.collection_name = collection_name
+        self.since, self.until = since, until
+        self.store = store
+        self.results = {}
+        self._q = queue.Queue(maxsize=cfg.PIPELINE_QUEUE_MAX)
+        self._thread = threading.Thread(target=self._run, name="pipeline-consumer", daemon=True)
+        self._last_save = time.time()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def on_batch(self, ids, texts, dates, urls):
+        self._q.put((list(ids), list(texts)))
+
+    def close(self):
+        self._q.put(self._STOP)
+        self._thread.join()
+        self._checkpoint()
+
+    def _checkpoint(self):
+        if not self.results:
+            return
+        df = pd.DataFrame([(k, *v) for k, v in self.results.items()],
+                          columns=['id', 'clean', 'clean_ns', 'sentiment', 'score', 'polarity'])
+        ckp.save_analysis_progress(self.collection_name, self.since, self.until, df)
+        self._last_save = time.time()
+
+    def _run(self):
+        pbar = tqdm(desc="Analyzing (pipeline)", unit="tw")
+        try:
+            while True:
+                item = self._q.get()
+                if item is self._STOP:
+                    break
+                ids, texts = item
+                cleans = [clean_tweet(t) for t in texts]
+                clean_ns = [remove_stopwords(c, STOPWORDS_PL) for c in cleans]
+                if cfg.LANG_FILTER:
+                    langs = lang_id.languages(self.store, ids, texts)
+                    keep = [i for i, (lang, ns) in enumerate(zip(langs, clean_ns)) if lang == cfg.LANG_TARGET and ns]
+                    ids, cleans, clean_ns = ([x[i] for i in keep] for x in (ids, cleans, clean_ns))
+                try:
+                    self.store.add_word_counts(self.collection_name, zip(ids, clean_ns))
+                except Exception as e:
+                    print(f"⚠️ Błąd zapisu częstości słów do DB: {e}")
+
+                for start in range(0, len(ids), BATCH_SIZE):
+                    b_ids = ids[start:start+BATCH_SIZE]
+                    b_cl, b_ns = cleans[start:start+BATCH_SIZE], clean_ns[start:start+BATCH_SIZE]
+                    if cfg.EMBEDDINGS:
+                        out, vecs = score_texts(b_ns, self.store, with_vec=True)
+                        save_vectors(self.store, b_ids, vecs)
+                    else:
+                        out = score_texts(b_ns, self.store)
+                    rows = []
+                    for tid, c, ns, r in zip(b_ids, b_cl, b_ns, out):
+                        score = float(r['score'])
+                        pol = signed_score_from_label(r['label'], score)
+                        self.results[tid] = (c, ns, r['label'], score, pol)
+                        rows.append((tid, r['label'], score, pol))
+                    try:
+                        self.store.save_sentiment(rows)
+                    except Exception as e:
+                        print(f"⚠️ Błąd zapisu wyników do DB: {e}")
+                    pbar.update(len(b_ids))
+
+                if (time.time() - self._last_save) >= cfg.AN_PROGRESS_MIN_INTERVAL_SEC:
+                    self._checkpoint()
+        finally:
+            pbar.close()
+
+# ===== DB-first dataset + top-up z Twittera =====
+@metrics.timed("scrape.top_up")
+def top_up_collection(keyword: str,
+                      collection_name: str,
+                      since: str,
+                      until: str,
+                      max_tweets: int,
+                      resume_raw: bool = False,
+                      refresh: bool = False,
+                      store: TweetStore = None,
+                      on_batch=None,
+                      deduper=None) -> int:
+    """
+    Dociąga z Twittera brakujące tweety okna (etap scrapowania — wymaga drivera).
+    Zwraca liczbę tweetów kolekcji w oknie po top-upie.
+    """
+    own_store = store is None
+    if own_store:
+        store = TweetStore(cfg.DB_PATH)
+
+    have = len(store.fetch_collection_in_range(collection_name, since, until))
+    need = max_tweets - have
+    if refresh:
+        need = max(max_tweets, need)
+    if need > 0:
+        print(f"🔄 Top-up z Twittera: potrzebuję ~{need} tweetów w oknie {since}..{until}")
+        # partie są zapisywane do DB w generatorze — tu tylko ewentualnie przekazujemy je dalej
+        for page in iter_tweets_in_periods(keyword, since, until, need, collection_name=collection_name,
+                                           resume_raw=resume_raw, store=store, deduper=deduper):
+            if on_batch is not None:
+                ids, texts, dates, urls = (list(c) for c in zip(*page))
+                try:
+                    on_batch(ids, texts, dates, urls)
+                except Exception as e:
+                    print(f"⚠️ Błąd przekazania partii do analizy: {e}")
+        have = len(store.fetch_collection_in_range(collection_name, since, until))
+
+    if own_store:
+        store.close()
+    return have
+
+def prepare_dataset(keyword: str,
+                    collection_name: str,
+                    since: str,
+                    until: str,
+                    max_tweets: int,
+                    allow_scrape: bool = True,
+                    resume_raw: bool = False,
+                    refresh: bool = False,
+                    store: TweetStore = None,
+                    on_batch=None,
+                    windows=None):
+    """
+    DataFrame tweetów okna [since, until] (top-up z Twittera, gdy allow_scrape).
+    windows=[(since, until), ...] — since/until to ich suma: czytamy ją raz bez limitu i zostawiamy
+    wiersze należące do któregokolwiek okna (w każdym pierwsze max_tweets, jak przy osobnym przebiegu).
+    """
+    own_store = store is None
+    if own_store:
+        store = TweetStore(cfg.DB_PATH)
+
+    if allow_scrape:
+        top_up_collection(keyword, collection_name, since, until, max_tweets,
+                          resume_raw=resume_raw, refresh=refresh, store=store, on_batch=on_batch)
+    try:
+        df = window_frame(store, collection_name, since, until, limit=None if windows else max_tweets)
+    finally:
+        if own_store:
+            store.close()
+    if windows:
+        keep = pd.Series(False, index=df.index)
+        for w_since, w_until in windows:
+            keep |= window_mask(df, w_since, w_until, max_tweets)
+        df = df.loc[keep]
+    return df
+
+def window_mask(df, since: str, until: str, limit: int = None):
+    """Maska wierszy df (posortowanego po dacie) z dni [since, until] w UTC; limit — pierwsze N, jak LIMIT w SQL."""
+    lo = pd.Timestamp(since[:10], tz='UTC')
+    hi = pd.Timestamp(until[:10], tz='UTC') + pd.Timedelta(days=1)
+    m = (df['date'] >= lo) & (df['date'] < hi)
+    if limit is not None:
+        m &= m.cumsum() <= limit
+    return m
+
+def window_frame(store: TweetStore, collection_name: str, since: str, until: str, limit: int = None):
+    """
+    Okno kolekcji jako DataFrame [id, raw_text, date, url]: kolumnowo z Arrow (tekst jako
+    string[pyarrow], date jako datetime64 UTC) bez obiektów Pythona na wiersz.
+    Bez pyarrow — stara ścieżka przez krotki, ale z jednym wektorowym to_datetime.
+    """
+    try:
+        import pyarrow as pa
+        table = store.read_window_arrow(collection_name, since, until, limit=limit)
+        df = table.rename_columns(['id', 'raw_text', 'date', 'url']).to_pandas(
+            types_mapper={pa.string(): TEXT_DTYPE}.get)
+    except ImportError:
+        rows = store.fetch_collection_in_range(collection_name, since, until)
+        if limit is not None:
+            rows = rows[:limit]
+        df = pd.DataFrame(rows, columns=['id', 'raw_text', 'date', 'url'])
+        df['date'] = pd.to_datetime(df['date'], utc=True, format='ISO8601', errors='coerce')
+    return df
+
+# ===== Analiza i wizualizacja (z resume) + PROGRESS BAR + Parquet/CSV =====
+def _fill_missing(df, other, cols=('clean', 'clean_ns', 'sentiment', 'score', 'polarity')):
+    """
+    Uzupełnia w miejscu puste komórki df[cols] wartościami z other (indeks = id) jednym
+    wyrównaniem po id; wartości już obecne w df mają pierwszeństwo (jak combine_first).
+    """
+    cols = [c for c in cols if c in other.columns and c in df.columns]
+    other = other.loc[~other.index.duplicated(keep='last'), cols]
+    if 'sentiment' in cols:
+        other['sentiment'] = other['sentiment'].where(other['sentiment'].isin(LABELS))
+    other = other.astype({c: df[c].dtype for c in cols})
+    df.update(other.reindex(df['id'].to_numpy()).set_axis(df.index), overwrite=False)
+
+def _skip_reasons(df):
+    """Powód pominięcia inferencji: kod języka spoza LANG_TARGET albo 'empty' (pusty clean_ns); NaN = liczony."""
+    reason = df['lang'].astype(object).where(df['lang'] != cfg.LANG_TARGET)
+    reason = reason.mask(reason.isna() & (df['clean_ns'].str.len() == 0), 'empty')
+    counts = reason.value_counts()
+    for r, n in counts.items():
+        metrics.incr(f"analysis.lang_skipped.{r}", int(n))
+    if len(counts):
+        print(f"🌐 Język: {int(counts.sum())} z {len(df)} tweetów bez inferencji ("
+              + ", ".join(f"{r} {n}" for r, n in counts.items()) + ").")
+    return reason.astype('category')
+
+def _propagate_clusters(df, todo_mask, store, cascade: bool = False):
+    """
+    Wiersze do policzenia z własnym wynikiem w DB dostają go bez ponownego zapisu; pozostałe,
+    których klaster ma już wynik (w df albo w DB pod id reprezentanta), dziedziczą go (i ten jest
+    zapisywany z tym samym source). Bez kaskady jej wyniki z DB się nie liczą — policzy je transformer.
+    Z reszty model liczy pierwszy wiersz klastra (lider);
+    zwraca (maska liderów, {lider_idx: [indeksy pozostałych członków]}).
+    """
+    cols = RESULT_COLS + ['source']
+    done = df.loc[~todo_mask & df['sentiment'].notna()].drop_duplicates('cluster_id')
+    known = {cid: (*v, None) for cid, *v in done[['cluster_id'] + RESULT_COLS].itertuples(index=False, name=None)}
+    todo = df.loc[todo_mask]
+    try:
+        stored = store.sentiment_of((set(todo['id']) | set(todo['cluster_id'])) - set(known), cascade=cascade)
+    except Exception as e:
+        print(f"⚠️ Nie udało się odczytać wyników reprezentantów: {e}")
+        stored = {}
+    known.update((cid, stored[cid]) for cid in set(todo['cluster_id']) if cid in stored)
+
+    own = todo['id'].isin(list(stored))
+    cluster_hit = ~own & todo['cluster_id'].isin(list(known))
+    hit = own | cluster_hit
+    if hit.any():
+        idx_hit = todo.index[hit]
+        vals = pd.DataFrame([stored[tid] if is_own else known[cid] for tid, cid, is_own
+                             in zip(todo.loc[hit, 'id'], todo.loc[hit, 'cluster_id'], own[hit])],
+                            index=idx_hit, columns=cols)
+        for c in RESULT_COLS:
+            df.loc[idx_hit, c] = vals[c].astype(df[c].dtype)
+        new = vals.loc[todo.index[cluster_hit]]
+        for source, part in ((None, new.loc[new['source'].isna()]), ('cascade', new.loc[new['source'] == 'cascade'])):
+            if part.empty:
+                continue
+            try:
+                store.save_sentiment(zip(df.loc[part.index, 'id'], part['sentiment'], part['score'], part['polarity']),
+                                     source=source)
+            except Exception as e:
+                print(f"⚠️ Błąd zapisu wyników do DB: {e}")
+        metrics.incr("analysis.stored_results", int(own.sum()))
+        metrics.incr("analysis.near_dup_propagated", int(cluster_hit.sum()))
+        if cluster_hit.any():
+            print(f"🧬 {int(cluster_hit.sum())} tweetów dostało wynik z już policzonego klastra.")
+
+    rest = todo.loc[~hit]
+    leader_mask = pd.Series(False, index=df.index)
+    followers = {}
+    for idx in rest.groupby('cluster_id', sort=False).indices.values():
+        members = rest.index[idx].tolist()
+        leader_mask[members[0]] = True
+        if len(members) > 1:
+            followers[members[0]] = members[1:]
+    metrics.incr("analysis.near_dup_followers", sum(len(v) for v in followers.values()))
+    return leader_mask, followers
+
+def analyze_and_visualize(keyword, since, until, max_tweets,
+                          collection_name=None,
+                          use_db_only=False,
+                          resume_analysis=False,
+                          refresh=False,
+                          store=None,
+                          pipelined=None,
+                          windows=None,
+                          cascade=None,
+                          sample=None):
+    """
+    windows=[(since, until), ...] — kilka okien (np. 1/7/30 dni) w jednym przebiegu: suma zakresów
+    jest czytana, czyszczona i oceniana raz, a każde okno dostaje własny katalog wyników
+    (CSV/Parquet, wykresy, run_metrics) z wspólnego DataFrame. Bez windows — jedno okno [since, until].
+    cascade — pre-klasyfikator przed transformerem (domyślnie cfg.CASCADE; model z --train-cascade).
+    sample — margines błędu (np. 0.02): zamiast całego okna warstwowa próba per dzień (analyze_sample).
+    """
+    windows = sorted({(w[0], w[1]) for w in windows}) if windows else [(since, until)]
+    multi = len(windows) > 1
+    since, until = min(w[0] for w in windows), max(w[1] for w in windows)
+    allow_scrape = not use_db_only
+    collection_name = collection_name or keyword
+    pipelined = cfg.PIPELINE if pipelined is None else pipelined
+    cascade = cfg.CASCADE if cascade is None else cascade
+
+    run = metrics.begin_run()  # run_metrics.json tylko tego przebiegu (batch/--serve: wiele w jednym procesie)
+    load_tuning()
+    own_store = store is None
+    if own_store:
+        store = TweetStore(cfg.DB_PATH)
+    memo_before = memo_counters()
+
+    if sample:
+        sample = cfg.SAMPLE_MARGIN if sample is True else float(sample)
+        if allow_scrape:
+            top_up_collection(keyword, collection_name, since, until, max_tweets,
+                              resume_raw=resume_analysis, refresh=refresh, store=store)
+        outputs = [o for o in (analyze_sample(keyword, collection_name, w_since, w_until, store, margin=sample)
+                               for w_since, w_until in windows) if o]
+        if own_store:
+            store.close()
+        if cfg.INFER_MEMO:
+            memo_report(memo_before)
+        for i, out in enumerate(outputs):
+            metrics.write_run_metrics(Path(out["path"]) / "run_metrics.json", report=(i == len(outputs) - 1),
+                                      run=run, collection=collection_name, keyword=keyword, sample_margin=sample,
+                                      **{k: out[k] for k in ("since", "until", "tweets", "sampled")})
+        return {"tweets": sum(o["sampled"] for o in outputs), "path": outputs[0]["path"] if outputs else None,
+                "windows": outputs}
+
+    consumer = None
+    if pipelined and allow_scrape:
+        consumer = PipelineConsumer(collection_name, since, until, store).start()
+
+    try:
+        with metrics.span("analysis.prepare_dataset"):
+            df = prepare_dataset(
+                keyword=keyword,
+                collection_name=collection_name,
+                since=since,
+                until=until,
+                max_tweets=max_tweets,
+                allow_scrape=allow_scrape,
+                resume_raw=resume_analysis,
+                refresh=refresh,
+                store=store,
+                on_batch=consumer.on_batch if consumer else None,
+                windows=windows if multi else None
+            )
+    finally:
+        if consumer is not None:
+            consumer.close()
+
+    if df.empty:
+        print("❌ Brak tweetów do analizy.")
+        if own_store:
+            store.close()
+        return
+
+    df = df.drop_duplicates('id').reset_index(drop=True)  # indeks = pozycja (wycinki numpy w pętli partii)
+
+    with metrics.span("analysis.clean"):
+        df['clean']    = df['raw_text'].apply(clean_tweet).astype(TEXT_DTYPE)
+        df['clean_ns'] = df['clean'].apply(lambda txt: remove_stopwords(txt, STOPWORDS_PL)).astype(TEXT_DTYPE)
+
+    # filtr języka: werdykt per tweet (raz, potem z DB); obce i puste po czyszczeniu omijają model
+    if cfg.LANG_FILTER:
+        with metrics.span("analysis.lang_id"):
+            df['lang'] = pd.Categorical(lang_id.languages(store, df['id'], df['raw_text']))
+        df['skip'] = _skip_reasons(df)
+
+    # indeks częstości słów (tylko tweety jeszcze niepoliczone w kolekcji; bez odfiltrowanych językowo)
+    counted = df.loc[df['skip'].isna()] if cfg.LANG_FILTER else df
+    try:
+        store.add_word_counts(collection_name, counted[['id', 'clean_ns']].itertuples(index=False, name=None))
+    except Exception as e:
+        print(f"⚠️ Błąd zapisu częstości słów do DB: {e}")
+
+    # klastry near-duplikatów: model liczy jednego reprezentanta, reszta dziedziczy wynik
+    if cfg.NEAR_DUP:
+        try:
+            with metrics.span("analysis.near_dup"):
+                rep_of = assign_clusters(store, collection_name,
+                                         df[['id', 'clean']].itertuples(index=False, name=None))
+            df['cluster_id'] = df['id'].map(rep_of).fillna(df['id'])
+        except Exception as e:
+            print(f"⚠️ Indeks near-duplikatów niedostępny: {e}")
+            df['cluster_id'] = df['id']
+        df['cluster_size'] = df.groupby('cluster_id')['id'].transform('size')
+        print(f"🧬 Near-duplikaty: {len(df)} tweetów w {df['cluster_id'].nunique()} klastrach.")
+
+    df['sentiment'] = pd.Categorical.from_codes(np.full(len(df), -1, dtype=np.int8), dtype=LABEL_DTYPE)
+    df['score']     = np.full(len(df), np.nan, dtype=np.float32)
+    df['polarity']  = np.full(len(df), np.nan, dtype=np.float32)
+
+    # Resume analysis (jedno wyrównanie po id)
+    if resume_analysis:
+        chk = ckp.load_analysis_progress_latest(collection_name, since, until)
+        if chk is not None and 'id' in chk.columns:
+            _fill_missing(df, chk.set_index('id'))
+            already = df['sentiment'].notna().sum()
+            if already:
+                print(f"↩️ Resume ANALYSIS: wykryto {already} już policzonych rekordów.")
+
+    # wyniki policzone w trakcie scrapowania (pipeline)
+    if consumer is not None and consumer.results:
+        before = int(df['sentiment'].notna().sum())
+        piped = pd.DataFrame.from_dict(consumer.results, orient='index',
+                                       columns=['clean', 'clean_ns', 'sentiment', 'score', 'polarity'])
+        _fill_missing(df, piped)
+        print(f"⚡ Pipeline: {int(df['sentiment'].notna().sum()) - before} rekordów policzonych w trakcie scrapowania.")
+
+    # policz tylko brakujące — PROGRESS BAR
+    todo_mask = df['sentiment'].isna()
+    if 'skip' in df.columns:
+        todo_mask &= df['skip'].isna()
+    followers = {}
+    if cfg.NEAR_DUP and todo_mask.any():
+        todo_mask, followers = _propagate_clusters(df, todo_mask, store, cascade)
+    todo_idx = df.index[todo_mask].tolist()
+    n_followers = sum(len(v) for v in followers.values())
+    if n_followers:
+        print(f"🧬 Model liczy {len(todo_idx)} reprezentantów; {n_followers} near-duplikatów dziedziczy wynik.")
+
+    results = _ResultColumns(df)
+    audit_pos, audit_codes, n_cascade = None, None, 0
+    cascade_model = load_cascade() if cascade and todo_idx else None
+    if cascade and todo_idx and cascade_model is None:
+        print("⚠️ Kaskada włączona, ale brak modelu — najpierw --train-cascade. Liczy sam transformer.")
+    if cascade_model is not None:
+        threshold = cfg.CASCADE_THRESHOLD or cascade_model.meta.get("threshold")
+        if threshold is None:
+            print("⚠️ Model kaskady bez skalibrowanego progu — podaj --cascade-threshold. Liczy sam transformer.")
+        else:
+            n_before = len(todo_idx)
+            todo_idx, audit_pos, audit_codes = _cascade_pass(df, todo_idx, followers, results, store,
+                                                             cascade_model, threshold)
+            n_cascade = n_before - len(todo_idx)
+            n_followers = sum(len(followers.get(i, ())) for i in todo_idx)
+            results.sync()
+            ckp.save_analysis_progress(collection_name, since, until, df)
+            print(f"🪜 Kaskada (próg {threshold}): {n_cascade}/{n_before} reprezentantów bez transformera "
+                  f"({n_cascade / n_before:.1%}); audyt {len(audit_pos)}.")
+
+    if len(todo_idx) > 0:
+        batch_size = BATCH_SIZE
+        last_analysis_save = time.time()
+        pbar = tqdm(total=len(todo_idx) + n_followers, desc="Analyzing (sentiment)", unit="tw")
+        clean_ns = df['clean_ns'].to_numpy(dtype=object)
+        for start in range(0, len(todo_idx), batch_size):
+            idxs = np.asarray(todo_idx[start:start+batch_size])
+            if cfg.EMBEDDINGS:
+                out, vecs = score_texts(clean_ns[idxs].tolist(), store, with_vec=True)
+            else:
+                out, vecs = score_texts(clean_ns[idxs].tolist(), store), None
+            results.put(idxs, out)
+            fl = []
+            if followers:
+                # near-duplikaty: kopie wyniku lidera dla pozostałych członków klastra
+                fl = [(f, row_i) for row_i in idxs.tolist() for f in followers.get(row_i, ())]
+                if fl:
+                    dst, src = np.array(fl).T
+                    results.copy(dst, src)
+            if vecs is not None:
+                slot = {row_i: j for j, row_i in enumerate(idxs.tolist())}
+                save_vectors(store, results.ids[idxs], vecs, [(results.ids[f], slot[r]) for f, r in fl])
+            if fl:
+                idxs = np.concatenate([idxs, dst])
+
+            # wyniki do DB → triggery aktualizują rollup sentiment_daily
+            try:
+                store.save_sentiment(results.rows(idxs))
+            except Exception as e:
+                print(f"⚠️ Błąd zapisu wyników do DB: {e}")
+
+            pbar.update(len(idxs))
+            pbar.set_postfix_str(f"done {min(start+batch_size, len(todo_idx))}/{len(todo_idx)}")
+
+            now = time.time()
+            if (now - last_analysis_save) >= cfg.AN_PROGRESS_MIN_INTERVAL_SEC or (start + batch_size) >= len(todo_idx):
+                results.sync()
+                ckp.save_analysis_progress(collection_name, since, until, df)
+                last_analysis_save = now
+        pbar.close()
+    elif not n_cascade:
+        print("ℹ️ Nic do policzenia — wszystko już przeanalizowane.")
+    if audit_pos is not None:
+        cascade_report(results, audit_pos, audit_codes, n_cascade, n_cascade + len(todo_idx), cascade_model)
+    if cfg.INFER_MEMO:
+        memo_report(memo_before)
+
+    # Wyniki per okno z jednego DataFrame; wykresy wszystkich okien renderują się we wspólnej puli
+    # procesów równolegle z zapisami CSV/Parquet.
+    root = (collection_name or keyword).replace(" ", "_")
+    unweighted = cfg.NEAR_DUP and cfg.NEAR_DUP_WEIGHTING == "unweighted"
+    outputs, stages = [], []
+    for w_since, w_until in windows:
+        sub = df.loc[window_mask(df, w_since, w_until, max_tweets)] if multi else df
+        if sub.empty:
+            print(f"⚠️ Okno {w_since}..{w_until}: brak tweetów — pomijam.")
+            continue
+        path = cfg.RESULTS_DIR / root / f"{w_since}_to_{w_until}"
+        path.mkdir(parents=True, exist_ok=True)
+        if multi:
+            print(f"🪟 Okno {w_since}..{w_until}: {len(sub)} tweetów → {path}")
+        charts = stages[0].share(path) if stages else ChartStage(path)
+        _write_window_outputs(sub, root, collection_name, w_since, w_until, path, store, charts, unweighted)
+        stages.append(charts)
+        outputs.append({"since": w_since, "until": w_until, "tweets": len(sub), "path": str(path)})
+    if own_store:
+        store.close()
+
+    with metrics.span("analysis.charts_wait"):
+        for charts in reversed(stages):  # etap-właściciel puli na końcu
+            charts.wait()
+
+    for i, out in enumerate(outputs):
+        metrics.write_run_metrics(Path(out["path"]) / "run_metrics.json", report=(i == len(outputs) - 1),
+                                  run=run, collection=collection_name, keyword=keyword,
+                                  since=out["since"], until=out["until"], tweets=out["tweets"],
+                                  analyzed=len(df))
+    return {"tweets": len(df), "path": outputs[0]["path"] if outputs else None, "windows": outputs}
+
+def analyze_sample(keyword, collection_name, since, until, store, margin=None, confidence=None):
+    """
+    Szybka estymata sentymentu okna z warstwowej próby losowej per dzień (losowanej w SQL).
+    Model liczy tylko wylosowane tweety bez wyniku w DB; wyniki: udziały etykiet i dzienna
+    polaryzacja z przedziałami ufności (sample_estimates.json, sample_daily.csv, wykresy z pasmami).
+    """
+    margin = margin or cfg.SAMPLE_MARGIN
+    confidence = confidence or cfg.SAMPLE_CONFIDENCE
+    day_counts = store.day_counts(collection_name, since, until)
+    population = sum(day_counts.values())
+    if not population:
+        print(f"❌ Brak tweetów do próbkowania w oknie {since}..{until}.")
+        return None
+    quotas = sampling.allocate(day_counts, sampling.sample_size(population, margin, confidence))
+    with metrics.span("analysis.sample_read"):
+        rows = store.sample_by_day(collection_name, quotas)
+    print(f"🎲 Próba warstwowa {since}..{until}: {len(rows)} z {population} tweetów ({len(day_counts)} dni, "
+          f"margines ±{margin:.1%} przy {confidence:.0%}).")
+
+    df = pd.DataFrame(rows, columns=['id', 'raw_text', 'date', 'url', 'day'])
+    df['date'] = pd.to_datetime(df['date'], utc=True, format='ISO8601', errors='coerce')
+    with metrics.span("analysis.clean"):
+        df['clean']    = df['raw_text'].apply(clean_tweet).astype(TEXT_DTYPE)
+        df['clean_ns'] = df['clean'].apply(lambda txt: remove_stopwords(txt, STOPWORDS_PL)).astype(TEXT_DTYPE)
+
+    # wyniki już zapisane w DB nie są liczone ponownie
+    ids = df['id'].tolist()
+    try:
+        known = store.sentiment_of(ids, cascade=cfg.CASCADE)
+    except Exception as e:
+        print(f"⚠️ Nie udało się odczytać zapisanych wyników: {e}")
+        known = {}
+    res = [known[tid][:3] if tid in known else None for tid in ids]
+    todo = [i for i, r in enumerate(res) if r is None]
+    clean_ns = df['clean_ns'].to_numpy(dtype=object)
+    if todo:
+        pbar = tqdm(total=len(todo), desc="Analyzing (sample)", unit="tw")
+        for start in range(0, len(todo), BATCH_SIZE):
+            b = todo[start:start + BATCH_SIZE]
+            out = score_texts(clean_ns[b].tolist(), store)
+            batch_rows = []
+            for i, r in zip(b, out):
+                score = float(r['score'])
+                res[i] = (r['label'], score, signed_score_from_label(r['label'], score))
+                batch_rows.append((ids[i], *res[i]))
+            try:
+                store.save_sentiment(batch_rows)
+            except Exception as e:
+                print(f"⚠️ Błąd zapisu wyników do DB: {e}")
+            pbar.update(len(b))
+        pbar.close()
+    metrics.incr("analysis.sample_rows", len(df))
+    metrics.incr("analysis.sample_scored", len(todo))
+    vals = pd.DataFrame(res, columns=RESULT_COLS, index=df.index)
+    df['sentiment'] = vals['sentiment'].astype(LABEL_DTYPE)
+    df['score']     = vals['score'].astype(np.float32)
+    df['polarity']  = vals['polarity'].astype(np.float32)
+    df['weight']    = df['day'].map(lambda d: day_counts[d] / quotas[d]).astype(np.float32)
+
+    est = sampling.estimate(df, day_counts, confidence)
+    ov = est["overall"]
+    print(f"📊 Estymata ({len(todo)} policzonych teraz, {len(df) - len(todo)} z DB):")
+    for l in LABELS:
+        print(f"   {l:<9} {ov[l]['share']:6.1%}  [{ov[l]['lo']:.1%} – {ov[l]['hi']:.1%}]  ≈ {ov[l]['count']} tweetów")
+    print(f"   polaryzacja {ov['polarity']['mean']:+.3f}  [{ov['polarity']['lo']:+.3f} – {ov['polarity']['hi']:+.3f}]")
+
+    root = (collection_name or keyword).replace(" ", "_")
+    path = cfg.RESULTS_DIR / root / f"{since}_to_{until}_sample"
+    path.mkdir(parents=True, exist_ok=True)
+    charts = ChartStage(path)
+    charts.submit("sentiment_distribution.png", render_distribution_ci,
+                  {l: (ov[l]['share'], ov[l]['lo'], ov[l]['hi']) for l in LABELS})
+    charts.submit("polarity_trend.png", render_trend_ci,
+                  {d: (r['polarity'], r['polarity_lo'], r['polarity_hi']) for d, r in est["daily"].items()})
+
+    (path / "sample_estimates.json").write_text(
+        json.dumps(est, indent=2, ensure_ascii=False), encoding="utf-8")
+    pd.DataFrame.from_dict(est["daily"], orient='index').rename_axis('day').to_csv(
+        path / "sample_daily.csv", encoding='utf-8-sig')
+    if cfg.SAVE_CSV:
+        csv_file = path / f"{root}_{since}_to_{until}_sample.csv"
+        df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+        print(f"💾 CSV próby zapisane: {csv_file}")
+    print(f"💾 Estymaty zapisane do {path / 'sample_estimates.json'}")
+    with metrics.span("analysis.charts_wait"):
+        charts.wait()
+    return {"since": since, "until": until, "tweets": population, "sampled": len(df), "path": str(path)}
+
+def _write_window_outputs(df, root, collection_name, since, until, path, store, charts, unweighted):
+    """Agregaty, zlecenie wykresów i zapis CSV/Parquet dla jednego okna (df — wiersze okna)."""
+    n_rows = len(df)
+    if 'skip' in df.columns:
+        # pominięte przez filtr języka — osobny plik, poza wynikami i agregatami
+        skipped, df = df.loc[df['skip'].notna()], df.loc[df['skip'].isna()]
+        if len(skipped):
+            skipped_file = path / f"{root}_{since}_to_{until}_skipped.csv"
+            skipped[['id', 'raw_text', 'date', 'url', 'lang', 'skip']].to_csv(
+                skipped_file, index=False, encoding='utf-8-sig')
+            print(f"💾 Pominięte (język/puste): {len(skipped)} → {skipped_file}")
+    # Agregaty do wykresów z rollupów (O(dni)) tylko, gdy df to całe okno kolekcji (bez obcięcia
+    # max_tweets) i rollup liczy te same oceny co df — inaczej z DataFrame, jak zapisany obok CSV.
+    # NEAR_DUP_WEIGHTING=unweighted: jeden głos na klaster near-duplikatów (z DataFrame).
+    with metrics.span("analysis.aggregates"):
+        daily = freqs = None
+        whole = store.count_in_range(collection_name, since, until) == n_rows
+        if whole and not unweighted:
+            daily = store.sentiment_daily(collection_name, since, until)
+            if sum(d[1] + d[2] + d[3] for d in daily) != int(df['sentiment'].notna().sum()):
+                daily = None
+        if whole and len(df) == n_rows:  # pominięte językowo mogły trafić do indeksu słów we wcześniejszych przebiegach
+            freqs = store.word_frequencies(collection_name, since, until, limit=WORDCLOUD_MAX_WORDS)
+        if freqs is None:
+            freqs = dict(Counter(tok for txt in df['clean_ns'] for tok in str(txt).split())
+                         .most_common(WORDCLOUD_MAX_WORDS))
+
+    if daily:
+        counts = {'positive': sum(d[1] for d in daily),
+                  'neutral':  sum(d[2] for d in daily),
+                  'negative': sum(d[3] for d in daily)}
+        trend = {d[0]: d[4] / (d[1] + d[2] + d[3]) for d in daily}
+    else:
+        base = df.drop_duplicates('cluster_id') if unweighted else df
+        counts = base['sentiment'].value_counts().reindex(['positive','neutral','negative']).fillna(0).astype(int).to_dict()
+        df_t = base.dropna(subset=['date']).copy()
+        df_t['day'] = df_t['date'].dt.strftime('%Y-%m-%d')
+        df_t['polarity'] = pd.to_numeric(df_t['polarity'], errors='coerce')
+        trend = df_t.groupby('day')['polarity'].mean().dropna().to_dict()
+
+    charts.submit("sentiment_distribution.png", render_distribution, counts)
+    if trend:
+        charts.submit("polarity_trend.png", render_trend, trend)
+    else:
+        print("⚠️ Brak dat do wykresu trendu polaryzacji.")
+    if freqs:
+        charts.submit("wordcloud.png", render_wordcloud, freqs)
+    else:
+        print("⚠️ Brak tekstu po usunięciu stopwords — pomijam chmurę słów.")
+
+    # Final + zapisy
+    csv_file = path / f"{root}_{since}_to_{until}.csv"
+    parquet_file = path / f"{root}_{since}_to_{until}.parquet"
+
+    wrote_any = False
+    if cfg.SAVE_CSV:
+        with metrics.span("analysis.write_csv"):
+            df.to_csv(csv_file, index=False, encoding='utf-8-sig')
+        print(f"💾 CSV zapisane: {csv_file}")
+        wrote_any = True
+    else:
+        print("⏭️ Pomiń zapis CSV (flaga --no-csv).")
+
+    if cfg.SAVE_PARQUET:
+        try:
+            with metrics.span("analysis.write_parquet"):
+                df.to_parquet(parquet_file, index=False)
+            print(f"💾 Parquet zapisany: {parquet_file}")
+            wrote_any = True
+        except Exception as e:
+            print(f"⚠️ Nie udało się zapisać Parquet ({e}). Zainstaluj 'pyarrow' lub 'fastparquet'.")
+    else:
+        print("⏭️ Pomiń zapis Parquet (flaga --no-parquet).")
+
+    if not wrote_any:
+        print("⚠️ Uwaga: wyłączone zapisy CSV i Parquet — wyniki nie zostały zserializowane do plików.")
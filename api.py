@@ -0,0 +1,239 @@
+import json
+import math
+import base64
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, unquote
+
+import config as cfg
+from store import TweetStore
+
+
+# ===== LRU cache odpowiedzi (unieważniany przy nowych zapisach do DB) =====
+class ResponseCache:
+    """
+    LRU gotowych odpowiedzi JSON. Przed odczytem sprawdzamy PRAGMA data_version połączenia
+    API — jeśli scraper/analiza zatwierdziły zapis, cały cache jest czyszczony.
+    """
+    def __init__(self, store: TweetStore, maxsize: int = None):
+        self.store = store
+        self.maxsize = maxsize or cfg.API_CACHE_SIZE
+        self._data = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        version = self.store.data_version()
+        with self._lock:
+            if version != self._version:
+                self._data.clear()
+                self._version = version
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        body = compute()
+        with self._lock:
+            if version == self._version:
+                self._data[key] = body
+                if len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return body
+
+
+class NotFound(LookupError):
+    """Brak zasobu wskazanego w zapytaniu (→ 404)."""
+
+
+# ===== bazowy handler JSON (wspólny z usługą scoringu) =====
+class JSONHandler(BaseHTTPRequestHandler):
+    server_version = "SentiX/1.0"
+
+    def send_json(self, code: int, payload, raw: bytes = None, headers: dict = None):
+        body = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, code: int, message: str):
+        self.send_json(code, {"error": message})
+
+    def log_message(self, fmt, *args):
+        if cfg.API_VERBOSE:
+            super().log_message(fmt, *args)
+
+
+def _encode_cursor(ts: str, tid: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([ts, tid]).encode("utf-8")).decode("ascii")
+
+def _decode_cursor(cursor: str):
+    ts, tid = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return ts, tid
+
+
+class QueryHandler(JSONHandler):
+    """
+    GET /health
+    GET /collections
+    GET /collections/<name>/count?since=&until=
+    GET /collections/<name>/stats?since=&until=
+    GET /collections/<name>/sentiment?since=&until=
+    GET /collections/<name>/daily?since=&until=
+    GET /collections/<name>/tweets?since=&until=&limit=&cursor=
+    GET /collections/<name>/similar?id=&k=&since=&until=   (wektory zdań z --embeddings)
+    """
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/") if p]
+        q = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        store = self.server.store
+
+        if parts == ["health"]:
+            return self.send_json(200, {"status": "ok"})
+
+        try:
+            if parts == ["collections"]:
+                compute = lambda: [{"name": n, "created_at": c, "count": cnt}
+                                   for n, c, cnt in store.list_collections()]
+            elif len(parts) == 3 and parts[0] == "collections":
+                name, what = parts[1], parts[2]
+                since, until = q.get("since"), q.get("until")
+                if what == "count":
+                    compute = lambda: {"collection": name, "since": since, "until": until,
+                                       "count": store.count_in_range(name, since, until)}
+                elif what == "stats":
+                    compute = lambda: store.stats(name, since, until)
+                elif what == "sentiment":
+                    compute = lambda: self._sentiment(store, name, since, until)
+                elif what == "daily":
+                    compute = lambda: self._daily(store, name, since, until)
+                elif what == "tweets":
+                    limit = max(1, min(int(q.get("limit", 100)), cfg.API_MAX_PAGE))
+                    after = _decode_cursor(q["cursor"]) if q.get("cursor") else None
+                    compute = lambda: self._tweets(store, name, since, until, limit, after)
+                elif what == "similar":
+                    tid = q["id"]
+                    k = max(1, min(int(q.get("k", 10)), cfg.API_MAX_PAGE))
+                    compute = lambda: self._similar(self.server, name, since, until, tid, k)
+                else:
+                    return self.send_error_json(404, f"nieznany zasób: {what}")
+            else:
+                return self.send_error_json(404, "nie znaleziono")
+
+            key = (tuple(parts), tuple(sorted(q.items())))
+            body = self.server.cache.get_or_compute(
+                key, lambda: json.dumps(compute(), ensure_ascii=False).encode("utf-8"))
+            self.send_json(200, None, raw=body)
+        except NotFound as e:
+            self.send_error_json(404, str(e))
+        except (ValueError, KeyError) as e:
+            self.send_error_json(400, f"niepoprawne parametry: {e}")
+        except Exception as e:
+            self.send_error_json(500, str(e))
+
+    @staticmethod
+    def _sentiment(store, name, since, until):
+        st = store.stats(name, since, until)
+        scored = st["scored"]
+        return {"collection": name, "since": since, "until": until, "scored": scored,
+                "counts": st["sentiment"],
+                "share": {k: (v / scored if scored else None) for k, v in st["sentiment"].items()},
+                "polarity_mean": st["polarity_mean"], "polarity_std": st["polarity_std"]}
+
+    @staticmethod
+    def _daily(store, name, since, until):
+        out = []
+        for day, p, u, n, s1, s2 in store.sentiment_daily(name, since, until):
+            cnt = p + u + n
+            mean = s1 / cnt
+            out.append({"day": day, "n": cnt, "positive": p, "neutral": u, "negative": n,
+                        "polarity_mean": mean, "polarity_std": math.sqrt(max(0.0, s2 / cnt - mean * mean))})
+        return {"collection": name, "since": since, "until": until, "days": out}
+
+    @staticmethod
+    def _tweets(store, name, since, until, limit, after):
+        rows = store.fetch_tweets_page(name, since, until, limit=limit, after=after)
+        items = [{"id": tid, "text": text, "ts": ts, "url": u,
+                  "sentiment": label, "score": score, "polarity": pol}
+                 for tid, text, ts, u, label, score, pol in rows]
+        nxt = _encode_cursor(rows[-1][2], rows[-1][0]) if len(rows) == limit else None
+        return {"collection": name, "since": since, "until": until, "items": items, "next_cursor": nxt}
+
+    @staticmethod
+    def _similar(server, name, since, until, tid, k):
+        index = _vector_index(server, name, since, until)
+        if tid not in index:
+            raise NotFound(f"brak wektora dla tweeta {tid}")
+        hits = index.similar_to(tid, k)
+        meta = server.store.tweets_by_ids([h for h, _ in hits])
+        items = []
+        for h, sim in hits:
+            text, ts, u = meta.get(h, (None, None, None))
+            items.append({"id": h, "similarity": sim, "text": text, "ts": ts, "url": u})
+        return {"collection": name, "since": since, "until": until, "id": tid,
+                "indexed": len(index), "ivf": index.centroids is not None, "items": items}
+
+
+def _vector_index(server, name, since, until):
+    """
+    VectorIndex okna z małego LRU serwera (kluczem także data_version — nowe wektory → nowy indeks).
+    Indeks buduje jeden wątek; równoległe zapytania o ten sam klucz czekają na jego Future.
+    """
+    from similarity import VectorIndex
+    key = (name, since, until, server.store.data_version())
+    with server.index_lock:
+        index = server.indexes.get(key)
+        if index is not None:
+            server.indexes.move_to_end(key)
+            return index
+        fut = server.index_builds.get(key)
+        if fut is None:
+            fut = server.index_builds[key] = Future()
+            owner = True
+        else:
+            owner = False
+    if not owner:
+        return fut.result()
+    try:
+        index = VectorIndex.from_store(server.store, name, since, until)
+    except Exception as e:
+        with server.index_lock:
+            server.index_builds.pop(key, None)
+        fut.set_exception(e)
+        raise
+    with server.index_lock:
+        server.index_builds.pop(key, None)
+        server.indexes[key] = index
+        while len(server.indexes) > cfg.API_INDEX_CACHE:
+            server.indexes.popitem(last=False)
+    fut.set_result(index)
+    return index
+
+
+def make_server(host: str = None, port: int = None, handler=QueryHandler, store: TweetStore = None):
+    srv = ThreadingHTTPServer((host or cfg.API_HOST, port or cfg.API_PORT), handler)
+    srv.daemon_threads = True
+    srv.store = store or TweetStore(cfg.DB_PATH)
+    srv.cache = ResponseCache(srv.store)
+    srv.indexes, srv.index_builds, srv.index_lock = OrderedDict(), {}, threading.Lock()
+    return srv
+
+def serve_api(host: str = None, port: int = None):
+    srv = make_server(host, port)
+    h, p = srv.server_address[:2]
+    print(f"🌐 API nasłuchuje na http://{h}:{p} (Ctrl+C kończy)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Zatrzymuję API...")
+    finally:
+        srv.server_close()
+        srv.store.close()
@@ -0,0 +1,160 @@
+"""
+Autotune inferencji sentymentu dla bieżącego hosta:
+
+    python main.py --autotune --collection inflacja [--autotune-sample 1024]
+
+Mierzy przepustowość pipeline na próbce tekstów z kolekcji (po clean_tweet + stopwords, czyli
+dokładnie to, co dostaje model) dla siatki: batch size × wątki intra-op × wątki inter-op ×
+max_length. Najlepsza konfiguracja trafia do cfg.AUTOTUNE_PROFILE pod kluczem host+model;
+analyzer wczytuje ją sam przy pierwszej analizie (apply_profile).
+"""
+import json
+import os
+import platform
+import time
+import multiprocessing
+from datetime import datetime
+from pathlib import Path
+
+import config as cfg
+from text_clean import clean_tweet, remove_stopwords, STOPWORDS_PL
+
+
+def host_key() -> str:
+    return f"{platform.node()}|{platform.machine()}|{os.cpu_count()}cpu"
+
+def profile_key(model: str = None) -> str:
+    return f"{host_key()}|{model or cfg.SENTIMENT_MODEL}"
+
+def _read_profiles(path) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
+def load_profile(path=None, model: str = None):
+    """Zapisana konfiguracja dla tego hosta i modelu albo None."""
+    return _read_profiles(path or cfg.AUTOTUNE_PROFILE).get(profile_key(model))
+
+def save_profile(best: dict, path=None, model: str = None):
+    path = Path(path or cfg.AUTOTUNE_PROFILE)
+    profiles = _read_profiles(path)
+    profiles[profile_key(model)] = best
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(profiles, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"💾 Profil autotune zapisany do {path} ({profile_key(model)})")
+
+def thread_candidates(cpus: int = None):
+    """1, 2, 4, ... aż do liczby rdzeni (plus sama liczba rdzeni)."""
+    cpus = cpus or os.cpu_count() or 1
+    out, n = [], 1
+    while n < cpus:
+        out.append(n)
+        n *= 2
+    return out + [cpus]
+
+def pipeline_kwargs(profile: dict) -> dict:
+    """Argumenty wywołania pipeline wynikające z profilu (partia wewnątrz pipeline + obcięcie)."""
+    return {"batch_size": int(profile["batch_size"]), "truncation": True,
+            "max_length": int(profile["max_length"])}
+
+def apply_profile(profile: dict):
+    """Ustawia wątki torch z profilu; inter-op tylko jeśli proces jeszcze nie liczył równolegle."""
+    import torch
+    torch.set_num_threads(int(profile["intra_op"]))
+    try:
+        torch.set_num_interop_threads(int(profile["inter_op"]))
+    except RuntimeError as e:
+        print(f"⚠️ Nie ustawiono wątków inter-op ({e}) — zostaje {torch.get_num_interop_threads()}.")
+
+
+# ===== pomiar =====
+def _load_pipeline():
+    """Model przez leniwy akcesor analizy — proces sweepu (spawn importuje main → analyzer) trzyma jedną kopię."""
+    from analyzer import sentiment_pipeline
+    return sentiment_pipeline()
+
+def _lengths_p99(tokenizer, texts) -> int:
+    lengths = sorted(len(ids) for ids in tokenizer(texts, truncation=False)["input_ids"])
+    return lengths[min(len(lengths) - 1, int(0.99 * len(lengths)))] if lengths else 0
+
+def _measure(pipe, texts, batch_size: int, max_length: int, repeat: int) -> float:
+    """Najlepsza przepustowość (tekstów/s) z repeat przebiegów; porcje jak w pętli analizy."""
+    kw = {"batch_size": batch_size, "truncation": True, "max_length": max_length}
+    pipe(texts[:batch_size], **kw)  # rozgrzewka (alokacje, lazy init)
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(0, len(texts), batch_size):
+            pipe(texts[i:i + batch_size], **kw)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return len(texts) / best if best else 0.0
+
+def _sweep(inter_op: int, texts, batch_sizes, max_lengths, threads, repeat: int):
+    """
+    Siatka dla jednej liczby wątków inter-op — uruchamiana w świeżym procesie, bo torch
+    pozwala ustawić inter-op tylko przed pierwszą równoległą operacją.
+    """
+    import torch
+    torch.set_num_interop_threads(inter_op)
+    pipe = _load_pipeline()
+    p99 = _lengths_p99(pipe.tokenizer, texts)
+    lengths = [L for L in max_lengths if L >= p99] or [max(max_lengths)]
+    results = []
+    for intra in threads:
+        torch.set_num_threads(intra)
+        for max_length in lengths:
+            for bs in batch_sizes:
+                tput = _measure(pipe, texts, bs, max_length, repeat)
+                results.append({"batch_size": bs, "intra_op": intra, "inter_op": inter_op,
+                                "max_length": max_length, "throughput": round(tput, 1)})
+                print(f"   inter={inter_op:<2} intra={intra:<3} max_len={max_length:<4} batch={bs:<4} → {tput:8.1f} tw/s")
+    return p99, results
+
+def autotune(collection_name: str, sample: int = None, store=None, save: bool = True) -> dict:
+    """Przeszukuje siatkę na próbce kolekcji; zwraca (i zapisuje) najlepszą konfigurację."""
+    from store import TweetStore
+    own_store = store is None
+    if own_store:
+        store = TweetStore(cfg.DB_PATH)
+    try:
+        raw = store.sample_texts(collection_name, sample or cfg.AUTOTUNE_SAMPLE)
+    finally:
+        if own_store:
+            store.close()
+    texts = [t for t in (remove_stopwords(clean_tweet(r), STOPWORDS_PL) for r in raw) if t]
+    if not texts:
+        print(f"❌ Autotune: brak tekstów w kolekcji '{collection_name}'.")
+        return None
+
+    threads = thread_candidates()
+    print(f"🔧 Autotune: {len(texts)} tekstów | host {host_key()} | model {cfg.SENTIMENT_MODEL}\n"
+          f"   batch {list(cfg.AUTOTUNE_BATCH_SIZES)} × intra {threads} × inter {list(cfg.AUTOTUNE_INTEROP)}"
+          f" × max_length {list(cfg.AUTOTUNE_MAX_LENGTHS)}")
+    ctx = multiprocessing.get_context("spawn")
+    results, p99 = [], 0
+    for inter_op in cfg.AUTOTUNE_INTEROP:
+        with ctx.Pool(1) as pool:
+            p99, res = pool.apply(_sweep, (inter_op, texts, list(cfg.AUTOTUNE_BATCH_SIZES),
+                                           list(cfg.AUTOTUNE_MAX_LENGTHS), threads, cfg.AUTOTUNE_REPEAT))
+        results.extend(res)
+    if not results:
+        print("❌ Autotune: brak pomiarów.")
+        return None
+
+    results.sort(key=lambda r: r["throughput"], reverse=True)
+    best = dict(results[0])
+    baseline = next((r for r in results if r["batch_size"] == 32 and r["intra_op"] == threads[-1]), None)
+    print(f"\n🏁 Najlepsze konfiguracje (p99 długości próbki: {p99} tokenów):")
+    for r in results[:5]:
+        print(f"   batch={r['batch_size']:<4} intra={r['intra_op']:<3} inter={r['inter_op']:<2} "
+              f"max_len={r['max_length']:<4} {r['throughput']:8.1f} tw/s")
+    if baseline:
+        print(f"   (batch=32, wszystkie rdzenie: {baseline['throughput']:.1f} tw/s → "
+              f"x{best['throughput'] / max(baseline['throughput'], 1e-9):.2f})")
+    best.update({"sample": len(texts), "p99_tokens": p99, "cpus": os.cpu_count(),
+                 "tuned_at": datetime.now().isoformat(timespec="seconds")})
+    if save:
+        save_profile(best)
+    return best
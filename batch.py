@@ -0,0 +1,198 @@
+import json
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import config as cfg
+from store import TweetStore
+from analyzer import analyze_and_visualize, top_up_collection
+
+JOB_KEYS = ("keyword", "collection", "since", "until", "max_tweets", "refresh", "db_only",
+            "days_back", "interval", "jitter", "windows", "sample")
+DEFAULT_MAX_TWEETS = 500
+
+
+# ===== wczytywanie zadań =====
+def _normalize_job(job: dict, defaults: dict) -> dict:
+    j = {k: defaults.get(k) for k in JOB_KEYS}
+    j.update({k: v for k, v in job.items() if k in JOB_KEYS and v is not None})
+    if not j.get("keyword"):
+        raise ValueError(f"Zadanie bez 'keyword': {job}")
+    j["keyword"] = str(j["keyword"]).strip()
+    j["collection"] = j.get("collection") or j["keyword"]
+    j["max_tweets"] = int(j.get("max_tweets") or DEFAULT_MAX_TWEETS)
+    j["refresh"] = bool(j.get("refresh"))
+    j["db_only"] = bool(j.get("db_only"))
+    # days_back → okno kroczące liczone w chwili uruchomienia (chyba że zadanie podaje własne since)
+    if j.get("days_back") is not None and job.get("since") is None:
+        j["days_back"] = int(j["days_back"])
+        j["since"] = j["until"] = None
+    # windows → kilka okien (dni wstecz od until) analizowanych w jednym przebiegu
+    j["windows"] = parse_windows(j.get("windows"))
+    return j
+
+def parse_windows(value):
+    """'1,7,30' | [1, 7, 30] → posortowana lista dni (bez powtórzeń) albo None."""
+    if not value:
+        return None
+    items = value.split(",") if isinstance(value, str) else value
+    days = sorted({int(str(d).strip().rstrip("d")) for d in items if str(d).strip()})
+    if any(d < 0 for d in days):
+        raise ValueError(f"Niepoprawne okna: {value!r}")
+    return days or None
+
+def windows_back(days, until: str):
+    """[(until - d, until)] dla każdego d z days — od najszerszego okna."""
+    u = datetime.fromisoformat(until[:10]).date()
+    return [((u - timedelta(days=d)).isoformat(), u.isoformat()) for d in sorted(days, reverse=True)]
+
+def job_windows(job: dict):
+    """Okna zadania z 'windows' (względem until, domyślnie dzisiaj) albo None — wtedy jedno okno job_window."""
+    if not job.get("windows"):
+        return None
+    return windows_back(job["windows"], job.get("until") or datetime.now().strftime("%Y-%m-%d"))
+
+def job_window(job: dict):
+    """(since, until) zadania; dla days_back liczone względem dzisiaj, dla windows — suma okien."""
+    windows = job_windows(job)
+    if windows:
+        return windows[0]
+    if job.get("since"):
+        return job["since"], job.get("until") or datetime.now().strftime("%Y-%m-%d")
+    today = datetime.now().date()
+    days_back = job.get("days_back") or 0
+    return (today - timedelta(days=days_back)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")
+
+def load_jobs_file(path: str, defaults: dict) -> list:
+    """
+    YAML (wymaga PyYAML) lub JSON:
+        defaults: {since: 2024-01-01, max_tweets: 500}
+        jobs:
+          - keyword: inflacja
+          - {keyword: "nbp stopy", collection: nbp, refresh: true}
+    Dopuszczalna jest też sama lista zadań.
+    """
+    p = Path(path)
+    text = p.read_text(encoding="utf-8")
+    if p.suffix.lower() == ".json":
+        data = json.loads(text)
+    else:
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("Plik zadań YAML wymaga pakietu 'pyyaml' (albo użyj .json).")
+        data = yaml.safe_load(text)
+
+    if isinstance(data, dict):
+        defaults = {**defaults, **{k: v for k, v in (data.get("defaults") or {}).items() if v is not None}}
+        items = data.get("jobs") or []
+    else:
+        items = data or []
+    # daty z YAML przychodzą jako date — ujednolicamy do YYYY-MM-DD
+    for d in [defaults, *items]:
+        if isinstance(d, dict):
+            for k in ("since", "until"):
+                if d.get(k) is not None:
+                    d[k] = str(d[k])
+    return [_normalize_job(it if isinstance(it, dict) else {"keyword": it}, defaults) for it in items]
+
+def load_keywords_file(path: str, defaults: dict) -> list:
+    """
+    Jedno słowo kluczowe na linię; opcjonalnie 'keyword<TAB>kolekcja'. Linie z # są pomijane.
+    """
+    jobs = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        kw, _, coll = line.partition("\t")
+        jobs.append(_normalize_job({"keyword": kw.strip(), "collection": coll.strip() or None}, defaults))
+    return jobs
+
+
+# ===== wykonanie =====
+def _analyze_job(job: dict, store: TweetStore, resume_analysis: bool, timing: dict):
+    t0 = time.time()
+    since, until = job_window(job)
+    try:
+        res = analyze_and_visualize(
+            job["keyword"], since, until, job["max_tweets"],
+            collection_name=job["collection"],
+            use_db_only=True,  # scraping zrobiony już w wątku głównym
+            resume_analysis=resume_analysis,
+            store=store,
+            windows=job_windows(job),
+            sample=job.get("sample")
+        )
+        timing["tweets"] = (res or {}).get("tweets", 0)
+    except Exception as e:
+        timing["error"] = str(e)
+        print(f"❌ [{job['keyword']}] analiza nie powiodła się: {e}")
+    timing["analysis_s"] = time.time() - t0
+
+def run_batch(jobs: list, start_browser=None, resume_raw: bool = False, resume_analysis: bool = False):
+    """
+    Wiele słów kluczowych w jednym procesie: jedna przeglądarka (start_browser wołany raz),
+    jeden model (ładowany przy imporcie analyzer) i jedno połączenie SQLite.
+    Scraping zadania i+1 (wątek główny, Selenium) biegnie równolegle z analizą zadania i
+    (jednowątkowy executor), więc przeglądarka i CPU nie czekają na siebie.
+    """
+    if not jobs:
+        print("❌ Brak zadań do wykonania.")
+        return []
+
+    store = TweetStore(cfg.DB_PATH)
+    drv = None
+    timings = []
+    t_batch = time.time()
+    try:
+        first_scrape = next((j for j in jobs if not j["db_only"]), None)
+        if first_scrape is not None and start_browser is not None:
+            t0 = time.time()
+            drv = start_browser(first_scrape["keyword"], *job_window(first_scrape))
+            print(f"⏱️ Start przeglądarki + logowanie: {time.time() - t0:.1f}s")
+
+        futures = []
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="analysis") as pool:
+            for n, job in enumerate(jobs, 1):
+                since, until = job_window(job)
+                timing = {"job": n, "keyword": job["keyword"], "collection": job["collection"],
+                          "window": f"{since}..{until}",
+                          "scrape_s": 0.0, "analysis_s": 0.0, "tweets": 0}
+                timings.append(timing)
+                print(f"\n📋 [{n}/{len(jobs)}] {job['keyword']} → {job['collection']} | "
+                      f"{since}..{until} | max_tweets={job['max_tweets']}")
+
+                if not job["db_only"] and drv is not None:
+                    t0 = time.time()
+                    try:
+                        top_up_collection(job["keyword"], job["collection"], since, until,
+                                          job["max_tweets"], resume_raw=resume_raw,
+                                          refresh=job["refresh"], store=store)
+                    except Exception as e:
+                        timing["error"] = str(e)
+                        print(f"❌ [{job['keyword']}] scraping nie powiódł się: {e}")
+                    timing["scrape_s"] = time.time() - t0
+
+                futures.append(pool.submit(_analyze_job, job, store, resume_analysis, timing))
+            for f in futures:
+                f.result()
+    finally:
+        store.close()
+        if drv is not None:
+            try: drv.quit()
+            except Exception: pass
+
+    _print_summary(timings, time.time() - t_batch)
+    return timings
+
+def _print_summary(timings: list, total_s: float):
+    print("\n⏱️ Podsumowanie zadań:")
+    print(f"{'#':>3}  {'keyword':<24} {'window':<23} {'tweets':>7} {'scrape[s]':>10} {'analiza[s]':>11}  status")
+    for t in timings:
+        status = f"błąd: {t['error']}" if t.get("error") else "ok"
+        print(f"{t['job']:>3}  {t['keyword'][:24]:<24} {t['window']:<23} {t['tweets']:>7} "
+              f"{t['scrape_s']:>10.1f} {t['analysis_s']:>11.1f}  {status}")
+    serial = sum(t["scrape_s"] + t["analysis_s"] for t in timings)
+    print(f"Razem: {total_s:.1f}s (suma etapów {serial:.1f}s — zysk z nakładania {max(0.0, serial - total_s):.1f}s)")
@@ -0,0 +1,57 @@
+import random
+from datetime import datetime, timedelta
+
+# Słownik do syntetycznych tweetów — polskie słowa z polskimi znakami, żeby clean_tweet
+# i stopwords pracowały na realistycznym wejściu.
+_SUBJECTS = ["rząd", "premier", "prezydent", "sejm", "nbp", "inflacja", "złotówka", "opozycja",
+             "minister", "ceny paliw", "kredyty", "podatki", "emerytury", "rynek pracy", "ekonomiści"]
+_VERBS = ["podnosi", "obniża", "zapowiada", "krytykuje", "ignoruje", "ogłasza", "komentuje",
+          "wspiera", "blokuje", "analizuje", "przegapia", "utrzymuje"]
+_OBJECTS = ["stopy procentowe", "ceny w sklepach", "nowy budżet", "reformę", "plan naprawczy",
+            "wsparcie dla rodzin", "dane z gus", "kurs euro", "wzrost płac", "koszty energii"]
+_TAILS = ["i to jest skandal", "w końcu dobra wiadomość", "zobaczymy co z tego wyjdzie",
+          "nie wierzę w to", "świetna decyzja", "to się źle skończy", "jak zwykle",
+          "brawo", "żenada", "ciekawe ile to potrwa", "", "", ""]
+_EMOJI = ["😡", "👍", "🤔", "😂", "🔥", "💸", ""]
+_USERS = ["jan_kowalski", "ania88", "ekonomia_pl", "redakcja", "obserwator", "marek_w"]
+
+
+def make_text(rng: random.Random, mention_p=0.3, url_p=0.2, hashtag_p=0.4) -> str:
+    parts = [rng.choice(_SUBJECTS).capitalize(), rng.choice(_VERBS), rng.choice(_OBJECTS)]
+    tail = rng.choice(_TAILS)
+    if tail:
+        parts.append(f"— {tail}")
+    text = " ".join(parts) + rng.choice([".", "!", "?", "!!", "..."])
+    if rng.random() < mention_p:
+        text = f"@{rng.choice(_USERS)} " + text
+    if rng.random() < hashtag_p:
+        text += " #" + rng.choice(_SUBJECTS).replace(" ", "")
+    if rng.random() < url_p:
+        text += f" https://t.co/{rng.getrandbits(40):x}"
+    emoji = rng.choice(_EMOJI)
+    return text + (f" {emoji}" if emoji else "")
+
+
+def generate(n: int = 1000, since: str = "2024-01-01", days: int = 30, dup_p: float = 0.05,
+             seed: int = 1234, **text_kw):
+    """
+    Lista n syntetycznych tweetów (id, text, created_at ISO, url) w oknie [since, since+days).
+    dup_p — udział retweetów/kopii (ten sam tekst, inne id), jak w prawdziwych wynikach.
+    Ten sam seed daje ten sam korpus, więc wyniki przebiegów są porównywalne.
+    """
+    rng = random.Random(seed)
+    start = datetime.fromisoformat(since)
+    span_s = days * 86400
+    base_id = 1_700_000_000_000_000_000
+    out = []
+    for i in range(n):
+        if out and rng.random() < dup_p:
+            text = rng.choice(out)[1]
+        else:
+            text = make_text(rng, **text_kw)
+        tid = str(base_id + i * 7919)
+        ts = (start + timedelta(seconds=rng.randrange(span_s))).isoformat(timespec="seconds")
+        out.append((tid, text, ts, f"https://x.com/{rng.choice(_USERS)}/status/{tid}"))
+    # oś czasu wyszukiwania "live" jest od najnowszych
+    out.sort(key=lambda r: r[2], reverse=True)
+    return out
@@ -0,0 +1,140 @@
+import html
+from html.parser import HTMLParser
+
+
+def render_timeline(tweets) -> str:
+    """Statyczny HTML osi czasu: <article> z linkiem /status/, <time> i div tweetText."""
+    arts = []
+    for tid, text, ts, url in tweets:
+        arts.append(
+            "<article>"
+            f'<a href="{html.escape(url)}">{html.escape(ts)}</a>'
+            f'<time datetime="{html.escape(ts)}Z">{html.escape(ts)}</time>'
+            f'<div data-testid="tweetText">{html.escape(text)}</div>'
+            "</article>"
+        )
+    return "<html><body>" + "".join(arts) + "</body></html>"
+
+
+class _TimelineParser(HTMLParser):
+    """Wyciąga z HTML osi czasu krotki (href, datetime, text) — po jednej na <article>."""
+    def __init__(self):
+        super().__init__()
+        self.items = []
+        self._cur = None
+        self._in_text = False
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "article":
+            self._cur = {"href": None, "datetime": None, "text": []}
+        elif self._cur is None:
+            return
+        elif tag == "a" and "/status/" in (a.get("href") or "") and self._cur["href"] is None:
+            self._cur["href"] = a["href"]
+        elif tag == "time":
+            self._cur["datetime"] = a.get("datetime")
+        elif tag == "div" and a.get("data-testid") == "tweetText":
+            self._in_text = True
+
+    def handle_endtag(self, tag):
+        if tag == "div" and self._in_text:
+            self._in_text = False
+        elif tag == "article" and self._cur is not None:
+            self.items.append((self._cur["href"], self._cur["datetime"], "".join(self._cur["text"])))
+            self._cur = None
+
+    def handle_data(self, data):
+        if self._in_text and self._cur is not None:
+            self._cur["text"].append(data)
+
+
+class FakeAttr:
+    def __init__(self, attrs: dict):
+        self._attrs = attrs
+
+    def get_attribute(self, name):
+        return self._attrs.get(name)
+
+
+class FakeTweetElement:
+    """Imituje WebElement div[data-testid=tweetText]; find_element obsługuje ancestor::article."""
+    def __init__(self, driver, idx, href, dt, text):
+        self._driver = driver
+        self.idx = idx
+        self._href, self._dt, self._text = href, dt, text
+
+    @property
+    def text(self):
+        self._driver.rpc += 1
+        return self._text
+
+    def find_element(self, by, xpath):
+        self._driver.rpc += 1
+        if "/status/" in xpath:
+            return FakeAttr({"href": self._href})
+        if xpath.endswith("//time"):
+            return FakeAttr({"datetime": self._dt})
+        raise LookupError(f"FakeDriver: nieobsługiwany xpath {xpath}")
+
+
+class FakeDriver:
+    """
+    Zastępczy webdriver dla benchmarków: serwuje statyczny HTML, każdy scroll odsłania
+    kolejną stronę (page_size artykułów) jak infinite scroll. Liczy wywołania (rpc),
+    żeby porównywać koszt harvestu niezależnie od sieci. Obsługuje zwijanie artykułów
+    (skrypt z sxPruned), więc widać, czy koszt scrolla zostaje płaski.
+    """
+    NODES_PER_ARTICLE = 40
+
+    def __init__(self, page_html: str, page_size: int = 20):
+        p = _TimelineParser()
+        p.feed(page_html)
+        self._items = p.items
+        self.page_size = page_size
+        self.visible = 0
+        self.pruned = set()
+        self.rpc = 0
+        self.current_url = None
+
+    # ---- nawigacja ----
+    def get(self, url):
+        self.rpc += 1
+        self.current_url = url
+        self.visible = min(self.page_size, len(self._items))
+        self.pruned = set()
+
+    def refresh(self):
+        self.get(self.current_url)
+
+    def quit(self):
+        pass
+
+    # ---- JS ----
+    def _height(self):
+        return self.visible * 100
+
+    def execute_script(self, script, *args):
+        self.rpc += 1
+        if "scrollHeight" in script and script.lstrip().startswith("return"):
+            return self._height()
+        if "scrollTo" in script:
+            self.visible = min(self.visible + self.page_size, len(self._items))
+        if "sxPruned" in script:
+            before = len(self.pruned)
+            if args[1]:
+                self.pruned.update(el.idx for el in args[0])
+            live = self.visible - len(self.pruned)
+            return [len(self.pruned) - before, live * self.NODES_PER_ARTICLE + len(self.pruned)]
+        return None
+
+    # ---- DOM ----
+    def find_elements(self, by, xpath):
+        self.rpc += 1
+        if "tweetText" in xpath:
+            return [FakeTweetElement(self, i, *self._items[i])
+                    for i in range(self.visible) if i not in self.pruned]
+        return []  # overlaye błędów / "brak wyników" — nigdy nie występują
+
+    def find_element(self, by, xpath):
+        raise LookupError(f"FakeDriver: nieobsługiwany xpath {xpath}")
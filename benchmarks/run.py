@@ -0,0 +1,309 @@
+"""
+Offline benchmarki gorących ścieżek SentiX (bez Twittera i bez sieci).
+
+    python -m benchmarks.run                       # domyślny rozmiar korpusu
+    python -m benchmarks.run --n 20000 --repeat 5
+    python -m benchmarks.run --with-model          # + inferencja (ładuje model z analyzer)
+    python -m benchmarks.run --compare benchmarks/results/20240101-120000.json
+
+Wyniki (najlepszy z --repeat przebiegów) trafiają do benchmarks/results/<timestamp>.json;
+--compare porównuje z wcześniejszym plikiem i zgłasza regresje powyżej --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import config as cfg
+from benchmarks import corpus
+from benchmarks.fake_driver import FakeDriver, render_timeline
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BENCHMARKS = []
+
+
+def benchmark(name):
+    def deco(fn):
+        BENCHMARKS.append((name, fn))
+        return fn
+    return deco
+
+def _best_of(repeat: int, fn, setup=None):
+    """Najlepszy czas z repeat przebiegów; setup() (nie mierzony) daje argumenty dla fn."""
+    best, out = None, None
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        t0 = time.perf_counter()
+        out = fn(*args)
+        dt = time.perf_counter() - t0
+        best = dt if best is None else min(best, dt)
+    return best, out
+
+def _result(seconds: float, items: int, **extra) -> dict:
+    return {"seconds": round(seconds, 6), "items": items,
+            "items_per_s": round(items / seconds, 1) if seconds > 0 else None, **extra}
+
+
+# ===== benchmarki =====
+@benchmark("clean")
+def bench_clean(ctx):
+    from text_clean import clean_tweet, remove_stopwords, STOPWORDS_PL
+    texts = [r[1] for r in ctx["tweets"]]
+    sec, _ = _best_of(ctx["repeat"], lambda: [remove_stopwords(clean_tweet(t), STOPWORDS_PL) for t in texts])
+    return _result(sec, len(texts))
+
+@benchmark("store.upsert_many")
+def bench_upsert(ctx):
+    from store import TweetStore
+
+    def setup():
+        db = Path(ctx["tmp"]) / f"upsert_{time.perf_counter_ns()}.sqlite"
+        return (TweetStore(str(db)),)
+
+    def run(store):
+        coll = store.get_or_create_collection("bench")
+        store.upsert_many(ctx["tweets"])
+        store.link_many([r[0] for r in ctx["tweets"]], coll)
+        store.close()
+    sec, _ = _best_of(ctx["repeat"], run, setup)
+    return _result(sec, len(ctx["tweets"]))
+
+@benchmark("store.window_queries")
+def bench_window(ctx):
+    from store import TweetStore
+    store = TweetStore(str(Path(ctx["tmp"]) / "window.sqlite"))
+    coll = store.get_or_create_collection("bench")
+    store.upsert_many(ctx["tweets"])
+    store.link_many([r[0] for r in ctx["tweets"]], coll)
+    since, until = ctx["since"], ctx["until"]
+
+    def run():
+        rows = store.fetch_collection_in_range("bench", since, until)
+        store.count_in_range("bench", since, until)
+        after, pages = None, 0
+        while True:
+            page = store.fetch_tweets_page("bench", since, until, limit=500, after=after)
+            pages += 1
+            if len(page) < 500:
+                break
+            after = (page[-1][2], page[-1][0])
+        store.stats("bench", since, until)
+        return len(rows), pages
+    sec, (n, pages) = _best_of(ctx["repeat"], run)
+    store.close()
+    return _result(sec, n, pages=pages)
+
+@benchmark("store.read_window_arrow")
+def bench_window_arrow(ctx):
+    """Okno → DataFrame kolumnowo (Arrow); legacy_seconds — dawna ścieżka krotki + to_datetime per wiersz."""
+    import pandas as pd
+    import pyarrow as pa
+    from store import TweetStore
+    store = TweetStore(str(Path(ctx["tmp"]) / "window_arrow.sqlite"))
+    coll = store.get_or_create_collection("bench")
+    store.upsert_many(ctx["tweets"])
+    store.link_many([r[0] for r in ctx["tweets"]], coll)
+    since, until = ctx["since"], ctx["until"]
+    mapper = {pa.string(): pd.StringDtype("pyarrow")}.get
+
+    def run():
+        return store.read_window_arrow("bench", since, until).to_pandas(types_mapper=mapper)
+
+    def legacy():
+        rows = store.fetch_collection_in_range("bench", since, until)
+        dates = [pd.to_datetime(r[2]) if r[2] else pd.NaT for r in rows]
+        return pd.DataFrame({"id": [r[0] for r in rows], "raw_text": [r[1] for r in rows],
+                             "date": dates, "url": [r[3] for r in rows]})
+    sec, df = _best_of(ctx["repeat"], run)
+    legacy_sec, legacy_df = _best_of(1, legacy)
+    store.close()
+    return _result(sec, len(df), legacy_seconds=round(legacy_sec, 6),
+                   frame_bytes=int(df.memory_usage(deep=True).sum()),
+                   legacy_frame_bytes=int(legacy_df.memory_usage(deep=True).sum()))
+
+@benchmark("dedup.hybrid")
+def bench_dedup(ctx):
+    from store import TweetStore, HybridDeduper
+    db = str(Path(ctx["tmp"]) / "dedup.sqlite")
+    store = TweetStore(db)
+    half = len(ctx["tweets"]) // 2
+    store.upsert_many(ctx["tweets"][:half])  # połowa "już w bazie" → potwierdzenia w SQLite
+    store.close()
+    ids = [r[0] for r in ctx["tweets"]]
+
+    def setup():
+        d = HybridDeduper(sqlite_path=db, expected_n=max(1000, len(ids) * 2))
+        d.bulk_add(ids[:half])
+        return (d,)
+
+    def run(d):
+        hits = 0
+        for uid in ids:
+            if d.contains(uid):
+                hits += 1
+            else:
+                d.add(uid)
+        d.close()
+        return hits
+    sec, hits = _best_of(ctx["repeat"], run, setup)
+    return _result(sec, len(ids), hits=hits)
+
+@benchmark("checkpoint.write")
+def bench_checkpoint(ctx):
+    import checkpoints as ckp
+    rows = ctx["tweets"]
+    ids, texts, dates, urls = ([r[i] for r in rows] for i in range(4))
+    old = cfg.RESULTS_DIR
+    cfg.RESULTS_DIR = Path(ctx["tmp"]) / "results"
+    try:
+        sec, _ = _best_of(ctx["repeat"], lambda: ckp.save_raw_progress("bench", ctx["since"], ctx["until"],
+                                                                      ids, texts, dates, urls))
+    finally:
+        cfg.RESULTS_DIR = old
+    return _result(sec, len(rows))
+
+class _NoSleep:
+    """Podmiana modułu time w twitter_scraper — bez time.sleep, reszta bez zmian."""
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+    @staticmethod
+    def sleep(_s):
+        pass
+
+@benchmark("scrape.fetch_tweets")
+def bench_fetch(ctx):
+    import twitter_scraper as ts
+    page = render_timeline(ctx["tweets"])
+    n = len(ctx["tweets"])
+    drivers = []
+
+    def setup():
+        drv = FakeDriver(page, page_size=ctx["page_size"])
+        drivers.append(drv)
+        ts.set_driver(drv)
+        return ()
+
+    old_time, old_driver = ts.time, ts.driver
+    ts.time = _NoSleep()
+    try:
+        sec, out = _best_of(ctx["repeat"],
+                            lambda: ts.fetch_tweets("bench", ctx["since"], ctx["until"], max_tweets=n),
+                            setup)
+    finally:
+        ts.time, ts.driver = old_time, old_driver
+    return _result(sec, len(out[0]), rpc=drivers[-1].rpc)
+
+@benchmark("inference.batch")
+def bench_inference(ctx):
+    if not ctx["with_model"]:
+        return None
+    import analyzer
+    from analyzer import score_batch
+    from text_clean import clean_tweet, remove_stopwords, STOPWORDS_PL
+    analyzer.load_tuning()  # profil --autotune hosta, jeśli jest
+    batch_size = analyzer.BATCH_SIZE
+    texts = [remove_stopwords(clean_tweet(r[1]), STOPWORDS_PL) for r in ctx["tweets"][:ctx["model_n"]]]
+
+    def run():
+        for i in range(0, len(texts), batch_size):
+            score_batch(texts[i:i + batch_size])
+    sec, _ = _best_of(ctx["repeat"], run)
+    return _result(sec, len(texts), batch_size=batch_size, model=cfg.SENTIMENT_MODEL)
+
+
+# ===== zapis / porównanie =====
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def _host_info():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "machine": platform.machine(), "cpus": os.cpu_count()}
+
+def compare(current: dict, previous: dict, threshold: float) -> list:
+    """Lista (nazwa, poprzednio_s, teraz_s, zmiana) dla benchmarków wolniejszych o > threshold."""
+    regressions = []
+    print(f"\n📊 Porównanie z {previous.get('timestamp')} (git {previous.get('git')}):")
+    for name, cur in current["results"].items():
+        prev = (previous.get("results") or {}).get(name)
+        if not cur or not prev or not prev.get("seconds"):
+            continue
+        if cur["items"] != prev["items"]:
+            print(f"   {name:<24} ⚠️ inny rozmiar wejścia ({prev['items']} → {cur['items']}) — pomijam")
+            continue
+        change = cur["seconds"] / prev["seconds"] - 1.0
+        flag = "❌ REGRESJA" if change > threshold else ("✅" if change < -threshold else "")
+        print(f"   {name:<24} {prev['seconds']:>9.4f}s → {cur['seconds']:>9.4f}s  {change:+7.1%} {flag}")
+        if change > threshold:
+            regressions.append((name, prev["seconds"], cur["seconds"], change))
+    return regressions
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Offline benchmarki SentiX (syntetyczny korpus + FakeDriver).")
+    ap.add_argument("--n", type=int, default=5000, help="Rozmiar syntetycznego korpusu.")
+    ap.add_argument("--days", type=int, default=30, help="Rozpiętość korpusu w dniach.")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--repeat", type=int, default=3, help="Liczba powtórzeń (liczy się najlepszy czas).")
+    ap.add_argument("--page-size", type=int, default=20, help="Artykułów odsłanianych na scroll FakeDrivera.")
+    ap.add_argument("--only", nargs="*", help="Uruchom tylko wskazane benchmarki.")
+    ap.add_argument("--with-model", action="store_true", help="Mierz też inferencję (ładuje model).")
+    ap.add_argument("--model-n", type=int, default=512, help="Liczba tekstów do benchmarku inferencji.")
+    ap.add_argument("--out", help="Plik wyników JSON (domyślnie benchmarks/results/<timestamp>.json).")
+    ap.add_argument("--compare", help="Poprzedni plik wyników do porównania.")
+    ap.add_argument("--threshold", type=float, default=0.15, help="Próg regresji (0.15 = 15%% wolniej).")
+    args = ap.parse_args(argv)
+
+    since = "2024-01-01"
+    tweets = corpus.generate(args.n, since=since, days=args.days, seed=args.seed)
+    until = max(r[2] for r in tweets)[:10]
+    with tempfile.TemporaryDirectory(prefix="sentix_bench_") as tmp:
+        ctx = {"tweets": tweets, "since": since, "until": until, "repeat": max(1, args.repeat),
+               "tmp": tmp, "page_size": args.page_size, "with_model": args.with_model,
+               "model_n": args.model_n}
+        results = {}
+        for name, fn in BENCHMARKS:
+            if args.only and name not in args.only:
+                continue
+            try:
+                res = fn(ctx)
+            except ImportError as e:
+                print(f"⚠️ {name}: pominięty (brak zależności: {e})")
+                continue
+            except Exception as e:
+                print(f"❌ {name}: {e}")
+                continue
+            if res is None:
+                continue
+            results[name] = res
+            print(f"⏱️ {name:<24} {res['seconds']:>9.4f}s  {res['items']:>7} szt.  "
+                  f"{res['items_per_s'] or 0:>12,.0f}/s")
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    report = {"timestamp": stamp, "git": _git_rev(), "host": _host_info(),
+              "params": {"n": args.n, "days": args.days, "seed": args.seed, "repeat": args.repeat,
+                         "page_size": args.page_size},
+              "results": results}
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{stamp}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"💾 Wyniki zapisane do {out}")
+
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        if compare(report, previous, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
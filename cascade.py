@@ -0,0 +1,175 @@
+"""
+Kaskada sentymentu: tani liniowy pre-klasyfikator przed transformerem.
+
+Regresja logistyczna (3 klasy) na hashowanych unigramach i bigramach słów clean_ns — tego samego
+wejścia, które dostaje transformer — uczona offline na etykietach transformera zapisanych w DB:
+
+    python main.py --train-cascade [--collection inflacja]
+    python main.py ... --cascade [--cascade-threshold 0.9]
+
+Wiersze, dla których max p >= próg, dostają etykietę pre-klasyfikatora; resztę liczy transformer.
+Próg domyślnie kalibrowany przy treningu: najniższy, przy którym zgodność z transformerem na
+holdoucie >= cfg.CASCADE_TARGET_AGREEMENT.
+"""
+import json
+import zlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+import config as cfg
+from text_clean import clean_tweet, remove_stopwords, STOPWORDS_PL
+
+LABELS = ('positive', 'neutral', 'negative')  # kolejność = kody etykiet w analyzer.LABELS
+_THRESHOLDS = (0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.98)
+
+
+def _features(texts, dim: int):
+    """CSR (indptr, indices, values): zbiór hashy unigramów i bigramów, wagi 1/sqrt(n) (norma L2 = 1)."""
+    indptr, indices = [0], []
+    mask = dim - 1
+    for t in texts:
+        toks = (t or "").split()
+        grams = toks + [a + " " + b for a, b in zip(toks, toks[1:])]
+        indices.extend({zlib.crc32(g.encode("utf-8")) & mask for g in grams})
+        indptr.append(len(indices))
+    indptr = np.asarray(indptr, dtype=np.int64)
+    nnz = np.diff(indptr)
+    values = np.repeat((1.0 / np.sqrt(np.maximum(nnz, 1))).astype(np.float32), nnz)
+    return indptr, np.asarray(indices, dtype=np.int64), values
+
+
+class LinearCascade:
+    """Wagi W[dim, 3] + bias[3]; meta — model bazowy, próg, statystyki holdoutu."""
+    def __init__(self, W, b, meta: dict):
+        self.W, self.b, self.meta = W, b, meta
+        self.dim = W.shape[0]
+
+    def _logits(self, indptr, indices, values):
+        n = len(indptr) - 1
+        rows = np.repeat(np.arange(n), np.diff(indptr))
+        out = np.empty((n, len(LABELS)), dtype=np.float64)
+        for k in range(len(LABELS)):
+            out[:, k] = np.bincount(rows, weights=values * self.W[indices, k], minlength=n)
+        return out + self.b
+
+    @staticmethod
+    def _softmax(z):
+        z = z - z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def proba(self, texts) -> np.ndarray:
+        """p[n, 3] w kolejności LABELS; texts — wejście modelu (clean_ns)."""
+        return self._softmax(self._logits(*_features(texts, self.dim)))
+
+    @classmethod
+    def fit(cls, texts, labels, dim: int = None, epochs: int = None, batch: int = 1024,
+            lr: float = 0.5, l2: float = 1e-6, seed: int = 0):
+        """AdaGrad na minipartiach (rzadkie cechy → adaptacyjny krok per waga)."""
+        dim = dim or cfg.CASCADE_FEATURES
+        epochs = epochs or cfg.CASCADE_EPOCHS
+        y = np.fromiter((LABELS.index(l) for l in labels), dtype=np.int64, count=len(labels))
+        indptr, indices, values = _features(texts, dim)
+        W = np.zeros((dim, len(LABELS)), dtype=np.float64)
+        b = np.zeros(len(LABELS), dtype=np.float64)
+        GW, Gb = np.full_like(W, 1e-8), np.full_like(b, 1e-8)
+        model = cls(W, b, {})
+        rng = np.random.default_rng(seed)
+        starts = np.arange(0, len(y), batch)
+        for _ in range(epochs):
+            for s in rng.permutation(starts):
+                e = min(s + batch, len(y))
+                lo, hi = indptr[s], indptr[e]
+                sub = (indptr[s:e + 1] - lo, indices[lo:hi], values[lo:hi])
+                err = cls._softmax(model._logits(*sub))
+                err[np.arange(e - s), y[s:e]] -= 1.0
+                err /= (e - s)
+                rows = np.repeat(np.arange(e - s), np.diff(sub[0]))
+                gW = np.empty_like(W)
+                for k in range(len(LABELS)):
+                    gW[:, k] = np.bincount(sub[1], weights=sub[2] * err[rows, k], minlength=dim)
+                gW += l2 * W
+                gb = err.sum(axis=0)
+                GW += gW * gW
+                Gb += gb * gb
+                W -= lr * gW / np.sqrt(GW)
+                b -= lr * gb / np.sqrt(Gb)
+        model.W = W.astype(np.float32)
+        return model
+
+    def save(self, path=None):
+        path = Path(path or cfg.CASCADE_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez_compressed(f, W=self.W, b=self.b, meta=np.array(json.dumps(self.meta)))
+        print(f"💾 Model kaskady zapisany do {path}")
+
+    @classmethod
+    def load(cls, path=None):
+        """Model z pliku albo None (brak pliku / inny model bazowy)."""
+        path = Path(path or cfg.CASCADE_PATH)
+        if not path.exists():
+            return None
+        with np.load(path, allow_pickle=False) as z:
+            model = cls(z["W"], z["b"], json.loads(str(z["meta"])))
+        if model.meta.get("base_model") != cfg.SENTIMENT_MODEL:
+            print(f"⚠️ Model kaskady {path} uczony dla {model.meta.get('base_model')} — pomijam.")
+            return None
+        return model
+
+
+def threshold_table(proba, y):
+    """[(próg, pokrycie, zgodność z transformerem)] na zbiorze z etykietami y."""
+    conf, pred = proba.max(axis=1), proba.argmax(axis=1)
+    out = []
+    for t in _THRESHOLDS:
+        m = conf >= t
+        n = int(m.sum())
+        out.append((t, n / max(len(y), 1), float((pred[m] == y[m]).mean()) if n else None))
+    return out
+
+def train(collection_name: str = None, store=None, holdout: float = 0.1, save: bool = True):
+    """Uczy kaskadę na etykietach transformera z DB, kalibruje próg na holdoucie i zapisuje model."""
+    from store import TweetStore
+    own_store = store is None
+    if own_store:
+        store = TweetStore(cfg.DB_PATH)
+    try:
+        rows = store.labelled_texts(collection_name, limit=cfg.CASCADE_TRAIN_MAX)
+    finally:
+        if own_store:
+            store.close()
+    rows = [(remove_stopwords(clean_tweet(t), STOPWORDS_PL), l) for t, l in rows if l in LABELS]
+    rows = [(t, l) for t, l in rows if t]
+    if len(rows) < cfg.CASCADE_MIN_TRAIN:
+        print(f"❌ Kaskada: za mało etykiet transformera w DB ({len(rows)} < {cfg.CASCADE_MIN_TRAIN}).")
+        return None
+
+    n_hold = max(1, int(len(rows) * holdout))
+    hold, fit_rows = rows[:n_hold], rows[n_hold:]  # rows już w losowej kolejności (ORDER BY RANDOM())
+    print(f"🪜 Trening kaskady: {len(fit_rows)} etykiet transformera, holdout {len(hold)}"
+          f"{' | kolekcja ' + collection_name if collection_name else ''}")
+    model = LinearCascade.fit([t for t, _ in fit_rows], [l for _, l in fit_rows])
+
+    y_hold = np.array([LABELS.index(l) for _, l in hold])
+    table = threshold_table(model.proba([t for t, _ in hold]), y_hold)
+    print("   próg   pokrycie   zgodność")
+    for t, cov, agr in table:
+        print(f"   {t:<5}  {cov:8.1%}   {'-' if agr is None else f'{agr:.1%}'}")
+    ok = [(t, cov, agr) for t, cov, agr in table if agr is not None and agr >= cfg.CASCADE_TARGET_AGREEMENT]
+    threshold, coverage, agreement = ok[0] if ok else (None, 0.0, None)
+    if threshold is None:
+        print(f"⚠️ Żaden próg nie daje zgodności {cfg.CASCADE_TARGET_AGREEMENT:.0%} — kaskada zadziała "
+              f"tylko z jawnym --cascade-threshold.")
+    else:
+        print(f"🎯 Próg {threshold}: {coverage:.1%} wierszy bez transformera, zgodność {agreement:.1%} (holdout).")
+
+    model.meta = {"base_model": cfg.SENTIMENT_MODEL, "dim": model.dim, "threshold": threshold,
+                  "holdout_coverage": coverage, "holdout_agreement": agreement,
+                  "table": table, "train_rows": len(fit_rows), "collection": collection_name,
+                  "trained_at": datetime.now().isoformat(timespec="seconds")}
+    if save:
+        model.save()
+    return model
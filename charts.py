@@ -0,0 +1,181 @@
+import json
+import hashlib
+from datetime import date
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+# Obiektowe API Agg — bez globalnego stanu pyplot, bezpieczne w procesach potomnych
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.dates as mdates
+
+import config as cfg
+
+CHART_STATE_FILE = "_charts.json"
+
+
+# ===== pojedyncze wykresy (funkcje modułowe → picklowalne dla ProcessPoolExecutor) =====
+def render_distribution(counts: dict, out: str):
+    labels = ['positive', 'neutral', 'negative']
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.bar(labels, [counts.get(k, 0) for k in labels])
+    ax.set_title("Rozkład nastrojów")
+    ax.set_ylabel("Liczba tweetów")
+    fig.tight_layout()
+    fig.savefig(out)
+    return out
+
+def render_trend(trend: dict, out: str):
+    days = [date.fromisoformat(d) for d in trend]
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(days, list(trend.values()), marker='o')
+    ax.set_title("Średnia polaryzacja w kolejnych dniach")
+    ax.set_ylabel("Polaryzacja (–1 do +1)")
+    ax.set_xlabel("Data")
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    for lbl in ax.get_xticklabels():
+        lbl.set_rotation(45); lbl.set_ha('right')
+    fig.tight_layout()
+    fig.savefig(out)
+    return out
+
+def render_distribution_ci(shares: dict, out: str):
+    """shares: {label: (udział, lo, hi)} — estymata z próby z przedziałami ufności."""
+    labels = ['positive', 'neutral', 'negative']
+    vals = [shares[k][0] * 100 for k in labels]
+    err = [[(shares[k][0] - shares[k][1]) * 100 for k in labels],
+           [(shares[k][2] - shares[k][0]) * 100 for k in labels]]
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.bar(labels, vals, yerr=err, capsize=6)
+    ax.set_title("Rozkład nastrojów (estymata z próby)")
+    ax.set_ylabel("Udział tweetów [%]")
+    fig.tight_layout()
+    fig.savefig(out)
+    return out
+
+def render_trend_ci(trend: dict, out: str):
+    """trend: {dzień: (średnia, lo, hi)} — średnia polaryzacja z próby z pasmem ufności."""
+    days = [date.fromisoformat(d) for d in trend]
+    mean, lo, hi = (list(v) for v in zip(*trend.values()))
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.fill_between(days, lo, hi, alpha=0.25)
+    ax.plot(days, mean, marker='o')
+    ax.set_title("Średnia polaryzacja w kolejnych dniach (próba, przedział ufności)")
+    ax.set_ylabel("Polaryzacja (–1 do +1)")
+    ax.set_xlabel("Data")
+    ax.xaxis.set_major_locator(mdates.AutoDateLocator())
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d'))
+    for lbl in ax.get_xticklabels():
+        lbl.set_rotation(45); lbl.set_ha('right')
+    fig.tight_layout()
+    fig.savefig(out)
+    return out
+
+def render_wordcloud(freqs: dict, out: str):
+    from wordcloud import WordCloud
+    wc = WordCloud(width=800, height=400, background_color='white',
+                   max_words=max(1, len(freqs))).generate_from_frequencies(freqs)
+    fig = Figure(figsize=(10, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.imshow(wc, interpolation='bilinear')
+    ax.axis('off')
+    ax.set_title("Chmura słów (bez stopwords)")
+    fig.savefig(out)
+    return out
+
+
+def _digest(func, args) -> str:
+    h = hashlib.sha1()
+    h.update(func.__name__.encode('utf-8'))
+    h.update(json.dumps(args, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+
+class ChartStage:
+    """
+    Etap renderowania: wykresy liczone równolegle w puli procesów, w tle zapisów CSV/Parquet.
+    Wykres jest pomijany, jeśli hash jego danych wejściowych (agregatów) nie zmienił się od
+    ostatniego przebiegu, a plik PNG nadal istnieje (stan w <path>/_charts.json).
+
+        stage = ChartStage(path)
+        stage.submit("sentiment_distribution.png", render_distribution, counts)
+        ... zapisy plików ...
+        stage.wait()
+    """
+    def __init__(self, path: Path, max_workers: int = None):
+        self.path = Path(path)
+        self.max_workers = max_workers or cfg.CHART_WORKERS
+        self._state_file = self.path / CHART_STATE_FILE
+        try:
+            self._state = json.loads(self._state_file.read_text(encoding='utf-8'))
+        except Exception:
+            self._state = {}
+        self._pool = None
+        self._shared = False  # pula pożyczona od innego etapu (share) — nie zamykamy jej w wait()
+        self._pending = []  # (filename, digest, future|None, func, args)
+
+    def share(self, path: Path):
+        """
+        Etap dla innego katalogu (np. kolejne okno analizy) na tej samej puli procesów.
+        wait() etapów współdzielonych trzeba wołać przed wait() etapu-właściciela puli.
+        """
+        pool = self._executor()  # najpierw: przy nieudanej puli max_workers spada do 1
+        stage = ChartStage(path, self.max_workers)
+        stage._pool, stage._shared = pool, True
+        return stage
+
+    def _executor(self):
+        if self._pool is None and self.max_workers > 1:
+            try:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            except Exception as e:
+                print(f"⚠️ Pula procesów niedostępna ({e}) — renderuję szeregowo.")
+                self.max_workers = 1
+        return self._pool
+
+    def submit(self, filename: str, func, *args):
+        out = self.path / filename
+        digest = _digest(func, args)
+        if self._state.get(filename) == digest and out.exists():
+            print(f"⏭️ {filename}: dane bez zmian — pomijam renderowanie.")
+            return
+        pool = self._executor()
+        fut = None
+        if pool is not None:
+            try:
+                fut = pool.submit(func, *args, str(out))
+            except Exception as e:
+                print(f"⚠️ Nie udało się zlecić {filename} do puli ({e}) — wyrenderuję szeregowo.")
+        self._pending.append((filename, digest, fut, func, args))
+
+    def wait(self):
+        for filename, digest, fut, func, args in self._pending:
+            out = self.path / filename
+            try:
+                if fut is not None:
+                    fut.result()
+                else:
+                    func(*args, str(out))
+                self._state[filename] = digest
+                print(f"💾 Wykres zapisany do {out}")
+            except Exception as e:
+                self._state.pop(filename, None)
+                print(f"⚠️ Nie udało się wyrenderować {filename}: {e}")
+        self._pending = []
+        if self._pool is not None and not self._shared:
+            self._pool.shutdown()
+        self._pool = None
+        try:
+            self._state_file.write_text(json.dumps(self._state, indent=2), encoding='utf-8')
+        except Exception:
+            pass
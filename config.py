@@ -1,45 +1,155 @@
-from pathlib import Path
-
-# Foldery bazowe
-BASE_DIR     = Path.cwd()
-BROWSER_DIR  = BASE_DIR / "browser"
-DB_DIR       = BASE_DIR / "db"
-RESULTS_DIR  = BASE_DIR / "results"
-for _d in (BROWSER_DIR, DB_DIR, RESULTS_DIR):
-    _d.mkdir(parents=True, exist_ok=True)
-
-# Ścieżki Chrome/Driver (mogą być nadpisane w main)
-CHROME_BINARY     = str(BROWSER_DIR / "chrome-win64" / "chrome.exe")
-CHROMEDRIVER_PATH = str(BROWSER_DIR / "chromedriver" / "chromedriver.exe")
-
-# Chrome for Testing
-CFT_JSON   = "https://googlechromelabs.github.io/chrome-for-testing/last-known-good-versions-with-downloads.json"
-CFT_OUTDIR = BROWSER_DIR / "chrome_for_testing"
-CFT_CHANNEL = "Stable"  # Stable|Beta|Dev|Canary
-
-# Baza danych
-DB_PATH = str(DB_DIR / "tweets.sqlite")
-
-# Deduper Bloom (opcjonalny)
-USE_BLOOM = False
-BLOOM_SERIAL = str(DB_DIR / "tweet_ids_bloom.pickle")
-
-# Rate-limit cooldown (sekundy)
-RATE_LIMIT_COOLDOWN = 450
-
-# Checkpointy / progres
-RAW_PROGRESS_EVERY_N_TWEETS = 100
-RAW_PROGRESS_EVERY_SEC      = 60
-AN_PROGRESS_MIN_INTERVAL_SEC = 30
-CHECKPOINT_KEEP = 5  # ile plików z timestampem trzymać (na typ)
-
-# Chrome profil (do ominięcia logowania)
-# USER_DATA_DIR = r"C:\Users\snipe\AppData\Local\Google\Chrome\User Data"
-USER_DATA_DIR = str((Path.cwd() / "browser" / "profile").resolve())
-
-# Headless (logowanie Twitter potrafi być problematyczne)
-HEADLESS = False
-
-# ===== Przełączniki zapisów wyników =====
-SAVE_CSV = True
+from pathlib import Path
+
+# Foldery bazowe
+BASE_DIR     = Path.cwd()
+BROWSER_DIR  = BASE_DIR / "browser"
+DB_DIR       = BASE_DIR / "db"
+RESULTS_DIR  = BASE_DIR / "results"
+for _d in (BROWSER_DIR, DB_DIR, RESULTS_DIR):
+    _d.mkdir(parents=True, exist_ok=True)
+
+# Ścieżki Chrome/Driver (mogą być nadpisane w main)
+CHROME_BINARY     = str(BROWSER_DIR / "chrome-win64" / "chrome.exe")
+CHROMEDRIVER_PATH = str(BROWSER_DIR / "chromedriver" / "chromedriver.exe")
+
+# Chrome for Testing
+CFT_JSON   = "https://googlechromelabs.github.io/chrome-for-testing/last-known-good-versions-with-downloads.json"
+CFT_OUTDIR = BROWSER_DIR / "chrome_for_testing"
+CFT_CHANNEL = "Stable"  # Stable|Beta|Dev|Canary
+CFT_RESOLVED = BROWSER_DIR / "resolved.json"           # wersja/platforma/ścieżki zainstalowanego Chrome
+CFT_MANIFEST_CACHE = BROWSER_DIR / "cft_manifest.json"
+CFT_MANIFEST_TTL_SEC = 24 * 3600                         # po tym czasie manifest pobierany ponownie
+CFT_VERSION = None        # przypięta wersja (np. "131.0.6778.85"); None = bieżąca wersja kanału CFT_CHANNEL
+CFT_DOWNLOAD_BASE = "https://storage.googleapis.com/chrome-for-testing-public"  # archiwa przypiętej wersji
+CFT_SHA256 = {}           # {URL archiwum: sha256} — znane sumy; bez wpisu obowiązuje suma z pierwszego pobrania
+CFT_CHECKSUMS = BROWSER_DIR / "cft_checksums.json"      # sumy zapamiętane przy pierwszym pobraniu (URL-e są wersjonowane)
+CFT_REQUIRE_CHECKSUM = False  # True: bez znanej sumy archiwum nie jest instalowane
+
+# Baza danych
+DB_PATH = str(DB_DIR / "tweets.sqlite")
+
+# Model sentymentu (klucz wyników w tweet_sentiment / sentiment_daily)
+SENTIMENT_MODEL = "bardsai/twitter-sentiment-pl-base"
+
+# Deduper Bloom (opcjonalny)
+USE_BLOOM = False
+BLOOM_SERIAL = str(DB_DIR / "tweet_ids_bloom.pickle")
+BLOOM_EXPECTED_N = 500_000  # stały rozmiar → plik Bloom ładuje się przy kolejnych uruchomieniach
+
+# Tryb --serve (scheduler): domyślny interwał i jitter zadań (sekundy), max sen pętli
+SERVE_INTERVAL_SEC = 24 * 3600
+SERVE_JITTER_SEC = 300
+SERVE_POLL_SEC = 60
+
+# Rate-limit cooldown (sekundy)
+RATE_LIMIT_COOLDOWN = 450
+
+# Checkpointy / progres
+AN_PROGRESS_MIN_INTERVAL_SEC = 30
+CHECKPOINT_KEEP = 5  # ile plików z timestampem trzymać (na typ)
+
+# Chrome profil (do ominięcia logowania)
+# USER_DATA_DIR = r"C:\Users\snipe\AppData\Local\Google\Chrome\User Data"
+USER_DATA_DIR = str((Path.cwd() / "browser" / "profile").resolve())
+
+# Headless (logowanie Twitter potrafi być problematyczne)
+HEADLESS = False
+
+# Lekki profil przeglądarki do scrapowania: bez obrazów/wideo/fontów i animacji, mały viewport
+LEAN_BROWSER = False
+LEAN_WINDOW_SIZE = "600,1000"
+LEAN_BLOCKED_URLS = [
+    "*pbs.twimg.com/media/*", "*pbs.twimg.com/profile_images/*", "*pbs.twimg.com/profile_banners/*",
+    "*pbs.twimg.com/card_img/*", "*pbs.twimg.com/ext_tw_video_thumb/*", "*pbs.twimg.com/amplify_video_thumb/*",
+    "*video.twimg.com/*", "*abs.twimg.com/emoji/*",
+    "*.jpg*", "*.jpeg*", "*.png*", "*.gif*", "*.webp*", "*.mp4*", "*.m3u8*", "*.woff*", "*.woff2*", "*.ttf*",
+]
+
+# DOM podczas scrollowania: zwijanie zebranych artykułów (stały koszt scrolla) i recykling karty
+DOM_PRUNE = True
+DOM_MAX_NODES = 20_000   # powyżej — nowe wyszukiwanie od najstarszego zebranego tweeta (0 = wyłączone)
+
+# Slice'y godzinowe: dzień „nasycony” (gęstość osi czasu z rekordu pokrycia w DB albo z próbki — płytkiego
+# pierwszego przebiegu) dzielony na okna since_time:/until_time:, kwota rozłożona na godziny
+HOUR_SLICES = True
+HOUR_SLICE_DEPTH = 300   # tyle tweetów oddaje sprawnie jedna oś czasu; większa kwota dnia → próbka i okna
+HOUR_SLICE_HOURS = 1     # szerokość okna (godziny)
+
+# Near-duplikaty (MinHash/LSH na oczyszczonym tekście): model liczy jednego reprezentanta klastra,
+# reszta dziedziczy jego etykietę (stratne) — domyślnie wyłączone, włącza --near-dup
+NEAR_DUP = False
+NEAR_DUP_THRESHOLD = 0.8   # min. estymowane podobieństwo Jaccarda (k-gramy znakowe)
+NEAR_DUP_PERM = 64
+NEAR_DUP_BANDS = 8         # 8 pasm × 8 wierszy → próg LSH ~0.77
+NEAR_DUP_SHINGLE = 5
+NEAR_DUP_WEIGHTING = "weighted"  # weighted: każdy tweet się liczy | unweighted: jeden głos na klaster
+
+# Cache inferencji po treści wejścia modelu (clean_ns): LRU w procesie + tabela inference_cache w DB
+INFER_MEMO = True
+INFER_MEMO_SIZE = 50_000
+
+# Odczyt okna kolekcji do analizy kolumnowo (Arrow): wiersze na fetchmany / RecordBatch
+ARROW_CHUNK_ROWS = 65_536
+
+# Autotune inferencji (--autotune): najlepsza konfiguracja per host+model, ładowana przez analizę
+AUTOTUNE_PROFILE = DB_DIR / "autotune.json"
+USE_AUTOTUNE_PROFILE = True
+AUTOTUNE_SAMPLE = 512                       # tekstów z kolekcji do pomiaru
+AUTOTUNE_BATCH_SIZES = (8, 16, 32, 64, 128)
+AUTOTUNE_MAX_LENGTHS = (64, 128, 256, 512)  # krótsze niż p99 długości próbki są pomijane (bez obcinania tekstów)
+AUTOTUNE_INTEROP = (1, 2)                   # każdy w osobnym procesie (torch ustawia to raz na proces)
+AUTOTUNE_REPEAT = 2                         # liczy się najlepszy przebieg
+
+# Kaskada (--cascade): liniowy pre-klasyfikator na hashowanych n-gramach, uczony na etykietach transformera z DB;
+# do transformera trafiają tylko wiersze z max p poniżej progu
+CASCADE = False
+CASCADE_PATH = DB_DIR / "cascade.npz"
+CASCADE_THRESHOLD = None          # None = próg skalibrowany przy treningu (CASCADE_TARGET_AGREEMENT na holdoucie)
+CASCADE_TARGET_AGREEMENT = 0.95
+CASCADE_FEATURES = 2 ** 18        # wymiar hashowania (potęga 2)
+CASCADE_EPOCHS = 5
+CASCADE_TRAIN_MAX = 200_000       # maks. etykiet z DB do treningu (losowo)
+CASCADE_MIN_TRAIN = 2_000
+CASCADE_AUDIT = 0.02              # część pewnych wierszy liczona mimo to przez transformer (pomiar zgodności)
+
+# Tryb próbkowania (--sample): warstwowa próba per dzień losowana w SQL, estymaty z przedziałami ufności
+SAMPLE_MARGIN = 0.02        # docelowy margines błędu udziału etykiety (±)
+SAMPLE_CONFIDENCE = 0.95
+SAMPLE_MIN_PER_DAY = 30     # min. próba z dnia (o ile dzień ma tyle tweetów) — przedziały dzienne
+
+# Filtr języka (--lang-filter): tweety spoza LANG_TARGET i puste po czyszczeniu omijają model (werdykt w tweet_lang)
+LANG_FILTER = False
+LANG_TARGET = "pl"
+LANG_MIN_LETTERS = 3    # mniej liter (emoji, same linki/wzmianki) → und
+LANG_MIN_WORDS = 3      # krótsze teksty łacińskie zostają w języku docelowym (za mało dowodów)
+LANG_MARGIN = 0.1       # o ile trigramy innego języka muszą wygrać z polskimi, by odrzucić tekst
+
+# Wektory zdań (--embeddings): uśredniony ostatni stan ukryty z tego samego przebiegu co etykieta, float16 w DB
+EMBEDDINGS = False
+EMBED_IVF_MIN = 50_000   # od tylu wektorów w oknie zapytania idą przez IVF (k-means) zamiast brute-force
+EMBED_IVF_NPROBE = 8     # ile najbliższych list IVF przeglądać
+
+# Pipeline scraping → analiza (konsument w osobnym wątku); limit partii w kolejce
+PIPELINE = False
+PIPELINE_QUEUE_MAX = 64
+
+# Lokalne API HTTP (tryb --api)
+API_HOST = "127.0.0.1"
+API_PORT = 8765
+API_CACHE_SIZE = 512   # liczba odpowiedzi w LRU
+API_MAX_PAGE = 1000    # max limit strony /tweets
+API_VERBOSE = False
+API_INDEX_CACHE = 4    # indeksy wektorów (kolekcja+okno) trzymane w pamięci API
+
+# Usługa scoringu pojedynczych tekstów (tryb --score-service): mikro-partie + LRU wyników
+SCORE_PORT = 8766
+SCORE_WINDOW_MS = 5
+SCORE_MAX_BATCH = 32
+SCORE_CACHE_SIZE = 10_000
+
+# Renderowanie wykresów (procesy w puli; 1 = szeregowo w bieżącym procesie)
+CHART_WORKERS = 3
+
+# ===== Przełączniki zapisów wyników =====
+SAVE_CSV = True
 SAVE_PARQUET = True
\ No newline at end of file
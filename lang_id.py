@@ -0,0 +1,105 @@
+"""
+Szybka identyfikacja języka tweetów (przed inferencją modelu polskiego).
+
+Najpierw pismo: przewaga cyrylicy → uk/ru/cyrl, innego niełacińskiego pisma → other, za mało
+liter (emoji, same linki/wzmianki) → und. Tekst łaciński krótszy niż cfg.LANG_MIN_WORDS słów
+zostaje polski (za mało dowodów). Dłuższy: kompaktowy model trigramów znakowych —
+po kilkadziesiąt najczęstszych trigramów (z granicami słów) na język, waga malejąca z rangą.
+Polskie znaki diakrytyczne rozstrzygają od razu; tekst jest odrzucany jako obcy tylko, gdy inny
+język wygrywa z polskim z marginesem cfg.LANG_MARGIN (pomyłka w tę stronę gubi polskie tweety).
+Werdykt zapisywany per tweet (tabela tweet_lang) — każdy tekst jest klasyfikowany raz.
+"""
+import re
+
+import config as cfg
+
+_STRIP = re.compile(r'http\S+|@\w+')
+_PL_ONLY = set("ąęłśźżćń")
+_UK_ONLY = set("іїєґ")
+_RU_ONLY = set("ыэъё")
+
+# najczęstsze trigramy (spacja = granica słowa), od najczęstszego
+_PROFILES = {
+    "pl": " ni|nie|ie | pr| po| na| w | za| do| i |prz|rze| je|ch | st|go | sp|ego|ani| ze|wie| z |sta"
+          "| co| to|ych|ia |nia| wy|owa|jak| ja|est|jes| pa|dzi|ać |się| si|cie| mo|ami|kie|ki |nym|ny "
+          "| ma| ta|tak| ko|ość|ści|em |ej | o |ale| al| ch|ze |że | że|wa |ją | pi|cze| cz|szy| sz|rzy"
+          "|ym | ty|tym|czy|bar|ard|rdz|zo |jeg|mi |ko |no |dob|bry|raz| ra|owi|any|lko|tko"
+          "|uje|je |ują|ów |ski|wsk|cy |yk |ić |ła |ło |ali|wał|ył |iał",
+    "en": " th|the|he | an|and|nd |ing|ng | to|to | of|of | in|in |ed | a |is | is|er |on | be|re "
+          "|at |ion|tio| wh|hat|tha| it|it |es | fo|for|or | yo|you|ou | ha|ly |ent| st|all| we| wa"
+          "|as | on|his| ma|ter| co| re|ve |ere| so|are| ar| no|not|ot |was|thi| wi|wit|ith|th |ght"
+          "|ll | my|my |hey|ey |ave|hav|jus|ust|st |oul|uld|ld |wou|ple|peo|eop",
+    "de": " de|der|er |die|ie | di|und|nd | un|ein| ei|ich|ch |sch| ge|en |den|cht|ten| da|das|as "
+          "| is|ist|st | ni|nic| zu|zu |auf| au| mi|mit|it | si|sie| wi| be|ber|che| ve|ver|nen|ter"
+          "|te | so|lic|ine|ung|gen|ht |ge |eit|hen| we|wir|ir |uch|auc|ach",
+    "es": " de|de | la|la | qu|que|ue | el|el | en|en |os |es | lo|los|as | co| se|ión| no|no | un"
+          "|ent|con| po|por|or |ado| es|est| pa|par|ara| y | a |las| me| su|ien|nte| al|ero|ía |ar "
+          "|ada|do | ha| mu|muy|ás |nto|ton|per",
+    "fr": " de|de |es | le|le |ent| la|la |les| et|et | qu|que|ue | pa| un|on | co|nt | pr|ion| po"
+          "|our| en|en |ais| ce| je|re | ne| pl|est| es|st | da|dan|ans| il|il | su| vo|ous|us | ma"
+          "|ait|été|ère| à |tre|pas| so|oir|eux|men|ui ",
+    "it": " di|di | la|la | ch|che|he | il|il | e |to | co| de|del|ell|lla|ato| in| pe|per|er | no"
+          "|non|on |re | un|una|na | si| è | pr|ent|zio|ion|one|ne | ma| qu| se|ta | al|are| so|no "
+          "|mo | ca| da|tto|gli| gl|ono|son",
+}
+
+def _weights(profile: str) -> dict:
+    grams = profile.split("|")
+    return {g: 1.0 - 0.5 * rank / len(grams) for rank, g in enumerate(grams)}
+
+_WEIGHTS = {lang: _weights(p) for lang, p in _PROFILES.items()}
+
+
+def _letters(text: str) -> str:
+    """Małe litery i pojedyncze spacje — bez linków, wzmianek, cyfr i emoji (słowa z hashtagów zostają)."""
+    text = _STRIP.sub(" ", text or "").lower()
+    return " ".join("".join(ch if ch.isalpha() else " " for ch in text).split())
+
+def detect(text: str):
+    """(język, pewność): pl/en/de/es/fr/it, uk/ru/cyrl, other, und (za mało liter)."""
+    t = _letters(text)
+    letters = [ch for ch in t if ch != " "]
+    if len(letters) < cfg.LANG_MIN_LETTERS:
+        return "und", 0.0
+    n = len(letters)
+    cyr = sum(1 for ch in letters if "Ѐ" <= ch <= "ӿ")
+    latin = sum(1 for ch in letters if ch.isascii() or "À" <= ch <= "ɏ")
+    if cyr > latin:
+        chars = set(letters)
+        lang = "uk" if chars & _UK_ONLY else "ru" if chars & _RU_ONLY else "cyrl"
+        return lang, cyr / n
+    if latin < n / 2:
+        return "other", 1 - latin / n
+    if any(ch in _PL_ONLY for ch in letters):
+        return "pl", 1.0
+    if t.count(" ") + 1 < cfg.LANG_MIN_WORDS:
+        return "pl", 0.0
+
+    padded = f" {t} "
+    grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+    scores = {lang: sum(w.get(g, 0.0) for g in grams) / len(grams) for lang, w in _WEIGHTS.items()}
+    best = max(scores, key=scores.get)
+    margin = scores[best] - scores["pl"]
+    if best != "pl" and margin >= cfg.LANG_MARGIN:
+        return best, margin
+    return "pl", max(0.0, scores["pl"] - max(v for k, v in scores.items() if k != "pl"))
+
+def languages(store, ids, texts):
+    """
+    Werdykty dla (ids, surowe teksty) w kolejności wejścia: zapisane w DB + nowe wykryte
+    w jednej partii (i od razu zapisane). Zwraca listę kodów języka.
+    """
+    ids, texts = list(ids), list(texts)
+    try:
+        known = store.lang_of(ids)
+    except Exception as e:
+        print(f"⚠️ Błąd odczytu języków z DB: {e}")
+        known = {}
+    fresh = [(tid, *detect(txt)) for tid, txt in zip(ids, texts) if tid not in known]
+    if fresh:
+        try:
+            store.save_lang(fresh)
+        except Exception as e:
+            print(f"⚠️ Błąd zapisu języków do DB: {e}")
+        known.update((tid, lang) for tid, lang, _ in fresh)
+    return [known[tid] for tid in ids]
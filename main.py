@@ -1,311 +1,481 @@
-import argparse
-from datetime import datetime, timedelta
-from pathlib import Path
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-
-import config as cfg
-from twitter_scraper import ensure_chrome_and_driver, set_driver, register_driver_factory
-from analyzer import analyze_and_visualize
-
-
-# ---------- PRESETY ----------
-
-PRESET_CHOICES = [
-    "daily_refresh",   # ostatnie 24h, wymuszone odświeżenie, bloom, dłuższy cooldown
-    "rolling7",        # ostatnie 7 dni, top-up bez refresh
-    "deep_crawl",      # długi zbiór, resume + bloom + wyższy cooldown
-    "db_only",         # analiza tylko z DB (ostatnie 7 dni domyślnie)
-    "server_headless", # headless + bloom (idealny na serwer, wymaga user-data-dir)
-    "parquet_only"     # zapis tylko do Parquet
-]
-
-def _compute_dates(days_back: int):
-    today = datetime.now().date()
-    since = (today - timedelta(days=days_back)).strftime("%Y-%m-%d")
-    until = today.strftime("%Y-%m-%d")
-    return since, until
-
-def _build_preset_defaults(preset: str):
-    """
-    Zwraca słownik domyślnych wartości argów dla danego presetu.
-    Te wartości stają się 'defaultami' parsera: użytkownik może je nadpisać flagami.
-    """
-    d = {}
-    if preset == "daily_refresh":
-        s, u = _compute_dates(1)
-        d.update({
-            "since": s, "until": u, "max_tweets": 1000,
-            "use_bloom": True, "refresh": True, "cooldown": 600
-        })
-    elif preset == "rolling7":
-        s, u = _compute_dates(7)
-        d.update({
-            "since": s, "until": u, "max_tweets": 500,
-            "use_bloom": True, "cooldown": 600
-        })
-    elif preset == "deep_crawl":
-        # Ustal zakres w flagach lub interaktywnie; preset ustawia agresywnie parametry taskowe
-        d.update({
-            "max_tweets": 5000,
-            "use_bloom": True, "cooldown": 900,
-            "resume": True,           # wznawiaj zawsze
-            "analysis_progress_sec": 20,
-            "progress_every": 200,
-            "progress_sec": 45
-        })
-    elif preset == "db_only":
-        s, u = _compute_dates(7)
-        d.update({
-            "since": s, "until": u, "max_tweets": 1000,
-            "db_only": True
-        })
-    elif preset == "server_headless":
-        s, u = _compute_dates(7)
-        d.update({
-            "since": s, "until": u, "max_tweets": 800,
-            "use_bloom": True, "headless": True,
-            "cooldown": 600
-        })
-    elif preset == "parquet_only":
-        s, u = _compute_dates(7)
-        d.update({
-            "since": s, "until": u, "max_tweets": 500,
-            "no_csv": True, "no_parquet": False
-        })
-    return d
-
-
-# ---------- DWUETAPOWE PARSOWANIE: najpierw bierzemy preset, potem resztę z jego defaultami ----------
-
-def parse_preset_only():
-    p = argparse.ArgumentParser(add_help=False)
-    p.add_argument("--preset", choices=PRESET_CHOICES, help="Użyj predefiniowanego profilu parametrów.")
-    args, _ = p.parse_known_args()
-    return args.preset
-
-def build_parser_with_defaults(preset_defaults=None):
-    p = argparse.ArgumentParser(
-        description="Twitter sentiment scraper + analyzer (PL) — kolekcja=korpus, okno dat=analiza."
-    )
-    # Preset (pokazujemy w pełnym parserze też, żeby było w --help)
-    p.add_argument("--preset", choices=PRESET_CHOICES, help="Predefiniowany profil uruchomienia.")
-    # Ścieżki
-    p.add_argument("--browser-dir", type=str, help="Folder na Chrome/Driver (default ./browser)")
-    p.add_argument("--db-dir", type=str, help="Folder na bazę SQLite (default ./db)")
-    p.add_argument("--results-dir", type=str, help="Folder na wyniki (default ./results)")
-    # Chrome/driver profil
-    p.add_argument("--user-data-dir", type=str, help="Ścieżka do profilu Chrome (by ominąć loginy)")
-    p.add_argument("--headless", action="store_true", help="Uruchom Chrome w trybie headless (uwaga: logowanie może nie działać).")
-    # Bloom / rate-limit / checkpoint progi
-    p.add_argument("--use-bloom", action="store_true", help="Włącz HybridDeduper (Bloom).")
-    p.add_argument("--cooldown", type=int, help="Sekundy cooldown przy rate-limit (default 300).")
-    p.add_argument("--progress-every", type=int, help="RAW checkpoint co N nowych tweetów (default 100).")
-    p.add_argument("--progress-sec", type=int, help="RAW checkpoint co N sekund (default 60).")
-    p.add_argument("--analysis-progress-sec", type=int, help="Checkpoint analizy co N sekund (default 30).")
-    p.add_argument("--checkpoint-keep", type=int, help="Ile trzymać ostatnich checkpointów z timestampem (default 5).")
-    # Resume / refresh
-    p.add_argument("--resume", action="store_true", help="Wznów zarówno RAW jak i ANALIZĘ z najnowszych checkpointów.")
-    p.add_argument("--resume-raw", action="store_true", help="Wznów tylko scrapowanie RAW.")
-    p.add_argument("--resume-analysis", action="store_true", help="Wznów tylko analizę.")
-    p.add_argument("--refresh", action="store_true", help="Zmuś dociągnięcie z Twittera w oknie dat (top-up) nawet jeśli DB ma komplet.")
-    # Zapis wyników
-    p.add_argument("--no-parquet", action="store_true", help="Nie zapisuj wyników do Parquet.")
-    p.add_argument("--no-csv", action="store_true", help="Nie zapisuj wyników do CSV.")
-    # Parametry merytoryczne
-    p.add_argument("--keyword", type=str, help="Słowo kluczowe do wyszukiwania.")
-    p.add_argument("--since", type=str, help="Początek zakresu YYYY-MM-DD.")
-    p.add_argument("--until", type=str, help="Koniec zakresu YYYY-MM-DD.")
-    p.add_argument("--max-tweets", type=int, help="Maksymalna liczba tweetów.")
-    p.add_argument("--collection", type=str, help="Nazwa kolekcji (korpusu). Domyślnie = keyword.")
-    p.add_argument("--db-only", action="store_true", help="Użyj wyłącznie danych z DB (bez scrapowania).")
-
-    # Jeśli mamy preset defaults – ustaw jako parser defaults (użytkownik nadal może nadpisać flagami)
-    if preset_defaults:
-        p.set_defaults(**preset_defaults)
-
-    return p
-
-def main():
-    # 1) odczytaj preset
-    preset = parse_preset_only()
-    preset_defaults = _build_preset_defaults(preset) if preset else None
-
-    # 2) zbuduj parser z domyślnymi wg presetu, *potem* sparsuj pełne argumenty
-    parser = build_parser_with_defaults(preset_defaults)
-    args = parser.parse_args()
-
-    # ---------- ustawienie katalogów ----------
-    if args.browser_dir: cfg.BROWSER_DIR = Path(args.browser_dir)
-    if args.db_dir:      cfg.DB_DIR = Path(args.db_dir)
-    if args.results_dir: cfg.RESULTS_DIR = Path(args.results_dir)
-    for _d in (cfg.BROWSER_DIR, cfg.DB_DIR, cfg.RESULTS_DIR): _d.mkdir(parents=True, exist_ok=True)
-
-    # Pochodne
-    cfg.DB_PATH = str(cfg.DB_DIR / "tweets.sqlite")
-    cfg.BLOOM_SERIAL = str(cfg.DB_DIR / "tweet_ids_bloom.pickle")
-    cfg.CFT_OUTDIR = cfg.BROWSER_DIR / "chrome_for_testing"
-    cfg.CHROME_BINARY     = str(cfg.BROWSER_DIR / "chrome-win64" / "chrome.exe")
-    cfg.CHROMEDRIVER_PATH = str(cfg.BROWSER_DIR / "chromedriver" / "chromedriver.exe")
-
-    # Flagi globalne / config
-    if args.use_bloom: cfg.USE_BLOOM = True
-    if args.cooldown is not None: cfg.RATE_LIMIT_COOLDOWN = int(args.cooldown)
-    if args.progress_every is not None: cfg.RAW_PROGRESS_EVERY_N_TWEETS = int(args.progress_every)
-    if args.progress_sec is not None: cfg.RAW_PROGRESS_EVERY_SEC = int(args.progress_sec)
-    if args.analysis_progress_sec is not None: cfg.AN_PROGRESS_MIN_INTERVAL_SEC = int(args.analysis_progress_sec)
-    if args.checkpoint_keep is not None: cfg.CHECKPOINT_KEEP = max(0, int(args.checkpoint_keep))
-    if args.user_data_dir: cfg.USER_DATA_DIR = args.user_data_dir
-    if args.headless: cfg.HEADLESS = True
-
-    # Zapisy
-    cfg.SAVE_PARQUET = not args.no_parquet
-    cfg.SAVE_CSV     = not args.no_csv
-
-    # Resume flags łączone
-    resume_raw = args.resume or args.resume_raw
-    resume_analysis = args.resume or args.resume_analysis
-
-    # ---------- parametry merytoryczne (interaktywka tylko jeśli nadal brak) ----------
-    keyword = args.keyword or input("🔎 Słowo kluczowe: ").strip()
-
-    today   = datetime.now()
-    default_since = (today - timedelta(days=7)).strftime("%Y-%m-%d")
-    default_until = today.strftime("%Y-%m-%d")
-
-    since = args.since or (input(f"📅 Początek [YYYY-MM-DD] (domyślnie {default_since}): ").strip() or default_since)
-    until = args.until or (input(f"📅 Koniec   [YYYY-MM-DD] (domyślnie {default_until}): ").strip() or default_until)
-
-    if args.max_tweets is not None:
-        max_t = int(args.max_tweets)
-    else:
-        max_t = int(input("📈 Maksymalna liczba tweetów: "))
-
-    default_coll = keyword
-    collection_name = args.collection or (input(f"🏷️  Nazwa kolekcji (Enter = {default_coll}): ").strip() or default_coll)
-
-    # DB-only – jeśli nie podano flagi, a nie ma presetu ustawiającego, zapytaj interaktywnie
-    if args.db_only:
-        only_db = True
-    else:
-        # nie pytaj w trybie z presetem (bo preset już zdecydował) – tylko gdy brak presetu
-        if preset is None and args.collection is None:
-            only_db = (input("📦 Użyć tylko istniejącej kolekcji z bazy? [y/N]: ").strip().lower() == 'y')
-        else:
-            only_db = False
-
-    print(f"📚 Preset: {preset or '-'} | Kolekcja: {collection_name} | Okno: {since}..{until} | "
-          f"max_tweets={max_t} | {'DB-only' if only_db else 'DB+Twitter'}"
-          f"{', refresh' if args.refresh else ''} | "
-          f"save: {'CSV' if cfg.SAVE_CSV else ''}{'+' if cfg.SAVE_CSV and cfg.SAVE_PARQUET else ''}"
-          f"{'Parquet' if cfg.SAVE_PARQUET else '' or 'none'}")
-
-    # ---------- przeglądarka (tylko gdy nie DB-only) ----------
-    drv = None
-    if not only_db:
-        chrome_bin, chromedriver = ensure_chrome_and_driver(cfg.CHROME_BINARY, cfg.CHROMEDRIVER_PATH)
-
-        # Fabryka drivera — rejestrujemy, żeby twitter_scraper mógł go odtworzyć przy błędach .get()
-        def _make_driver():
-            options = webdriver.ChromeOptions()
-            options.binary_location = chrome_bin
-            options.add_argument(f"user-data-dir={cfg.USER_DATA_DIR}")
-            options.add_argument("--profile-directory=Default")
-            options.add_argument("--disable-blink-features=AutomationControlled")
-            options.add_argument("--start-maximized")
-            # Jeśli na Windows trafisz na: "Sandbox cannot access executable (0x5)"
-            # rozważ włączenie poniższego w Twoim środowisku:
-            # options.add_argument("--no-sandbox")
-            if cfg.HEADLESS:
-                options.add_argument("--headless=new")
-            d = webdriver.Chrome(service=Service(chromedriver), options=options)
-            d.set_page_load_timeout(180)
-            return d
-
-        register_driver_factory(_make_driver)
-        drv = _make_driver()
-        set_driver(drv)
-
-        # prosty injection przycisku "KONTYNUUJ" (logowanie)
-        inject_js = r'''
-        (function(){
-          if(window._selenium_continue_injected) return;
-          window._selenium_continue_injected = true;
-          const btn = document.createElement('button');
-          btn.id = 'selenium_continue_button';
-          btn.textContent = 'KONTYNUUJ (kliknij po zalogowaniu)';
-          btn.style.position = 'fixed';
-          btn.style.zIndex = 2147483647;
-          btn.style.right = '12px';
-          btn.style.bottom = '12px';
-          btn.style.padding = '12px 18px';
-          btn.style.background = '#1DA1F2';
-          btn.style.color = 'white';
-          btn.style.border = 'none';
-          btn.style.borderRadius = '8px';
-          btn.style.boxShadow = '0 4px 12px rgba(0,0,0,0.3)';
-          btn.style.fontSize = '14px';
-          btn.style.cursor = 'pointer';
-          btn.style.fontFamily = 'Arial, sans-serif';
-          btn.onclick = function(e){ try { window._selenium_continue_clicked = true; btn.remove(); } catch (err) { window._selenium_continue_clicked = true; } };
-          document.body.appendChild(btn);
-        })();
-        '''
-        from selenium.webdriver.support.ui import WebDriverWait
-        from selenium.webdriver.support import expected_conditions as EC
-        from selenium.webdriver.common.by import By
-        import urllib.parse
-
-        # Otwórz wstępny search, wstrzyknij przycisk i czekaj (max 1h)
-        search_query = f"{keyword} since:{since} until:{until}"
-        search_url = "https://mobile.twitter.com/search?q=" + urllib.parse.quote(search_query)
-        print(f"🔗 Otwieram Twitter (search): {search_url}")
-        drv.get(search_url)
-        try:
-            WebDriverWait(drv, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-        except Exception:
-            pass
-        drv.execute_script(inject_js)
-        print("🔔 Na stronie wstawiono przycisk 'KONTYNUUJ'. Zaloguj się w przeglądarce, a potem kliknij przycisk, by kontynuować.")
-
-        WAIT_TIMEOUT = 3600
-        try:
-            def _continue_condition(d):
-                clicked = d.execute_script("return !!window._selenium_continue_clicked")
-                if clicked: return True
-                try:
-                    els = d.find_elements(By.XPATH, '//div[@data-testid="tweetText"]')
-                    if els and len(els) > 0: return True
-                except Exception: pass
-                try:
-                    url = d.current_url or ""
-                    if 'login' not in url and 'signup' not in url:
-                        if 'mobile.twitter.com' in url: return False
-                except Exception: pass
-                return False
-            WebDriverWait(drv, WAIT_TIMEOUT, poll_frequency=1).until(_continue_condition)
-            print("✅ Kontynuujemy — kliknięto 'KONTYNUUJ' lub wyniki są dostępne.")
-        except Exception as e:
-            print(f"⚠️ Timeout/błąd podczas oczekiwania: {e}")
-        try:
-            drv.execute_script("var b=document.getElementById('selenium_continue_button'); if(b) b.remove();")
-        except Exception:
-            pass
-
-    # ---------- Analiza (DB-first + top-up) ----------
-    analyze_and_visualize(
-        keyword, since, until, max_t,
-        collection_name=collection_name,
-        use_db_only=only_db,
-        resume_analysis=resume_analysis,
-        refresh=args.refresh
-    )
-
-    if drv is not None:
-        try: drv.quit()
-        except Exception: pass
-
-
-if __name__ == "__main__":
-    main()
+import argparse
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+
+import config as cfg
+import metrics
+from twitter_scraper import ensure_chrome_and_driver, set_driver, register_driver_factory
+from analyzer import analyze_and_visualize
+
+
+# ---------- PRESETY ----------
+
+PRESET_CHOICES = [
+    "daily_refresh",   # ostatnie 24h, wymuszone odświeżenie, bloom, dłuższy cooldown
+    "rolling7",        # ostatnie 7 dni, top-up bez refresh
+    "deep_crawl",      # długi zbiór, resume + bloom + wyższy cooldown + lekki profil
+    "db_only",         # analiza tylko z DB (ostatnie 7 dni domyślnie)
+    "server_headless", # headless + bloom + lekki profil (idealny na serwer, wymaga user-data-dir)
+    "parquet_only"     # zapis tylko do Parquet
+]
+
+def _compute_dates(days_back: int):
+    today = datetime.now().date()
+    since = (today - timedelta(days=days_back)).strftime("%Y-%m-%d")
+    until = today.strftime("%Y-%m-%d")
+    return since, until
+
+def _build_preset_defaults(preset: str):
+    """
+    Zwraca słownik domyślnych wartości argów dla danego presetu.
+    Te wartości stają się 'defaultami' parsera: użytkownik może je nadpisać flagami.
+    """
+    d = {}
+    if preset == "daily_refresh":
+        s, u = _compute_dates(1)
+        d.update({
+            "since": s, "until": u, "days_back": 1, "max_tweets": 1000,
+            "use_bloom": True, "refresh": True, "cooldown": 600
+        })
+    elif preset == "rolling7":
+        s, u = _compute_dates(7)
+        d.update({
+            "since": s, "until": u, "days_back": 7, "max_tweets": 500,
+            "use_bloom": True, "cooldown": 600
+        })
+    elif preset == "deep_crawl":
+        # Ustal zakres w flagach lub interaktywnie; preset ustawia agresywnie parametry taskowe
+        d.update({
+            "max_tweets": 5000,
+            "use_bloom": True, "cooldown": 900,
+            "resume": True,           # wznawiaj zawsze
+            "lean_browser": True,
+            "analysis_progress_sec": 20
+        })
+    elif preset == "db_only":
+        s, u = _compute_dates(7)
+        d.update({
+            "since": s, "until": u, "max_tweets": 1000,
+            "db_only": True
+        })
+    elif preset == "server_headless":
+        s, u = _compute_dates(7)
+        d.update({
+            "since": s, "until": u, "max_tweets": 800,
+            "use_bloom": True, "headless": True, "lean_browser": True,
+            "cooldown": 600
+        })
+    elif preset == "parquet_only":
+        s, u = _compute_dates(7)
+        d.update({
+            "since": s, "until": u, "max_tweets": 500,
+            "no_csv": True, "no_parquet": False
+        })
+    return d
+
+
+# ---------- DWUETAPOWE PARSOWANIE: najpierw bierzemy preset, potem resztę z jego defaultami ----------
+
+def parse_preset_only():
+    p = argparse.ArgumentParser(add_help=False)
+    p.add_argument("--preset", choices=PRESET_CHOICES, help="Użyj predefiniowanego profilu parametrów.")
+    args, _ = p.parse_known_args()
+    return args.preset
+
+def parse_profile_only():
+    p = argparse.ArgumentParser(add_help=False)
+    p.add_argument("--profile", action="store_true")
+    args, _ = p.parse_known_args()
+    return args.profile
+
+def build_parser_with_defaults(preset_defaults=None):
+    p = argparse.ArgumentParser(
+        description="Twitter sentiment scraper + analyzer (PL) — kolekcja=korpus, okno dat=analiza."
+    )
+    # Preset (pokazujemy w pełnym parserze też, żeby było w --help)
+    p.add_argument("--preset", choices=PRESET_CHOICES, help="Predefiniowany profil uruchomienia.")
+    # Ścieżki
+    p.add_argument("--browser-dir", type=str, help="Folder na Chrome/Driver (default ./browser)")
+    p.add_argument("--db-dir", type=str, help="Folder na bazę SQLite (default ./db)")
+    p.add_argument("--results-dir", type=str, help="Folder na wyniki (default ./results)")
+    # Chrome/driver profil
+    p.add_argument("--user-data-dir", type=str, help="Ścieżka do profilu Chrome (by ominąć loginy)")
+    p.add_argument("--headless", action="store_true", help="Uruchom Chrome w trybie headless (uwaga: logowanie może nie działać).")
+    p.add_argument("--lean-browser", action=argparse.BooleanOptionalAction, default=None,
+                   help="Lekki profil: blokuj obrazy/wideo/fonty, bez animacji, mały viewport (--no-lean-browser wyłącza).")
+    # Bloom / rate-limit / checkpoint progi
+    p.add_argument("--use-bloom", action="store_true", help="Włącz HybridDeduper (Bloom).")
+    p.add_argument("--cooldown", type=int, help="Sekundy cooldown przy rate-limit (default 300).")
+    p.add_argument("--progress-every", type=int, help="Przestarzałe, ignorowane (RAW wznawia się z DB zapisywanej na bieżąco).")
+    p.add_argument("--progress-sec", type=int, help="Przestarzałe, ignorowane (RAW wznawia się z DB zapisywanej na bieżąco).")
+    p.add_argument("--analysis-progress-sec", type=int, help="Checkpoint analizy co N sekund (default 30).")
+    p.add_argument("--checkpoint-keep", type=int, help="Ile trzymać ostatnich checkpointów z timestampem (default 5).")
+    # Resume / refresh
+    p.add_argument("--resume", action="store_true", help="Wznów zarówno RAW jak i ANALIZĘ z najnowszych checkpointów.")
+    p.add_argument("--resume-raw", action="store_true", help="Wznów tylko scrapowanie RAW.")
+    p.add_argument("--resume-analysis", action="store_true", help="Wznów tylko analizę.")
+    p.add_argument("--refresh", action="store_true", help="Zmuś dociągnięcie z Twittera w oknie dat (top-up) nawet jeśli DB ma komplet.")
+    # Zapis wyników
+    p.add_argument("--no-parquet", action="store_true", help="Nie zapisuj wyników do Parquet.")
+    p.add_argument("--no-csv", action="store_true", help="Nie zapisuj wyników do CSV.")
+    # Parametry merytoryczne
+    p.add_argument("--keyword", type=str, help="Słowo kluczowe do wyszukiwania.")
+    p.add_argument("--since", type=str, help="Początek zakresu YYYY-MM-DD.")
+    p.add_argument("--until", type=str, help="Koniec zakresu YYYY-MM-DD.")
+    p.add_argument("--max-tweets", type=int, help="Maksymalna liczba tweetów.")
+    p.add_argument("--collection", type=str, help="Nazwa kolekcji (korpusu). Domyślnie = keyword.")
+    p.add_argument("--db-only", action="store_true", help="Użyj wyłącznie danych z DB (bez scrapowania).")
+    p.add_argument("--profile", action="store_true", help="Uruchom pod cProfile (plik .prof w katalogu wyników).")
+    p.add_argument("--pipeline", action="store_true", help="Analizuj partie na bieżąco w trakcie scrapowania (producent/konsument).")
+    # Tryb wsadowy (wiele słów kluczowych, jedna przeglądarka/model/połączenie DB)
+    p.add_argument("--jobs", type=str, help="Plik zadań YAML/JSON (lista keyword/collection/since/until/max_tweets/...).")
+    p.add_argument("--keywords-file", type=str, help="Plik ze słowami kluczowymi (jedno na linię, opcjonalnie TAB kolekcja).")
+    p.add_argument("--days-back", type=int, help="Okno kroczące: ostatnie N dni (tryb --serve, domyślnie 1).")
+    p.add_argument("--windows", type=str, help="Kilka okien w jednym przebiegu: dni wstecz od --until, np. 1,7,30 (tweety oceniane raz).")
+    p.add_argument("--api", action="store_true", help="Uruchom lokalne API HTTP (odczyt wyników z DB) zamiast scrapowania.")
+    p.add_argument("--api-host", type=str, help="Adres API (default 127.0.0.1).")
+    p.add_argument("--api-port", type=int, help="Port API (default 8765).")
+    p.add_argument("--score-service", action="store_true", help="Uruchom endpoint oceny sentymentu pojedynczych tekstów (mikro-partie).")
+    p.add_argument("--score-port", type=int, help="Port usługi scoringu (default 8766).")
+    p.add_argument("--score-socket", type=str, help="Zamiast portu: ścieżka gniazda Unix dla usługi scoringu.")
+    p.add_argument("--autotune", action="store_true", help="Zmierz batch/wątki/max_length inferencji na próbce kolekcji i zapisz profil hosta.")
+    p.add_argument("--autotune-sample", type=int, help="Liczba tekstów z kolekcji do pomiaru autotune (default 512).")
+    p.add_argument("--sample", type=float, nargs="?", const=True, metavar="MARGIN",
+                   help="Szybka estymata z warstwowej próby per dzień; opcjonalnie margines błędu (default 0.02).")
+    p.add_argument("--lang-filter", action=argparse.BooleanOptionalAction, default=None,
+                   help="Pomijaj w inferencji tweety spoza języka polskiego i puste po czyszczeniu (osobny plik _skipped.csv).")
+    p.add_argument("--near-dup", action=argparse.BooleanOptionalAction, default=None,
+                   help="Near-duplikaty (MinHash/LSH): model ocenia reprezentanta klastra, reszta dziedziczy jego etykietę.")
+    p.add_argument("--near-dup-weighting", choices=("weighted", "unweighted"),
+                   help="Agregaty przy --near-dup: każdy tweet (weighted, default) albo jeden głos na klaster (unweighted).")
+    p.add_argument("--infer-memo", action=argparse.BooleanOptionalAction, default=None,
+                   help="Cache inferencji po treści tekstu (pamięć + DB); --no-infer-memo liczy każdy tekst modelem.")
+    p.add_argument("--embeddings", action="store_true", help="Zapisuj wektory zdań z przebiegu modelu (podobne tweety: API /similar).")
+    p.add_argument("--train-cascade", action="store_true", help="Naucz liniowy pre-klasyfikator kaskady na etykietach transformera z DB (opcjonalnie --collection).")
+    p.add_argument("--cascade", action="store_true", help="Kaskada: pewne wiersze ocenia pre-klasyfikator, resztę transformer.")
+    p.add_argument("--cascade-threshold", type=float, help="Próg max p pre-klasyfikatora (default: skalibrowany przy treningu).")
+    p.add_argument("--serve", action="store_true", help="Tryb scheduler: zadania z --jobs/--keywords-file cyklicznie (interval/jitter), rozgrzana przeglądarka i model.")
+
+    # Jeśli mamy preset defaults – ustaw jako parser defaults (użytkownik nadal może nadpisać flagami)
+    if preset_defaults:
+        p.set_defaults(**preset_defaults)
+
+    return p
+
+# Wstrzykiwane przed skryptami strony: większy bufor Resource Timing (pomiar bajtów na stronę)
+# i — w lekkim profilu — wyłączone animacje/przejścia CSS.
+_PAGE_INIT_JS = "try{performance.setResourceTimingBufferSize(100000);}catch(e){}"
+_NO_ANIMATIONS_JS = r'''
+document.addEventListener('DOMContentLoaded', function(){
+  var s = document.createElement('style');
+  s.textContent = '*,*::before,*::after{animation:none!important;transition:none!important;scroll-behavior:auto!important}';
+  document.head.appendChild(s);
+});
+'''
+
+def _lean_options(options):
+    """Flagi/preferencje Chrome dla profilu LEAN_BROWSER (nic nie renderujemy poza tekstem)."""
+    options.add_argument(f"--window-size={cfg.LEAN_WINDOW_SIZE}")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--autoplay-policy=user-gesture-required")
+    options.add_argument("--force-prefers-reduced-motion")
+    options.add_argument("--disable-smooth-scrolling")
+    options.add_argument("--mute-audio")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.media_stream": 2,
+    })
+
+def _init_page_hooks(d):
+    """CDP: blokada obrazów/wideo/fontów po URL + skrypty startowe stron (jeśli driver to wspiera)."""
+    try:
+        d.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _PAGE_INIT_JS})
+        if cfg.LEAN_BROWSER:
+            d.execute_cdp_cmd("Network.enable", {})
+            d.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(cfg.LEAN_BLOCKED_URLS)})
+            d.execute_cdp_cmd("Emulation.setEmulatedMedia",
+                              {"features": [{"name": "prefers-reduced-motion", "value": "reduce"}]})
+            d.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _NO_ANIMATIONS_JS})
+    except Exception as e:
+        print(f"⚠️ Nie udało się ustawić hooków CDP: {e}")
+
+def start_browser(keyword: str, since: str, until: str):
+    """
+    Przygotowuje Chrome/driver, rejestruje fabrykę (autorestart w twitter_scraper),
+    otwiera wstępny search i czeka na zalogowanie. Zwraca driver.
+    """
+    chrome_bin, chromedriver = ensure_chrome_and_driver(cfg.CHROME_BINARY, cfg.CHROMEDRIVER_PATH)
+
+    # Fabryka drivera — rejestrujemy, żeby twitter_scraper mógł go odtworzyć przy błędach .get()
+    def _make_driver():
+        options = webdriver.ChromeOptions()
+        options.binary_location = chrome_bin
+        options.add_argument(f"user-data-dir={cfg.USER_DATA_DIR}")
+        options.add_argument("--profile-directory=Default")
+        options.add_argument("--disable-blink-features=AutomationControlled")
+        if cfg.LEAN_BROWSER:
+            _lean_options(options)
+        else:
+            options.add_argument("--start-maximized")
+        # Jeśli na Windows trafisz na: "Sandbox cannot access executable (0x5)"
+        # rozważ włączenie poniższego w Twoim środowisku:
+        # options.add_argument("--no-sandbox")
+        if cfg.HEADLESS:
+            options.add_argument("--headless=new")
+        d = webdriver.Chrome(service=Service(chromedriver), options=options)
+        d.set_page_load_timeout(180)
+        _init_page_hooks(d)
+        return d
+
+    register_driver_factory(_make_driver)
+    with metrics.span("browser.launch"):
+        drv = _make_driver()
+    set_driver(drv)
+
+    # prosty injection przycisku "KONTYNUUJ" (logowanie)
+    inject_js = r'''
+    (function(){
+      if(window._selenium_continue_injected) return;
+      window._selenium_continue_injected = true;
+      const btn = document.createElement('button');
+      btn.id = 'selenium_continue_button';
+      btn.textContent = 'KONTYNUUJ (kliknij po zalogowaniu)';
+      btn.style.position = 'fixed';
+      btn.style.zIndex = 2147483647;
+      btn.style.right = '12px';
+      btn.style.bottom = '12px';
+      btn.style.padding = '12px 18px';
+      btn.style.background = '#1DA1F2';
+      btn.style.color = 'white';
+      btn.style.border = 'none';
+      btn.style.borderRadius = '8px';
+      btn.style.boxShadow = '0 4px 12px rgba(0,0,0,0.3)';
+      btn.style.fontSize = '14px';
+      btn.style.cursor = 'pointer';
+      btn.style.fontFamily = 'Arial, sans-serif';
+      btn.onclick = function(e){ try { window._selenium_continue_clicked = true; btn.remove(); } catch (err) { window._selenium_continue_clicked = true; } };
+      document.body.appendChild(btn);
+    })();
+    '''
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.common.by import By
+    import urllib.parse
+
+    # Otwórz wstępny search, wstrzyknij przycisk i czekaj (max 1h)
+    search_query = f"{keyword} since:{since} until:{until}"
+    search_url = "https://mobile.twitter.com/search?q=" + urllib.parse.quote(search_query)
+    print(f"🔗 Otwieram Twitter (search): {search_url}")
+    drv.get(search_url)
+    try:
+        WebDriverWait(drv, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+    except Exception:
+        pass
+    drv.execute_script(inject_js)
+    print("🔔 Na stronie wstawiono przycisk 'KONTYNUUJ'. Zaloguj się w przeglądarce, a potem kliknij przycisk, by kontynuować.")
+
+    WAIT_TIMEOUT = 3600
+    t_login = time.perf_counter()
+    try:
+        def _continue_condition(d):
+            clicked = d.execute_script("return !!window._selenium_continue_clicked")
+            if clicked: return True
+            try:
+                els = d.find_elements(By.XPATH, '//div[@data-testid="tweetText"]')
+                if els and len(els) > 0: return True
+            except Exception: pass
+            try:
+                url = d.current_url or ""
+                if 'login' not in url and 'signup' not in url:
+                    if 'mobile.twitter.com' in url: return False
+            except Exception: pass
+            return False
+        WebDriverWait(drv, WAIT_TIMEOUT, poll_frequency=1).until(_continue_condition)
+        print("✅ Kontynuujemy — kliknięto 'KONTYNUUJ' lub wyniki są dostępne.")
+    except Exception as e:
+        print(f"⚠️ Timeout/błąd podczas oczekiwania: {e}")
+    metrics.add_span("browser.login_wait", time.perf_counter() - t_login)
+    try:
+        drv.execute_script("var b=document.getElementById('selenium_continue_button'); if(b) b.remove();")
+    except Exception:
+        pass
+    return drv
+
+
+def main():
+    # 1) odczytaj preset
+    preset = parse_preset_only()
+    preset_defaults = _build_preset_defaults(preset) if preset else None
+
+    # 2) zbuduj parser z domyślnymi wg presetu, *potem* sparsuj pełne argumenty
+    parser = build_parser_with_defaults(preset_defaults)
+    args = parser.parse_args()
+
+    # ---------- ustawienie katalogów ----------
+    if args.browser_dir: cfg.BROWSER_DIR = Path(args.browser_dir)
+    if args.db_dir:      cfg.DB_DIR = Path(args.db_dir)
+    if args.results_dir: cfg.RESULTS_DIR = Path(args.results_dir)
+    for _d in (cfg.BROWSER_DIR, cfg.DB_DIR, cfg.RESULTS_DIR): _d.mkdir(parents=True, exist_ok=True)
+
+    # Pochodne
+    cfg.DB_PATH = str(cfg.DB_DIR / "tweets.sqlite")
+    cfg.BLOOM_SERIAL = str(cfg.DB_DIR / "tweet_ids_bloom.pickle")
+    cfg.AUTOTUNE_PROFILE = cfg.DB_DIR / "autotune.json"
+    cfg.CASCADE_PATH = cfg.DB_DIR / "cascade.npz"
+    cfg.CFT_OUTDIR = cfg.BROWSER_DIR / "chrome_for_testing"
+    cfg.CHROME_BINARY     = str(cfg.BROWSER_DIR / "chrome-win64" / "chrome.exe")
+    cfg.CHROMEDRIVER_PATH = str(cfg.BROWSER_DIR / "chromedriver" / "chromedriver.exe")
+
+    # Flagi globalne / config
+    if args.use_bloom: cfg.USE_BLOOM = True
+    if args.cooldown is not None: cfg.RATE_LIMIT_COOLDOWN = int(args.cooldown)
+    for flag, val in (("--progress-every", args.progress_every), ("--progress-sec", args.progress_sec)):
+        if val is not None:
+            print(f"⚠️ {flag} jest przestarzałe i ignorowane — tweety trafiają do DB na bieżąco, ona jest punktem wznowienia RAW.")
+    if args.analysis_progress_sec is not None: cfg.AN_PROGRESS_MIN_INTERVAL_SEC = int(args.analysis_progress_sec)
+    if args.checkpoint_keep is not None: cfg.CHECKPOINT_KEEP = max(0, int(args.checkpoint_keep))
+    if args.user_data_dir: cfg.USER_DATA_DIR = args.user_data_dir
+    if args.headless: cfg.HEADLESS = True
+    if args.lean_browser is not None: cfg.LEAN_BROWSER = args.lean_browser
+    if args.pipeline: cfg.PIPELINE = True
+    if args.lang_filter is not None: cfg.LANG_FILTER = args.lang_filter
+    if args.near_dup is not None: cfg.NEAR_DUP = args.near_dup
+    if args.near_dup_weighting: cfg.NEAR_DUP_WEIGHTING = args.near_dup_weighting
+    if args.infer_memo is not None: cfg.INFER_MEMO = args.infer_memo
+    if args.embeddings: cfg.EMBEDDINGS = True
+    if args.cascade: cfg.CASCADE = True
+    if args.cascade_threshold is not None: cfg.CASCADE_THRESHOLD = float(args.cascade_threshold)
+
+    # Zapisy
+    cfg.SAVE_PARQUET = not args.no_parquet
+    cfg.SAVE_CSV     = not args.no_csv
+
+    # Resume flags łączone
+    resume_raw = args.resume or args.resume_raw
+    resume_analysis = args.resume or args.resume_analysis
+
+    # ---------- API HTTP ----------
+    if args.api:
+        import api
+        api.serve_api(args.api_host, args.api_port)
+        return
+
+    # ---------- usługa scoringu ----------
+    if args.score_service:
+        import score_service
+        score_service.serve_scoring(args.api_host, args.score_port, args.score_socket)
+        return
+
+    # ---------- autotune inferencji ----------
+    if args.autotune:
+        import autotune
+        coll = args.collection or args.keyword or input("🏷️  Kolekcja z próbką tekstów: ").strip()
+        autotune.autotune(coll, sample=args.autotune_sample)
+        return
+
+    # ---------- trening kaskady ----------
+    if args.train_cascade:
+        import cascade
+        cascade.train(args.collection)
+        return
+
+    # ---------- tryb wsadowy / scheduler ----------
+    if args.jobs or args.keywords_file:
+        import batch
+        since_d, until_d = _compute_dates(7)
+        defaults = {
+            "since": args.since or since_d, "until": args.until or until_d,
+            "max_tweets": args.max_tweets, "refresh": args.refresh, "db_only": args.db_only,
+            "windows": args.windows, "sample": args.sample
+        }
+        if args.serve:
+            # okna kroczące liczone przy każdym przebiegu
+            defaults.update({"since": None, "until": None, "days_back": args.days_back or 1})
+        jobs = batch.load_jobs_file(args.jobs, defaults) if args.jobs else []
+        if args.keywords_file:
+            jobs += batch.load_keywords_file(args.keywords_file, defaults)
+        if args.serve:
+            import scheduler
+            print(f"📚 Preset: {preset or '-'} | Scheduler: {len(jobs)} zadań")
+            scheduler.serve(jobs, start_browser=start_browser, resume_analysis=resume_analysis)
+            return
+        print(f"📚 Preset: {preset or '-'} | Tryb wsadowy: {len(jobs)} zadań")
+        batch.run_batch(jobs, start_browser=start_browser,
+                        resume_raw=resume_raw, resume_analysis=resume_analysis)
+        return
+    if args.serve:
+        parser.error("--serve wymaga --jobs lub --keywords-file")
+
+    # ---------- parametry merytoryczne (interaktywka tylko jeśli nadal brak) ----------
+    keyword = args.keyword or input("🔎 Słowo kluczowe: ").strip()
+
+    today   = datetime.now()
+    default_since = (today - timedelta(days=7)).strftime("%Y-%m-%d")
+    default_until = today.strftime("%Y-%m-%d")
+
+    windows = None
+    if args.windows:
+        from batch import parse_windows, windows_back
+        until = args.until or default_until
+        windows = windows_back(parse_windows(args.windows), until)
+        since = windows[0][0]
+    else:
+        since = args.since or (input(f"📅 Początek [YYYY-MM-DD] (domyślnie {default_since}): ").strip() or default_since)
+        until = args.until or (input(f"📅 Koniec   [YYYY-MM-DD] (domyślnie {default_until}): ").strip() or default_until)
+
+    if args.max_tweets is not None:
+        max_t = int(args.max_tweets)
+    else:
+        max_t = int(input("📈 Maksymalna liczba tweetów: "))
+
+    default_coll = keyword
+    collection_name = args.collection or (input(f"🏷️  Nazwa kolekcji (Enter = {default_coll}): ").strip() or default_coll)
+
+    # DB-only – jeśli nie podano flagi, a nie ma presetu ustawiającego, zapytaj interaktywnie
+    if args.db_only:
+        only_db = True
+    else:
+        # nie pytaj w trybie z presetem (bo preset już zdecydował) – tylko gdy brak presetu
+        if preset is None and args.collection is None:
+            only_db = (input("📦 Użyć tylko istniejącej kolekcji z bazy? [y/N]: ").strip().lower() == 'y')
+        else:
+            only_db = False
+
+    print(f"📚 Preset: {preset or '-'} | Kolekcja: {collection_name} | Okno: {since}..{until} | "
+          f"{'okna: ' + args.windows + ' dni | ' if windows else ''}"
+          f"{'próba | ' if args.sample else ''}"
+          f"max_tweets={max_t} | {'DB-only' if only_db else 'DB+Twitter'}"
+          f"{', refresh' if args.refresh else ''} | "
+          f"save: {'CSV' if cfg.SAVE_CSV else ''}{'+' if cfg.SAVE_CSV and cfg.SAVE_PARQUET else ''}"
+          f"{'Parquet' if cfg.SAVE_PARQUET else '' or 'none'}")
+
+    # ---------- przeglądarka (tylko gdy nie DB-only) ----------
+    drv = None
+    if not only_db:
+        drv = start_browser(keyword, since, until)
+
+    # ---------- Analiza (DB-first + top-up) ----------
+    analyze_and_visualize(
+        keyword, since, until, max_t,
+        collection_name=collection_name,
+        use_db_only=only_db,
+        resume_analysis=resume_analysis,
+        refresh=args.refresh,
+        windows=windows,
+        sample=args.sample
+    )
+
+    if drv is not None:
+        try: drv.quit()
+        except Exception: pass
+
+
+if __name__ == "__main__":
+    if parse_profile_only():
+        metrics.run_profiled(main)
+    else:
+        main()
@@ -0,0 +1,158 @@
+import json
+import time
+import threading
+import functools
+import inspect
+import contextlib
+import weakref
+from datetime import datetime
+from pathlib import Path
+
+# Rejestr procesu: spany (czas etapów) + liczniki. Bezpieczny wątkowo (pipeline, batch, API).
+_lock = threading.Lock()
+_spans = {}     # name -> [count, total_s, max_s]
+_counters = {}  # name -> number
+_started = time.time()
+
+
+class Run:
+    """Osobny rejestr jednego przebiegu (analiza w procesie batch/--serve): spany i liczniki od begin_run()."""
+    def __init__(self):
+        self.spans, self.counters, self.started = {}, {}, time.time()
+
+_runs = weakref.WeakSet()  # aktywne przebiegi; znikają same, gdy właściciel zwolni obiekt Run
+
+def begin_run() -> Run:
+    run = Run()
+    with _lock:
+        _runs.add(run)
+    return run
+
+def _registries():
+    """(spany, liczniki) procesu i aktywnych przebiegów — wołać pod _lock."""
+    return [(_spans, _counters)] + [(r.spans, r.counters) for r in _runs]
+
+def add_span(name: str, seconds: float):
+    with _lock:
+        for spans, _ in _registries():
+            s = spans.get(name)
+            if s is None:
+                spans[name] = [1, seconds, seconds]
+            else:
+                s[0] += 1
+                s[1] += seconds
+                if seconds > s[2]:
+                    s[2] = seconds
+
+@contextlib.contextmanager
+def span(name: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - t0)
+
+def timed(name: str):
+    """
+    Dekorator: każde wywołanie funkcji to span `name`. Dla generatorów liczony jest tylko
+    czas wewnątrz generatora (bez czasu konsumenta między kolejnymi elementami).
+    """
+    def deco(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def gen_wrapper(*args, **kwargs):
+                gen = fn(*args, **kwargs)
+                total = 0.0
+                try:
+                    while True:
+                        t0 = time.perf_counter()
+                        try:
+                            item = next(gen)
+                        except StopIteration:
+                            return
+                        finally:
+                            total += time.perf_counter() - t0
+                        yield item
+                finally:
+                    gen.close()
+                    add_span(name, total)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def incr(name: str, n=1):
+    with _lock:
+        for _, counters in _registries():
+            counters[name] = counters.get(name, 0) + n
+
+def counter(name: str, default=0):
+    with _lock:
+        return _counters.get(name, default)
+
+def set_max(name: str, value):
+    """Licznik-szczyt: zapamiętuje największą zaobserwowaną wartość (np. pamięć strony)."""
+    with _lock:
+        for _, counters in _registries():
+            if value > counters.get(name, 0):
+                counters[name] = value
+
+def snapshot(run: Run = None) -> dict:
+    """Spany i liczniki procesu albo — z run — tylko przebiegu od jego begin_run()."""
+    with _lock:
+        src_spans, src_counters, started = (_spans, _counters, _started) if run is None else \
+            (run.spans, run.counters, run.started)
+        spans = {k: {"count": c, "total_s": round(t, 4), "max_s": round(m, 4), "mean_s": round(t / c, 4)}
+                 for k, (c, t, m) in sorted(src_spans.items())}
+        counters = dict(sorted(src_counters.items()))
+    return {"started_at": datetime.fromtimestamp(started).isoformat(timespec="seconds"),
+            "wall_s": round(time.time() - started, 3),
+            "spans": spans, "counters": counters}
+
+def print_report(snap: dict = None, top: int = 15):
+    snap = snap or snapshot()
+    print(f"\n⏱️ Czas etapów (wall {snap['wall_s']:.1f}s):")
+    for name, s in sorted(snap["spans"].items(), key=lambda kv: -kv[1]["total_s"])[:top]:
+        print(f"   {name:<36} {s['total_s']:>9.2f}s  ×{s['count']:<6} max {s['max_s']:.2f}s")
+    if snap["counters"]:
+        print("   " + " | ".join(f"{k}={v:g}" for k, v in snap["counters"].items()))
+
+def write_run_metrics(path, report: bool = True, run: Run = None, **extra) -> Path:
+    """
+    Zapisuje run_metrics.json (spany + liczniki przebiegu run, bez run — od startu procesu)
+    i drukuje raport (report=False — bez).
+    """
+    snap = snapshot(run)
+    snap.update(extra)
+    path = Path(path)
+    try:
+        path.write_text(json.dumps(snap, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+        print(f"💾 Metryki przebiegu zapisane do {path}")
+    except Exception as e:
+        print(f"⚠️ Nie udało się zapisać metryk: {e}")
+    if report:
+        print_report(snap)
+    return path
+
+def run_profiled(fn, out_dir=None, top: int = 30):
+    """
+    Uruchamia fn pod cProfile; zapisuje .prof do out_dir (domyślnie cfg.RESULTS_DIR — czytane
+    po przebiegu, więc uwzględnia --results-dir) i drukuje top funkcji (cumulative).
+    """
+    import cProfile
+    import pstats
+    import config as cfg
+    pr = cProfile.Profile()
+    try:
+        return pr.runcall(fn)
+    finally:
+        out_dir = Path(out_dir or cfg.RESULTS_DIR)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        prof_file = out_dir / f"profile_{time.strftime('%Y%m%d-%H%M%S')}.prof"
+        pr.dump_stats(str(prof_file))
+        print(f"💾 Profil cProfile zapisany do {prof_file}")
+        pstats.Stats(pr).sort_stats("cumulative").print_stats(top)
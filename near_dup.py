@@ -0,0 +1,98 @@
+import zlib
+import hashlib
+
+import numpy as np
+
+import config as cfg
+
+_PRIME = 4294967291  # największa liczba pierwsza < 2^32 → podpisy mieszczą się w uint32
+
+
+class MinHasher:
+    """
+    MinHash po znakowych k-gramach oczyszczonego tekstu + LSH (bands × rows).
+    Parametry permutacji są deterministyczne (seed), więc podpisy zapisane w DB
+    są porównywalne między uruchomieniami.
+    """
+    def __init__(self, num_perm: int = None, bands: int = None, shingle: int = None, seed: int = 1):
+        self.num_perm = num_perm or cfg.NEAR_DUP_PERM
+        self.bands = bands or cfg.NEAR_DUP_BANDS
+        self.shingle = shingle or cfg.NEAR_DUP_SHINGLE
+        if self.num_perm % self.bands:
+            raise ValueError("NEAR_DUP_PERM musi być wielokrotnością NEAR_DUP_BANDS")
+        self.rows = self.num_perm // self.bands
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, 2**31 - 1, size=(self.num_perm, 1)).astype(np.uint64)
+        self._b = rng.randint(0, 2**31 - 1, size=(self.num_perm, 1)).astype(np.uint64)
+
+    def _shingles(self, text: str):
+        t = " ".join(text.split())
+        k = self.shingle
+        if len(t) <= k:
+            return {t}
+        return {t[i:i + k] for i in range(len(t) - k + 1)}
+
+    def signature(self, text: str):
+        """Podpis uint32[num_perm] albo None dla pustego tekstu."""
+        if not text or not text.strip():
+            return None
+        h = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in self._shingles(text)), dtype=np.uint64)
+        return ((self._a * h[None, :] + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def band_keys(self, sig):
+        """[(band, bucket)] — bucket to 64-bit skrót wierszy pasma."""
+        out = []
+        for b in range(self.bands):
+            chunk = sig[b * self.rows:(b + 1) * self.rows].tobytes()
+            out.append((b, int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "big", signed=True)))
+        return out
+
+    @staticmethod
+    def similarity(sig_a, sig_b) -> float:
+        """Estymata podobieństwa Jaccarda: udział zgodnych pozycji podpisu."""
+        return float(np.count_nonzero(sig_a == sig_b)) / len(sig_a)
+
+
+def assign_clusters(store, collection_name: str, rows, threshold: float = None, hasher: MinHasher = None) -> dict:
+    """
+    rows: iterable[(tweet_id, clean_text)]. Zwraca {tweet_id: rep_id} dla wszystkich wierszy.
+    Tweety już przypisane w kolekcji biorą przynależność z DB; nowe trafiają do klastra
+    najbliższego reprezentanta z kubełków LSH (podobieństwo >= threshold) albo zakładają nowy.
+    """
+    threshold = cfg.NEAR_DUP_THRESHOLD if threshold is None else threshold
+    hasher = hasher or MinHasher()
+    rows = list(rows)
+    rep_of = store.near_dup_members(collection_name, [tid for tid, _ in rows])
+    new = [(tid, text) for tid, text in rows if tid not in rep_of]
+    if not new:
+        return rep_of
+
+    buckets, raw_sigs = store.near_dup_index(collection_name)
+    sigs = {rep: np.frombuffer(b, dtype=np.uint32) for rep, b in raw_sigs.items()}
+    members, new_reps = [], []
+    for tid, text in new:
+        sig = hasher.signature(text or "")
+        if sig is None:
+            rep_of[tid] = tid  # pusty tekst — sam dla siebie, bez indeksu
+            continue
+        keys = hasher.band_keys(sig)
+        best, best_sim = None, threshold
+        # posortowane kandydaty: przy remisie wygrywa najmniejsze id, niezależnie od PYTHONHASHSEED
+        for rep in sorted({r for k in keys for r in buckets.get(k, ())}):
+            rep_sig = sigs.get(rep)
+            if rep_sig is None:
+                continue
+            sim = hasher.similarity(sig, rep_sig)
+            if sim > best_sim or (best is None and sim == best_sim):
+                best, best_sim = rep, sim
+        if best is None:
+            best = tid
+            sigs[tid] = sig
+            for k in keys:
+                buckets[k].append(tid)
+            new_reps.append((tid, sig.tobytes(), keys))
+        members.append((tid, best))
+        rep_of[tid] = best
+
+    store.near_dup_save(collection_name, members, new_reps)
+    return rep_of
@@ -0,0 +1,11 @@
+@echo off
+REM Usage: presets\batch_keywords.bat <keywords_file> [preset]
+set KWFILE=%1
+if "%KWFILE%"=="" (
+  echo Usage: presets\batch_keywords.bat ^<keywords_file^> [preset]
+  exit /b 1
+)
+set PRESET=%2
+if "%PRESET%"=="" set PRESET=daily_refresh
+
+python main.py --preset %PRESET% --keywords-file "%KWFILE%"
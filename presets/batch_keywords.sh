@@ -0,0 +1,6 @@
+#!/usr/bin/env bash
+set -euo pipefail
+KWFILE="${1:?Usage: presets/batch_keywords.sh <keywords_file> [preset]}"
+PRESET="${2:-daily_refresh}"
+
+python main.py --preset "$PRESET" --keywords-file "$KWFILE"
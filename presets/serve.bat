@@ -0,0 +1,14 @@
+@echo off
+REM Usage: presets\serve.bat <jobs.yaml> [user_data_dir]
+set JOBS=%1
+if "%JOBS%"=="" (
+  echo Usage: presets\serve.bat ^<jobs.yaml^> [user_data_dir]
+  exit /b 1
+)
+set USERDIR=%2
+
+if "%USERDIR%"=="" (
+  python main.py --serve --use-bloom --jobs "%JOBS%"
+) else (
+  python main.py --serve --use-bloom --jobs "%JOBS%" --user-data-dir "%USERDIR%"
+)
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+JOBS="${1:?Usage: presets/serve.sh <jobs.yaml> [user_data_dir]}"
+USERDIR="${2:-}"
+
+CMD=(python main.py --serve --use-bloom --jobs "$JOBS")
+if [[ -n "$USERDIR" ]]; then CMD+=(--user-data-dir "$USERDIR"); fi
+"${CMD[@]}"
@@ -0,0 +1,76 @@
+"""
+Tryb próbkowania (--sample): zamiast oceniać całe okno — warstwowa próba losowa per dzień.
+
+Liczność z docelowego marginesu błędu udziału (najgorszy przypadek p = 0.5, poprawka na skończoną
+populację), rozdzielona między dni proporcjonalnie do ich liczności (min. cfg.SAMPLE_MIN_PER_DAY).
+Estymatory warstwowe: udziały etykiet i średnia polaryzacja z przedziałami ufności, także per dzień.
+"""
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+import config as cfg
+
+LABELS = ('positive', 'neutral', 'negative')
+
+
+def z_value(confidence: float = None) -> float:
+    return NormalDist().inv_cdf(0.5 + (confidence or cfg.SAMPLE_CONFIDENCE) / 2)
+
+def sample_size(population: int, margin: float = None, confidence: float = None) -> int:
+    """Liczność próby prostej dla marginesu błędu udziału ±margin (p = 0.5) z poprawką FPC."""
+    margin = margin or cfg.SAMPLE_MARGIN
+    n0 = z_value(confidence) ** 2 * 0.25 / (margin * margin)
+    return min(population, math.ceil(n0 / (1 + (n0 - 1) / max(population, 1))))
+
+def allocate(day_counts: dict, n: int, min_per_day: int = None) -> dict:
+    """{day: k_d} — podział proporcjonalny (największe reszty), co najmniej min_per_day, nie więcej niż N_d."""
+    min_per_day = cfg.SAMPLE_MIN_PER_DAY if min_per_day is None else min_per_day
+    total = sum(day_counts.values())
+    if not total:
+        return {}
+    exact = {d: n * c / total for d, c in day_counts.items()}
+    quota = {d: int(x) for d, x in exact.items()}
+    for d in sorted(exact, key=lambda d: exact[d] - quota[d], reverse=True)[:n - sum(quota.values())]:
+        quota[d] += 1
+    return {d: min(day_counts[d], max(k, min_per_day)) for d, k in quota.items()}
+
+def _ci(mean: float, var: float, z: float):
+    half = z * math.sqrt(max(var, 0.0))
+    return mean - half, mean + half
+
+def estimate(df, day_counts: dict, confidence: float = None) -> dict:
+    """
+    df — oceniona próba z kolumnami day, sentiment, polarity; day_counts — liczności dni w oknie.
+    Zwraca {"overall": {...}, "daily": {day: {...}}} z przedziałami ufności (FPC per warstwa).
+    """
+    z = z_value(confidence)
+    total = sum(day_counts.values())
+    overall_p = {l: [0.0, 0.0] for l in LABELS}   # [estymata, wariancja]
+    pol_mean = pol_var = 0.0
+    daily = {}
+    for day, g in df.groupby('day', sort=True):
+        N, k = day_counts.get(day, len(g)), len(g)
+        w, fpc = N / total, 1 - k / N if N else 0.0
+        pol = g['polarity'].to_numpy(dtype=np.float64)
+        m = float(pol.mean())
+        s2 = float(pol.var(ddof=1)) if k > 1 else 0.0
+        lo, hi = _ci(m, fpc * s2 / k, z)
+        row = {"N": N, "n": k, "polarity": m, "polarity_lo": lo, "polarity_hi": hi}
+        pol_mean += w * m
+        pol_var += w * w * fpc * s2 / k
+        for l in LABELS:
+            p = float((g['sentiment'] == l).mean())
+            row[l] = p
+            overall_p[l][0] += w * p
+            overall_p[l][1] += w * w * fpc * (p * (1 - p) * k / (k - 1) if k > 1 else 0.0) / k
+        daily[day] = row
+
+    overall = {"N": total, "n": len(df), "confidence": confidence or cfg.SAMPLE_CONFIDENCE}
+    for l, (p, var) in overall_p.items():
+        lo, hi = _ci(p, var, z)
+        overall[l] = {"share": p, "lo": max(0.0, lo), "hi": min(1.0, hi), "count": round(p * total)}
+    lo, hi = _ci(pol_mean, pol_var, z)
+    overall["polarity"] = {"mean": pol_mean, "lo": lo, "hi": hi}
+    return {"overall": overall, "daily": daily}
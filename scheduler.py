@@ -0,0 +1,106 @@
+import json
+import random
+import re
+import time
+from datetime import datetime, timedelta
+
+import config as cfg
+from store import TweetStore
+from analyzer import analyze_and_visualize, top_up_collection, sentiment_pipeline, load_tuning
+from twitter_scraper import make_bloom_deduper
+from batch import job_window, job_windows
+
+_INTERVAL_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$')
+_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_interval(value, default: int) -> int:
+    """Sekundy z liczby albo napisu '90s' | '30m' | '6h' | '1d'."""
+    if value is None:
+        return int(default)
+    if isinstance(value, (int, float)):
+        return int(value)
+    m = _INTERVAL_RE.match(str(value).lower())
+    if not m:
+        raise ValueError(f"Niepoprawny interwał: {value!r}")
+    return int(float(m.group(1)) * _UNITS[m.group(2)])
+
+def schedule_name(job: dict) -> str:
+    return f"{job['collection']}::{job['keyword']}"
+
+def _iso(dt: datetime) -> str:
+    return dt.isoformat(timespec='seconds')
+
+
+def serve(jobs: list, start_browser=None, resume_analysis: bool = False):
+    """
+    Długo żyjący tryb --serve: jedna rozgrzana przeglądarka (z zalogowaną sesją), model
+    załadowany raz (na starcie), jedno połączenie SQLite i Bloom trzymany w pamięci.
+    Harmonogram i stan ostatnich przebiegów są w tabeli schedules, więc restart procesu
+    kontynuuje od zapisanych next_run_at.
+    """
+    if not jobs:
+        print("❌ Brak zadań do harmonogramu.")
+        return
+
+    store = TweetStore(cfg.DB_PATH)
+    store.sync_schedules(
+        ((schedule_name(j), json.dumps(j, ensure_ascii=False),
+          parse_interval(j.get("interval"), cfg.SERVE_INTERVAL_SEC),
+          parse_interval(j.get("jitter"), cfg.SERVE_JITTER_SEC)) for j in jobs),
+        _iso(datetime.now())
+    )
+    for name, interval, enabled, nxt, last, status, dur in store.list_schedules():
+        if enabled:
+            print(f"🗓️ {name}: co {interval}s | następny: {nxt} | ostatni: {last or '-'} ({status or '-'})")
+
+    deduper = make_bloom_deduper() if cfg.USE_BLOOM else None
+    drv = None
+    load_tuning()
+    sentiment_pipeline()  # rozgrzany model na cały czas życia procesu
+    print("🟢 Scheduler działa (Ctrl+C kończy).")
+    try:
+        while True:
+            for name, spec, interval, jitter in store.due_schedules(_iso(datetime.now())):
+                job = json.loads(spec)
+                since, until = job_window(job)
+                started = datetime.now()
+                status, error = "ok", None
+                print(f"\n▶️ [{_iso(started)}] {name} | {since}..{until} | max_tweets={job['max_tweets']}")
+                try:
+                    if not job.get("db_only"):
+                        if drv is None and start_browser is not None:
+                            drv = start_browser(job["keyword"], since, until)
+                        top_up_collection(job["keyword"], job["collection"], since, until, job["max_tweets"],
+                                          refresh=job.get("refresh", False), store=store, deduper=deduper)
+                    analyze_and_visualize(job["keyword"], since, until, job["max_tweets"],
+                                          collection_name=job["collection"], use_db_only=True,
+                                          resume_analysis=resume_analysis, store=store,
+                                          windows=job_windows(job), sample=job.get("sample"))
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    status, error = "error", str(e)
+                    print(f"❌ {name}: {e}")
+
+                duration = (datetime.now() - started).total_seconds()
+                delay = max(60.0, interval + random.uniform(-jitter, jitter))
+                next_run = datetime.now() + timedelta(seconds=delay)
+                store.mark_schedule_run(name, _iso(started), duration, status, error, _iso(next_run))
+                print(f"⏱️ {name}: {duration:.1f}s ({status}) — następny przebieg {_iso(next_run)}")
+
+            nxt = store.next_schedule_at()
+            wait = cfg.SERVE_POLL_SEC
+            if nxt:
+                wait = min(wait, max(1.0, (datetime.fromisoformat(nxt) - datetime.now()).total_seconds()))
+            time.sleep(wait)
+    except KeyboardInterrupt:
+        print("\n🛑 Zatrzymuję scheduler...")
+    finally:
+        if deduper is not None:
+            deduper.save_bloom(cfg.BLOOM_SERIAL)
+            deduper.close()
+        store.close()
+        if drv is not None:
+            try: drv.quit()
+            except Exception: pass
@@ -0,0 +1,218 @@
+import json
+import time
+import queue
+import threading
+import socketserver
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from http.server import ThreadingHTTPServer
+
+import config as cfg
+from api import JSONHandler
+from analyzer import (score_batch, clean_tweet, remove_stopwords, signed_score_from_label, STOPWORDS_PL,
+                      load_tuning, sentiment_pipeline)
+
+
+def _percentile(sorted_vals, p: float):
+    if not sorted_vals:
+        return None
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+class MicroBatcher:
+    """
+    Skleja równoległe żądania w partie: pierwszy tekst otwiera okno window_ms, partia
+    zamyka się po upływie okna albo po max_batch tekstach. Powtórzone wejścia modelu
+    (clean_ns) obsługuje LRU ostatnich wyników bez wywoływania modelu.
+    """
+    _STOP = object()
+
+    def __init__(self, window_ms: float = None, max_batch: int = None, cache_size: int = None):
+        self.window = (cfg.SCORE_WINDOW_MS if window_ms is None else window_ms) / 1000.0
+        self.max_batch = max_batch or cfg.SCORE_MAX_BATCH
+        self.cache_size = cache_size or cfg.SCORE_CACHE_SIZE
+        self._q = queue.Queue()
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="score-batcher", daemon=True)
+        # metryki
+        self._m_lock = threading.Lock()
+        self.latencies_ms = deque(maxlen=10_000)
+        self.batch_sizes = deque(maxlen=10_000)
+        self.requests = self.cache_hits = self.batches = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._q.put(self._STOP)
+        self._thread.join(timeout=5)
+
+    # ---- API ----
+    def submit(self, text: str) -> Future:
+        t0 = time.perf_counter()
+        key = remove_stopwords(clean_tweet(text or ""), STOPWORDS_PL)
+        fut = Future()
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+        if hit is not None:
+            fut.set_result(hit)
+            self._record(t0, cached=True)
+            return fut
+        self._q.put((key, fut, t0))
+        return fut
+
+    def score(self, texts, timeout: float = 30.0):
+        futs = [self.submit(t) for t in texts]
+        return [f.result(timeout=timeout) for f in futs]
+
+    # ---- worker ----
+    def _run(self):
+        while True:
+            first = self._q.get()
+            if first is self._STOP:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.window
+            while len(batch) < self.max_batch:
+                left = deadline - time.perf_counter()
+                if left <= 0:
+                    break
+                try:
+                    item = self._q.get(timeout=left)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    self._q.put(item)
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch):
+        # duplikaty w obrębie partii liczymy raz
+        uniq = list(OrderedDict.fromkeys(key for key, _, _ in batch))
+        out = score_batch(uniq)
+        res = {}
+        for key, r in zip(uniq, out):
+            score = float(r['score'])
+            res[key] = {"label": r['label'], "score": score,
+                        "polarity": signed_score_from_label(r['label'], score)}
+        with self._cache_lock:
+            for key, val in res.items():
+                self._cache[key] = val
+                self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        with self._m_lock:
+            self.batches += 1
+            self.batch_sizes.append(len(batch))
+        for key, fut, t0 in batch:
+            fut.set_result(res[key])
+            self._record(t0)
+
+    def _record(self, t0: float, cached: bool = False):
+        with self._m_lock:
+            self.requests += 1
+            if cached:
+                self.cache_hits += 1
+            self.latencies_ms.append((time.perf_counter() - t0) * 1000.0)
+
+    def metrics(self) -> dict:
+        with self._m_lock:
+            lat = sorted(self.latencies_ms)
+            sizes = list(self.batch_sizes)
+            req, hits, batches = self.requests, self.cache_hits, self.batches
+        mean_batch = (sum(sizes) / len(sizes)) if sizes else 0.0
+        return {
+            "requests": req,
+            "batches": batches,
+            "cache_hits": hits,
+            "cache_hit_rate": (hits / req) if req else None,
+            "latency_ms_p50": _percentile(lat, 50),
+            "latency_ms_p99": _percentile(lat, 99),
+            "batch_size_mean": mean_batch,
+            "batch_fill": mean_batch / self.max_batch if sizes else None,
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+        }
+
+
+class ScoreHandler(JSONHandler):
+    """
+    POST /score     {"text": "..."} albo {"texts": ["...", ...]}
+    GET  /metrics   p50/p99 opóźnienia, wypełnienie partii, trafienia cache
+    GET  /health
+    """
+    def do_GET(self):
+        if self.path.rstrip("/") == "/metrics":
+            return self.send_json(200, self.server.batcher.metrics())
+        if self.path.rstrip("/") == "/health":
+            return self.send_json(200, {"status": "ok", "model": cfg.SENTIMENT_MODEL})
+        self.send_error_json(404, "nie znaleziono")
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/score":
+            return self.send_error_json(404, "nie znaleziono")
+        try:
+            n = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(n) or b"{}")
+            if "texts" in payload:
+                texts = [str(t) for t in payload["texts"]]
+                single = False
+            elif "text" in payload:
+                texts = [str(payload["text"])]
+                single = True
+            else:
+                return self.send_error_json(400, "oczekiwano pola 'text' lub 'texts'")
+        except (ValueError, TypeError) as e:
+            return self.send_error_json(400, f"niepoprawny JSON: {e}")
+        try:
+            results = self.server.batcher.score(texts)
+        except Exception as e:
+            return self.send_error_json(500, str(e))
+        self.send_json(200, results[0] if single else {"results": results})
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def get_request(self):
+            req, _ = super().get_request()
+            return req, ("unix", 0)  # BaseHTTPRequestHandler oczekuje krotki adresu
+else:
+    UnixHTTPServer = None
+
+
+def make_score_server(host: str = None, port: int = None, unix_socket: str = None, batcher: MicroBatcher = None):
+    if unix_socket:
+        if UnixHTTPServer is None:
+            raise RuntimeError("Gniazda Unix nie są dostępne na tej platformie — użyj --score-port.")
+        import os
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        srv = UnixHTTPServer(unix_socket, ScoreHandler)
+    else:
+        srv = ThreadingHTTPServer((host or cfg.API_HOST, port or cfg.SCORE_PORT), ScoreHandler)
+        srv.daemon_threads = True
+    srv.batcher = (batcher or MicroBatcher()).start()
+    return srv
+
+def serve_scoring(host: str = None, port: int = None, unix_socket: str = None):
+    load_tuning()
+    sentiment_pipeline()  # model gotowy przed pierwszym żądaniem
+    srv = make_score_server(host, port, unix_socket)
+    where = unix_socket or "http://{}:{}".format(*srv.server_address[:2])
+    print(f"🧠 Scoring ({cfg.SENTIMENT_MODEL}) nasłuchuje na {where} "
+          f"(okno {srv.batcher.window*1000:.0f} ms, max partia {srv.batcher.max_batch}) — Ctrl+C kończy")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Zatrzymuję usługę scoringu...")
+    finally:
+        srv.server_close()
+        srv.batcher.stop()
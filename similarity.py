@@ -0,0 +1,114 @@
+"""
+Wyszukiwanie podobnych tweetów po wektorach zdań (tweet_embeddings — float16 z przebiegu modelu
+sentymentu, --embeddings).
+
+    idx = VectorIndex.from_store(store, "inflacja", "2024-01-01", "2024-01-31")
+    idx.similar_to(tweet_id, k=10)      # [(tweet_id, cos)]
+    idx.query(vec, k=10)
+
+Do cfg.EMBED_IVF_MIN wektorów — brute-force (iloczyn z całą macierzą, porcjami). Powyżej — IVF:
+k-means (√n list) na znormalizowanych wektorach, zapytanie przegląda cfg.EMBED_IVF_NPROBE
+najbliższych list. Macierz trzymana w float16 (połowa pamięci), rachunki porcjami w float32.
+"""
+import numpy as np
+
+import config as cfg
+
+_CHUNK = 16_384
+
+
+def _normalized(vecs) -> np.ndarray:
+    out = np.empty(vecs.shape, dtype=np.float16)
+    for s in range(0, len(vecs), _CHUNK):
+        v = vecs[s:s + _CHUNK].astype(np.float32)
+        out[s:s + _CHUNK] = v / np.maximum(np.linalg.norm(v, axis=1, keepdims=True), 1e-12)
+    return out
+
+
+class VectorIndex:
+    def __init__(self, ids, vecs, ivf: bool = None):
+        self.ids = np.asarray(ids, dtype=object)
+        self.vecs = _normalized(np.asarray(vecs))
+        self._pos = {tid: i for i, tid in enumerate(self.ids.tolist())}
+        self.centroids = None
+        if len(self.ids) and (ivf if ivf is not None else len(self.ids) >= cfg.EMBED_IVF_MIN):
+            self._build_ivf()
+
+    @classmethod
+    def from_store(cls, store, name: str, since: str = None, until: str = None, **kw):
+        """Indeks wektorów tweetów kolekcji z okna [since, until]."""
+        rows = store.window_embeddings(name, since, until)
+        if not rows:
+            return cls([], np.zeros((0, 0), dtype=np.float16), ivf=False)
+        ids, blobs = zip(*rows)
+        return cls(ids, np.frombuffer(b"".join(blobs), dtype=np.float16).reshape(len(rows), -1), **kw)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, tweet_id):
+        return tweet_id in self._pos
+
+    def _sims(self, q, rows=None):
+        """Kosinusy q z wektorami (wszystkimi albo rows), porcjami w float32."""
+        src = self.vecs if rows is None else self.vecs[rows]
+        return np.concatenate([src[s:s + _CHUNK].astype(np.float32) @ q
+                               for s in range(0, len(src), _CHUNK)]) if len(src) else np.zeros(0, np.float32)
+
+    def _assign(self, centroids):
+        out = np.empty(len(self.vecs), dtype=np.int64)
+        for s in range(0, len(self.vecs), _CHUNK):
+            out[s:s + _CHUNK] = (self.vecs[s:s + _CHUNK].astype(np.float32) @ centroids.T).argmax(axis=1)
+        return out
+
+    def _build_ivf(self, iters: int = 8, seed: int = 0):
+        """Sferyczny k-means (√n list); listy jako permutacja wierszy + granice."""
+        n = len(self.vecs)
+        k = max(1, int(np.sqrt(n)))
+        rng = np.random.default_rng(seed)
+        C = self.vecs[rng.choice(n, k, replace=False)].astype(np.float32)
+        for _ in range(iters):
+            assign = self._assign(C)
+            sums = np.zeros_like(C)
+            for s in range(0, n, _CHUNK):
+                a = assign[s:s + _CHUNK]
+                order = np.argsort(a, kind="stable")
+                present, starts = np.unique(a[order], return_index=True)
+                sums[present] += np.add.reduceat(self.vecs[s:s + _CHUNK][order].astype(np.float32), starts)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            C = np.where(norms > 0, sums / np.maximum(norms, 1e-12), C)
+        assign = self._assign(C)
+        self._order = np.argsort(assign, kind="stable")
+        self._bounds = np.searchsorted(assign[self._order], np.arange(k + 1))
+        self.centroids = C
+
+    def query(self, vec, k: int = 10, exclude: int = None, nprobe: int = None):
+        """Top-k [(tweet_id, podobieństwo kosinusowe)] dla wektora vec."""
+        if not len(self):
+            return []
+        q = np.asarray(vec, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+        if self.centroids is None:
+            rows = None
+        else:
+            nprobe = min(nprobe or cfg.EMBED_IVF_NPROBE, len(self.centroids))
+            lists = np.argsort(-(self.centroids @ q))[:nprobe]
+            rows = np.concatenate([self._order[self._bounds[l]:self._bounds[l + 1]] for l in lists])
+        sims = self._sims(q, rows)
+        pos = np.arange(len(self)) if rows is None else rows
+        if exclude is not None:
+            keep = pos != exclude
+            sims, pos = sims[keep], pos[keep]
+        k = min(k, len(sims))
+        if not k:
+            return []
+        top = np.argpartition(-sims, k - 1)[:k]
+        top = top[np.argsort(-sims[top], kind="stable")]
+        return [(self.ids[pos[i]], float(sims[i])) for i in top]
+
+    def similar_to(self, tweet_id: str, k: int = 10, nprobe: int = None):
+        """Tweety najbardziej podobne do tweet_id (bez niego samego); KeyError, gdy brak jego wektora."""
+        i = self._pos.get(tweet_id)
+        if i is None:
+            raise KeyError(f"brak wektora dla tweeta {tweet_id}")
+        return self.query(self.vecs[i], k, exclude=i, nprobe=nprobe)
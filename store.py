@@ -1,201 +1,1147 @@
-import sqlite3
-import math
-import pickle
-import hashlib
-import os
-from datetime import datetime
-from typing import List, Tuple, Optional
-import config as cfg
-
-class TweetStore:
-    """
-    Tabele:
-      tweets(id TEXT PK, text TEXT, created_at TIMESTAMP NULL, fetched_at TIMESTAMP, url TEXT NULL)
-      collections(id INTEGER PK AUTOINCREMENT, name TEXT UNIQUE, created_at TIMESTAMP)
-      tweet_collections(tweet_id TEXT, collection_id INTEGER, added_at TIMESTAMP, PK(tweet_id, collection_id))
-    """
-    def __init__(self, sqlite_path: Optional[str] = None):
-        self.sqlite_path = sqlite_path or cfg.DB_PATH
-        self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
-        self._conn.execute("PRAGMA journal_mode=WAL;")
-        self._conn.execute("PRAGMA synchronous=NORMAL;")
-        self._conn.execute("PRAGMA foreign_keys=ON;")
-        self._ensure_schema()
-
-    def _ensure_schema(self):
-        self._conn.executescript("""
-        CREATE TABLE IF NOT EXISTS tweets(
-            id TEXT PRIMARY KEY,
-            text TEXT NOT NULL,
-            created_at TIMESTAMP NULL,
-            fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            url TEXT NULL
-        );
-        CREATE INDEX IF NOT EXISTS idx_tweets_created_at ON tweets(created_at);
-
-        CREATE TABLE IF NOT EXISTS collections(
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL UNIQUE,
-            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS tweet_collections(
-            tweet_id TEXT NOT NULL,
-            collection_id INTEGER NOT NULL,
-            added_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (tweet_id, collection_id),
-            FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE,
-            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
-        );
-        """)
-
-    def get_or_create_collection(self, name: str) -> int:
-        with self._conn:
-            self._conn.execute("INSERT OR IGNORE INTO collections(name) VALUES (?)", (name,))
-        cur = self._conn.execute("SELECT id FROM collections WHERE name=?", (name,))
-        row = cur.fetchone()
-        return row[0]
-
-    def upsert_many(self, rows: List[Tuple[str, str, Optional[str], Optional[str]]]):
-        """
-        rows: iterable[(id, text, created_at_iso_or_None, url_or_None)]
-        """
-        if not rows:
-            return
-        with self._conn:
-            self._conn.executemany("""
-            INSERT INTO tweets(id, text, created_at, url)
-            VALUES(?, ?, ?, ?)
-            ON CONFLICT(id) DO UPDATE SET
-                text=excluded.text,
-                created_at=COALESCE(excluded.created_at, tweets.created_at),
-                url=COALESCE(excluded.url, tweets.url),
-                fetched_at=CURRENT_TIMESTAMP
-            """, rows)
-
-    def link_many(self, tweet_ids: List[str], collection_id: int):
-        if not tweet_ids:
-            return
-        with self._conn:
-            self._conn.executemany("""
-            INSERT OR IGNORE INTO tweet_collections(tweet_id, collection_id) VALUES (?, ?)
-            """, ((tid, collection_id) for tid in tweet_ids))
-
-    def fetch_collection_in_range(self, name: str, since: str, until: str):
-        """
-        Zwróć tweety z kolekcji w oknie [since, until], licząc po created_at, a jak NULL – po fetched_at.
-        """
-        q = """
-        SELECT t.id, t.text, t.created_at, t.url
-        FROM tweets t
-        JOIN tweet_collections tc ON tc.tweet_id = t.id
-        JOIN collections c        ON c.id = tc.collection_id
-        WHERE c.name = ?
-          AND DATE(COALESCE(t.created_at, t.fetched_at)) BETWEEN DATE(?) AND DATE(?)
-        ORDER BY COALESCE(t.created_at, t.fetched_at)
-        """
-        cur = self._conn.execute(q, (name, since, until))
-        return cur.fetchall()
-
-    def stats(self, name: str):
-        q = """
-        SELECT COUNT(*),
-               MIN(COALESCE(created_at, fetched_at)),
-               MAX(COALESCE(created_at, fetched_at))
-        FROM tweets t
-        JOIN tweet_collections tc ON tc.tweet_id = t.id
-        JOIN collections c        ON c.id = tc.collection_id
-        WHERE c.name=?
-        """
-        cur = self._conn.execute(q, (name,))
-        total, dmin, dmax = cur.fetchone()
-        return {"count": total, "from": dmin, "to": dmax}
-
-    def close(self):
-        try:
-            self._conn.commit()
-            self._conn.close()
-        except Exception:
-            pass
-
-
-class HybridDeduper:
-    """
-    Opcjonalny deduper: Bloom (szybkie "raczej nie") + potwierdzenie w SQLite (tweets).
-    Trwałość tweetów zapewnia PRIMARY KEY w TweetStore; Bloom jest cachem.
-    """
-    def __init__(self, sqlite_path: Optional[str] = None, expected_n=500_000, fp_rate=1e-5,
-                 load_bloom: Optional[str] = None, table='tweets'):
-        self.sqlite_path = sqlite_path or cfg.DB_PATH
-        self.table = table
-        self.expected_n = expected_n
-        self.fp_rate = fp_rate
-
-        self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
-        self._conn.execute("PRAGMA journal_mode=WAL;")
-
-        self.n = expected_n
-        self.p = fp_rate
-        # m = - (n * ln p) / (ln 2)^2
-        self.m = max(8, int(- (self.n * math.log(self.p)) / (math.log(2)**2)))
-        self.k = max(1, int(round((self.m / self.n) * math.log(2))))
-        self.bitarray = bytearray((self.m + 7) // 8)
-
-        if load_bloom and os.path.exists(load_bloom):
-            try:
-                data = pickle.load(open(load_bloom, 'rb'))
-                if data.get('m') == self.m and data.get('k') == self.k:
-                    self.bitarray = bytearray(data['bitarray'])
-            except Exception:
-                pass
-
-    def _hashes(self, data: bytes):
-        for i in range(self.k):
-            h = hashlib.sha256(data + i.to_bytes(2, 'big')).digest()
-            yield int.from_bytes(h, 'big') % self.m
-
-    def _bloom_contains(self, uid: str):
-        b = uid.encode('utf-8')
-        for pos in self._hashes(b):
-            byte_idx = pos // 8
-            bit = pos % 8
-            if not (self.bitarray[byte_idx] & (1 << bit)):
-                return False
-        return True
-
-    def _bloom_add(self, uid: str):
-        b = uid.encode('utf-8')
-        for pos in self._hashes(b):
-            byte_idx = pos // 8
-            bit = pos % 8
-            self.bitarray[byte_idx] |= (1 << bit)
-
-    def _sqlite_contains(self, uid: str):
-        cur = self._conn.execute(f"SELECT 1 FROM {self.table} WHERE id=? LIMIT 1", (uid,))
-        return cur.fetchone() is not None
-
-    def contains(self, uid: str):
-        if not self._bloom_contains(uid):
-            return False
-        return self._sqlite_contains(uid)
-
-    def add(self, uid: str):
-        self._bloom_add(uid)
-
-    def bulk_add(self, uids):
-        for u in uids:
-            self._bloom_add(u)
-
-    def save_bloom(self, filename: Optional[str] = None):
-        filename = filename or cfg.BLOOM_SERIAL
-        try:
-            with open(filename, 'wb') as f:
-                pickle.dump({'m': self.m, 'k': self.k, 'bitarray': bytes(self.bitarray)}, f)
-        except Exception:
-            pass
-
-    def close(self):
-        try:
-            self._conn.close()
-        except Exception:
-            pass
+import sqlite3
+import math
+import pickle
+import hashlib
+import os
+import threading
+import functools
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Tuple, Optional
+import config as cfg
+import metrics
+
+def _utc_iso(ts):
+    """
+    created_at z niezerowym offsetem → ISO w UTC. Wtedy prefiks dnia znacznika (filtry okien, _ts_bounds)
+    i DATE() z SQLite (rollupy) wskazują ten sam dzień; znaczniki w UTC/bez strefy zostają bez zmian.
+    """
+    if not isinstance(ts, str):
+        return ts
+    try:
+        dt = datetime.fromisoformat(ts)
+    except ValueError:
+        return ts
+    if dt.tzinfo is None or not dt.utcoffset():
+        return ts
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _locked(fn):
+    """Serializuje dostęp do współdzielonego połączenia (scraping i analiza w osobnych wątkach)."""
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
+class TweetStore:
+    """
+    Tabele:
+      tweets(id TEXT PK, text TEXT, created_at TIMESTAMP NULL, fetched_at TIMESTAMP, url TEXT NULL)
+      collections(id INTEGER PK AUTOINCREMENT, name TEXT UNIQUE, created_at TIMESTAMP)
+      tweet_collections(tweet_id TEXT, collection_id INTEGER, added_at TIMESTAMP, PK(tweet_id, collection_id))
+      tweet_sentiment(tweet_id TEXT, model TEXT, label TEXT, score REAL, polarity REAL, scored_at TIMESTAMP, PK(tweet_id, model))
+      sentiment_daily(collection_id INTEGER, day TEXT, model TEXT, n_pos, n_neu, n_neg, pol_sum, pol_sumsq, PK(collection_id, day, model))
+      word_daily(collection_id INTEGER, day TEXT, token TEXT, n INTEGER, PK(collection_id, day, token))
+      word_daily_seen(collection_id INTEGER, tweet_id TEXT, day TEXT, tokens TEXT, PK(collection_id, tweet_id))
+      word_daily_stale(collection_id INTEGER, tweet_id TEXT, PK(collection_id, tweet_id))
+      schedules(name TEXT PK, spec JSON, interval_sec, jitter_sec, enabled, next_run_at, last_run_at, last_status, ...)
+
+    sentiment_daily to rollup utrzymywany triggerami (insert/update wyników, linkowanie do kolekcji,
+    zmiana dnia tweeta) — wykresy i stats() czytają O(dni) wierszy zamiast O(tweetów).
+    word_daily to indeks częstości słów (po czyszczeniu i stopwords) zasilany przy czyszczeniu;
+    word_daily_seen pilnuje, żeby każdy tweet był policzony w kolekcji dokładnie raz (i pamięta jego tokeny);
+    triggery odkładają do word_daily_stale tweety przedatowane, ze zmienionym tekstem, odlinkowane lub
+    usunięte — przed kolejnym zapisem/odczytem indeksu ich tokeny są odejmowane, a tweet liczony od nowa.
+    """
+    def __init__(self, sqlite_path: Optional[str] = None):
+        self.sqlite_path = sqlite_path or cfg.DB_PATH
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        self._conn.execute("PRAGMA foreign_keys=ON;")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        self._conn.executescript("""
+        CREATE TABLE IF NOT EXISTS tweets(
+            id TEXT PRIMARY KEY,
+            text TEXT NOT NULL,
+            created_at TIMESTAMP NULL,
+            fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            url TEXT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tweets_created_at ON tweets(created_at);
+
+        CREATE TABLE IF NOT EXISTS collections(
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+
+        CREATE TABLE IF NOT EXISTS tweet_collections(
+            tweet_id TEXT NOT NULL,
+            collection_id INTEGER NOT NULL,
+            added_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (tweet_id, collection_id),
+            FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE,
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_tc_collection ON tweet_collections(collection_id, tweet_id);
+        CREATE INDEX IF NOT EXISTS idx_tweets_ts ON tweets(COALESCE(created_at, fetched_at), id);
+
+        CREATE TABLE IF NOT EXISTS tweet_sentiment(
+            tweet_id TEXT NOT NULL,
+            model TEXT NOT NULL,
+            label TEXT NOT NULL,
+            score REAL NOT NULL,
+            polarity REAL NOT NULL,
+            scored_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            source TEXT NULL,
+            PRIMARY KEY (tweet_id, model),
+            FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS sentiment_daily(
+            collection_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            model TEXT NOT NULL,
+            n_pos INTEGER NOT NULL DEFAULT 0,
+            n_neu INTEGER NOT NULL DEFAULT 0,
+            n_neg INTEGER NOT NULL DEFAULT 0,
+            pol_sum REAL NOT NULL DEFAULT 0,
+            pol_sumsq REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (collection_id, day, model),
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS word_daily(
+            collection_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            token TEXT NOT NULL,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (collection_id, day, token),
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS word_daily_seen(
+            collection_id INTEGER NOT NULL,
+            tweet_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            tokens TEXT NULL,
+            PRIMARY KEY (collection_id, tweet_id),
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS word_daily_stale(
+            collection_id INTEGER NOT NULL,
+            tweet_id TEXT NOT NULL,
+            PRIMARY KEY (collection_id, tweet_id)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS near_dup_reps(
+            collection_id INTEGER NOT NULL,
+            rep_id TEXT NOT NULL,
+            sig BLOB NOT NULL,
+            size INTEGER NOT NULL DEFAULT 1,
+            PRIMARY KEY (collection_id, rep_id),
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS near_dup_buckets(
+            collection_id INTEGER NOT NULL,
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            rep_id TEXT NOT NULL,
+            PRIMARY KEY (collection_id, band, bucket, rep_id),
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS near_dup_members(
+            collection_id INTEGER NOT NULL,
+            tweet_id TEXT NOT NULL,
+            rep_id TEXT NOT NULL,
+            PRIMARY KEY (collection_id, tweet_id),
+            FOREIGN KEY (collection_id) REFERENCES collections(id) ON DELETE CASCADE,
+            FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE
+        );
+        CREATE INDEX IF NOT EXISTS idx_near_dup_rep ON near_dup_members(collection_id, rep_id);
+
+        CREATE TABLE IF NOT EXISTS tweet_lang(
+            tweet_id TEXT PRIMARY KEY,
+            lang TEXT NOT NULL,
+            conf REAL NOT NULL DEFAULT 0,
+            FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS scrape_coverage(
+            keyword TEXT NOT NULL,
+            day TEXT NOT NULL,
+            per_hour REAL NOT NULL,
+            updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (keyword, day)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS inference_cache(
+            model TEXT NOT NULL,
+            key BLOB NOT NULL,
+            label TEXT NOT NULL,
+            score REAL NOT NULL,
+            vec BLOB NULL,
+            PRIMARY KEY (model, key)
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS tweet_embeddings(
+            tweet_id TEXT NOT NULL,
+            model TEXT NOT NULL,
+            vec BLOB NOT NULL,
+            PRIMARY KEY (tweet_id, model),
+            FOREIGN KEY (tweet_id) REFERENCES tweets(id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+
+        CREATE TABLE IF NOT EXISTS schedules(
+            name TEXT PRIMARY KEY,
+            spec TEXT NOT NULL,
+            interval_sec INTEGER NOT NULL,
+            jitter_sec INTEGER NOT NULL DEFAULT 0,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            next_run_at TIMESTAMP NOT NULL,
+            last_run_at TIMESTAMP NULL,
+            last_status TEXT NULL,
+            last_duration_s REAL NULL,
+            last_error TEXT NULL
+        );
+        """)
+        # kolumny dodane później (bazy sprzed kaskady / wektorów zdań / tokenów w word_daily_seen)
+        added = set()
+        for table, column in (("tweet_sentiment", "source TEXT NULL"), ("inference_cache", "vec BLOB NULL"),
+                              ("word_daily_seen", "tokens TEXT NULL")):
+            cols = {r[1] for r in self._conn.execute(f"PRAGMA table_info({table})")}
+            if column.split()[0] not in cols:
+                with self._conn:
+                    self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+                added.add(table)
+        if "word_daily_seen" in added:
+            # bez zapisanych tokenów starego indeksu słów nie da się korygować — odbudowuje się przy analizie okien
+            with self._conn:
+                self._conn.execute("DELETE FROM word_daily")
+                self._conn.execute("DELETE FROM word_daily_seen")
+        self._ensure_rollup_triggers()
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            self._normalize_created_at()
+
+    def _normalize_created_at(self):
+        """Jednorazowo (user_version 1): created_at zapisane z niezerowym offsetem → UTC, jak w upsert_many."""
+        rows = self._conn.execute("""
+        SELECT id, created_at FROM tweets
+        WHERE created_at GLOB '*[+-][0-9][0-9]:[0-9][0-9]' AND substr(created_at, -6) NOT IN ('+00:00', '-00:00')
+        """).fetchall()
+        with self._conn:
+            self._conn.executemany("UPDATE tweets SET created_at = ? WHERE id = ?",
+                                   ((_utc_iso(ts), tid) for tid, ts in rows))
+            self._conn.execute("PRAGMA user_version = 1")
+
+    # ---------- rollup sentiment_daily (triggery) ----------
+    @staticmethod
+    def _rollup_delta_sql(sign: str, score_ref: str, day: str, coll_filter: str) -> str:
+        """
+        INSERT ... ON CONFLICT DO UPDATE dodający (sign='+') albo odejmujący (sign='-')
+        jeden wynik do sentiment_daily dla wszystkich kolekcji wybranych przez coll_filter.
+        """
+        return f"""
+            INSERT INTO sentiment_daily(collection_id, day, model, n_pos, n_neu, n_neg, pol_sum, pol_sumsq)
+            SELECT tc.collection_id, {day}, s.model,
+                   {sign}(s.label='positive'), {sign}(s.label='neutral'), {sign}(s.label='negative'),
+                   {sign}s.polarity, {sign}s.polarity*s.polarity
+            FROM tweet_collections tc, {score_ref}
+            WHERE {coll_filter} AND {day} IS NOT NULL
+            ON CONFLICT(collection_id, day, model) DO UPDATE SET
+                n_pos = n_pos + excluded.n_pos,
+                n_neu = n_neu + excluded.n_neu,
+                n_neg = n_neg + excluded.n_neg,
+                pol_sum = pol_sum + excluded.pol_sum,
+                pol_sumsq = pol_sumsq + excluded.pol_sumsq;
+        """
+
+    def _ensure_rollup_triggers(self):
+        day_of = "(SELECT DATE(COALESCE(t.created_at, t.fetched_at)) FROM tweets t WHERE t.id = {tid})"
+        new_score = "(SELECT NEW.model AS model, NEW.label AS label, NEW.polarity AS polarity) s"
+        old_score = "(SELECT OLD.model AS model, OLD.label AS label, OLD.polarity AS polarity) s"
+        all_scores = "tweet_sentiment s"
+        self._conn.executescript(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_sentiment_ins AFTER INSERT ON tweet_sentiment
+        BEGIN
+            {self._rollup_delta_sql('+', new_score, day_of.format(tid='NEW.tweet_id'), 'tc.tweet_id = NEW.tweet_id')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sentiment_upd AFTER UPDATE OF label, polarity ON tweet_sentiment
+        BEGIN
+            {self._rollup_delta_sql('-', old_score, day_of.format(tid='OLD.tweet_id'), 'tc.tweet_id = OLD.tweet_id')}
+            {self._rollup_delta_sql('+', new_score, day_of.format(tid='NEW.tweet_id'), 'tc.tweet_id = NEW.tweet_id')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_sentiment_del AFTER DELETE ON tweet_sentiment
+        BEGIN
+            {self._rollup_delta_sql('-', old_score, day_of.format(tid='OLD.tweet_id'), 'tc.tweet_id = OLD.tweet_id')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_link AFTER INSERT ON tweet_collections
+        BEGIN
+            {self._rollup_delta_sql('+', all_scores, day_of.format(tid='NEW.tweet_id'),
+                                    'tc.tweet_id = NEW.tweet_id AND tc.collection_id = NEW.collection_id '
+                                    'AND s.tweet_id = NEW.tweet_id')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_unlink AFTER DELETE ON tweet_collections
+        BEGIN
+            INSERT INTO sentiment_daily(collection_id, day, model, n_pos, n_neu, n_neg, pol_sum, pol_sumsq)
+            SELECT OLD.collection_id, {day_of.format(tid='OLD.tweet_id')}, s.model,
+                   -(s.label='positive'), -(s.label='neutral'), -(s.label='negative'),
+                   -s.polarity, -s.polarity*s.polarity
+            FROM tweet_sentiment s
+            WHERE s.tweet_id = OLD.tweet_id AND {day_of.format(tid='OLD.tweet_id')} IS NOT NULL
+            ON CONFLICT(collection_id, day, model) DO UPDATE SET
+                n_pos = n_pos + excluded.n_pos,
+                n_neu = n_neu + excluded.n_neu,
+                n_neg = n_neg + excluded.n_neg,
+                pol_sum = pol_sum + excluded.pol_sum,
+                pol_sumsq = pol_sumsq + excluded.pol_sumsq;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_tweet_del BEFORE DELETE ON tweets
+        BEGIN
+            {self._rollup_delta_sql('-', all_scores, 'DATE(COALESCE(OLD.created_at, OLD.fetched_at))',
+                                    'tc.tweet_id = OLD.id AND s.tweet_id = OLD.id')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_redate BEFORE UPDATE OF created_at, fetched_at ON tweets
+        WHEN DATE(COALESCE(OLD.created_at, OLD.fetched_at)) IS NOT DATE(COALESCE(NEW.created_at, NEW.fetched_at))
+        BEGIN
+            {self._rollup_delta_sql('-', all_scores, 'DATE(COALESCE(OLD.created_at, OLD.fetched_at))',
+                                    'tc.tweet_id = OLD.id AND s.tweet_id = OLD.id')}
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_redate_after AFTER UPDATE OF created_at, fetched_at ON tweets
+        WHEN DATE(COALESCE(OLD.created_at, OLD.fetched_at)) IS NOT DATE(COALESCE(NEW.created_at, NEW.fetched_at))
+        BEGIN
+            {self._rollup_delta_sql('+', all_scores, 'DATE(COALESCE(NEW.created_at, NEW.fetched_at))',
+                                    'tc.tweet_id = NEW.id AND s.tweet_id = NEW.id')}
+        END;
+
+        -- indeks słów: tokeny liczy Python, więc triggery tylko odkładają tweety do przeliczenia
+        CREATE TRIGGER IF NOT EXISTS trg_words_redate AFTER UPDATE OF text, created_at, fetched_at ON tweets
+        WHEN DATE(COALESCE(OLD.created_at, OLD.fetched_at)) IS NOT DATE(COALESCE(NEW.created_at, NEW.fetched_at))
+          OR OLD.text IS NOT NEW.text
+        BEGIN
+            INSERT OR IGNORE INTO word_daily_stale(collection_id, tweet_id)
+            SELECT collection_id, tweet_id FROM word_daily_seen WHERE tweet_id = NEW.id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_words_unlink AFTER DELETE ON tweet_collections
+        BEGIN
+            INSERT OR IGNORE INTO word_daily_stale(collection_id, tweet_id)
+            SELECT collection_id, tweet_id FROM word_daily_seen
+            WHERE collection_id = OLD.collection_id AND tweet_id = OLD.tweet_id;
+        END;
+        """)
+
+    @_locked
+    def get_or_create_collection(self, name: str) -> int:
+        with self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO collections(name) VALUES (?)", (name,))
+        cur = self._conn.execute("SELECT id FROM collections WHERE name=?", (name,))
+        row = cur.fetchone()
+        return row[0]
+
+    @metrics.timed("db.upsert_many")
+    @_locked
+    def upsert_many(self, rows: List[Tuple[str, str, Optional[str], Optional[str]]]):
+        """
+        rows: iterable[(id, text, created_at_iso_or_None, url_or_None)] — created_at zapisywany w UTC (_utc_iso)
+        """
+        if not rows:
+            return
+        rows = [(tid, text, _utc_iso(ts), url) for tid, text, ts, url in rows]
+        with self._conn:
+            self._conn.executemany("""
+            INSERT INTO tweets(id, text, created_at, url)
+            VALUES(?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                text=excluded.text,
+                created_at=COALESCE(excluded.created_at, tweets.created_at),
+                url=COALESCE(excluded.url, tweets.url),
+                fetched_at=CURRENT_TIMESTAMP
+            """, rows)
+
+    @metrics.timed("db.link_many")
+    @_locked
+    def link_many(self, tweet_ids: List[str], collection_id: int):
+        if not tweet_ids:
+            return
+        with self._conn:
+            self._conn.executemany("""
+            INSERT OR IGNORE INTO tweet_collections(tweet_id, collection_id) VALUES (?, ?)
+            """, ((tid, collection_id) for tid in tweet_ids))
+
+    @metrics.timed("db.fetch_collection_in_range")
+    @_locked
+    def fetch_collection_in_range(self, name: str, since: str, until: str):
+        """
+        Zwróć tweety z kolekcji w oknie [since, until], licząc po created_at, a jak NULL – po fetched_at.
+        Okno jak w pozostałych odczytach (_ts_bounds).
+        """
+        lo, hi = self._ts_bounds(since, until)
+        q = """
+        SELECT t.id, t.text, t.created_at, t.url
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        ORDER BY COALESCE(t.created_at, t.fetched_at)
+        """
+        cur = self._conn.execute(q, (name, lo, hi))
+        return cur.fetchall()
+
+    # kolumna → (wyrażenie SQL, typ Arrow); ts sprowadzany w SQLite do jednego formatu ISO w UTC,
+    # żeby Arrow parsował go jednym castem (created_at ma offset, fetched_at to CURRENT_TIMESTAMP)
+    _ARROW_COLUMNS = {
+        "id":   ("t.id", "string"),
+        "text": ("t.text", "string"),
+        "ts":   ("strftime('%Y-%m-%dT%H:%M:%fZ', COALESCE(t.created_at, t.fetched_at))", "timestamp"),
+        "url":  ("t.url", "string"),
+    }
+
+    @metrics.timed("db.read_window_arrow")
+    @_locked
+    def read_window_arrow(self, name: str, since: Optional[str] = None, until: Optional[str] = None,
+                          columns=("id", "text", "ts", "url"), limit: Optional[int] = None,
+                          chunk_rows: Optional[int] = None):
+        """
+        Okno kolekcji jako pyarrow.Table (kolejność po (ts, id), jak fetch_collection_in_range).
+        Kursor czytany porcjami fetchmany(chunk_rows) → po jednym RecordBatch na porcję;
+        ts parsowany wektorowo do timestamp[ms, UTC]. limit obcina już w SQL.
+        Bez pyarrow → ImportError (wołający wraca do fetch_collection_in_range).
+        """
+        import pyarrow as pa
+
+        unknown = [c for c in columns if c not in self._ARROW_COLUMNS]
+        if unknown:
+            raise ValueError(f"Nieznane kolumny: {unknown} (dostępne: {list(self._ARROW_COLUMNS)})")
+        ts_type = pa.timestamp("ms", tz="UTC")
+        schema = pa.schema([(c, ts_type if self._ARROW_COLUMNS[c][1] == "timestamp" else pa.string())
+                            for c in columns])
+        lo, hi = self._ts_bounds(since, until)
+        cur = self._conn.execute(f"""
+        SELECT {", ".join(self._ARROW_COLUMNS[c][0] for c in columns)}
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        ORDER BY COALESCE(t.created_at, t.fetched_at), t.id
+        LIMIT ?
+        """, (name, lo, hi, -1 if limit is None else int(limit)))
+
+        chunk_rows = chunk_rows or cfg.ARROW_CHUNK_ROWS
+        batches = []
+        while True:
+            rows = cur.fetchmany(chunk_rows)
+            if not rows:
+                break
+            arrays = []
+            for field, col in zip(schema, zip(*rows)):
+                arr = pa.array(col, type=pa.string())
+                arrays.append(arr.cast(ts_type) if field.type == ts_type else arr)
+            batches.append(pa.RecordBatch.from_arrays(arrays, schema=schema))
+        metrics.incr("db.arrow_batches", len(batches))
+        return pa.Table.from_batches(batches, schema=schema)
+
+    @metrics.timed("db.save_sentiment")
+    @_locked
+    def save_sentiment(self, rows: List[Tuple[str, str, float, float]], model: Optional[str] = None,
+                       source: Optional[str] = None):
+        """
+        rows: iterable[(tweet_id, label, score, polarity)] — rollup sentiment_daily aktualizują triggery.
+        source: None = wynik modelu, 'cascade' = pre-klasyfikator (nie trafia do danych treningowych kaskady).
+        """
+        if not rows:
+            return
+        model = model or cfg.SENTIMENT_MODEL
+        with self._conn:
+            self._conn.executemany("""
+            INSERT INTO tweet_sentiment(tweet_id, model, label, score, polarity, source)
+            VALUES(?, ?, ?, ?, ?, ?)
+            ON CONFLICT(tweet_id, model) DO UPDATE SET
+                label=excluded.label,
+                score=excluded.score,
+                polarity=excluded.polarity,
+                source=excluded.source,
+                scored_at=CURRENT_TIMESTAMP
+            """, ((tid, model, label, float(score), float(pol), source) for tid, label, score, pol in rows))
+
+    @_locked
+    def sentiment_daily(self, name: str, since: Optional[str] = None, until: Optional[str] = None,
+                        model: Optional[str] = None):
+        """
+        Dzienny rollup kolekcji: [(day, n_pos, n_neu, n_neg, pol_sum, pol_sumsq)] posortowane po dniu.
+        """
+        q = """
+        SELECT sd.day, sd.n_pos, sd.n_neu, sd.n_neg, sd.pol_sum, sd.pol_sumsq
+        FROM sentiment_daily sd
+        JOIN collections c ON c.id = sd.collection_id
+        WHERE c.name = ? AND sd.model = ?
+          AND (? IS NULL OR sd.day >= DATE(?))
+          AND (? IS NULL OR sd.day <= DATE(?))
+          AND sd.n_pos + sd.n_neu + sd.n_neg > 0
+        ORDER BY sd.day
+        """
+        model = model or cfg.SENTIMENT_MODEL
+        cur = self._conn.execute(q, (name, model, since, since, until, until))
+        return cur.fetchall()
+
+    @_locked
+    def rebuild_sentiment_daily(self):
+        """Pełne przeliczenie rollupu z tweet_sentiment (naprawa po ręcznych zmianach w bazie)."""
+        with self._conn:
+            self._conn.execute("DELETE FROM sentiment_daily")
+            self._conn.execute("""
+            INSERT INTO sentiment_daily(collection_id, day, model, n_pos, n_neu, n_neg, pol_sum, pol_sumsq)
+            SELECT tc.collection_id, DATE(COALESCE(t.created_at, t.fetched_at)), s.model,
+                   SUM(s.label='positive'), SUM(s.label='neutral'), SUM(s.label='negative'),
+                   SUM(s.polarity), SUM(s.polarity*s.polarity)
+            FROM tweet_sentiment s
+            JOIN tweets t             ON t.id = s.tweet_id
+            JOIN tweet_collections tc ON tc.tweet_id = s.tweet_id
+            GROUP BY 1, 2, 3
+            """)
+
+    # ---------- indeks częstości słów ----------
+    def _settle_word_counts(self):
+        """Odejmuje tokeny tweetów odłożonych przez triggery (word_daily_stale); policzą się ponownie."""
+        if self._conn.execute("SELECT 1 FROM word_daily_stale LIMIT 1").fetchone() is None:
+            return
+        stale = self._conn.execute("""
+        SELECT ws.collection_id, ws.day, ws.tokens
+        FROM word_daily_stale st
+        JOIN word_daily_seen ws ON ws.collection_id = st.collection_id AND ws.tweet_id = st.tweet_id
+        """).fetchall()
+        dec = {}
+        for coll_id, day, tokens in stale:
+            for tok in (tokens or "").split():
+                dec[(coll_id, day, tok)] = dec.get((coll_id, day, tok), 0) + 1
+        with self._conn:
+            self._conn.executemany("""
+            UPDATE word_daily SET n = n - ? WHERE collection_id = ? AND day = ? AND token = ?
+            """, ((n, *key) for key, n in dec.items()))
+            self._conn.executemany("""
+            DELETE FROM word_daily WHERE collection_id = ? AND day = ? AND token = ? AND n <= 0
+            """, dec.keys())
+            self._conn.execute("""
+            DELETE FROM word_daily_seen WHERE (collection_id, tweet_id) IN (
+                SELECT collection_id, tweet_id FROM word_daily_stale)
+            """)
+            self._conn.execute("DELETE FROM word_daily_stale")
+
+    @metrics.timed("db.add_word_counts")
+    @_locked
+    def add_word_counts(self, name: str, rows):
+        """
+        rows: iterable[(tweet_id, clean_ns)] — tokeny liczone tylko dla tweetów jeszcze niepoliczonych
+        w kolekcji; dzień = DATE(COALESCE(created_at, fetched_at)) jak w sentiment_daily.
+        Cała partia przez tabelę tymczasową: jeden INSERT ... SELECT i jeden odczyt nowych (tweet, dzień).
+        Zwraca liczbę nowo policzonych tweetów.
+        """
+        coll_id = self.get_or_create_collection(name)
+        self._settle_word_counts()
+        with self._conn:
+            self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS word_batch(tweet_id TEXT PRIMARY KEY, tokens TEXT)")
+            self._conn.execute("DELETE FROM word_batch")
+            self._conn.executemany("INSERT OR REPLACE INTO word_batch(tweet_id, tokens) VALUES (?, ?)",
+                                   ((tid, txt or "") for tid, txt in rows))
+            fresh = self._conn.execute("""
+            SELECT DATE(COALESCE(t.created_at, t.fetched_at)), b.tokens
+            FROM word_batch b JOIN tweets t ON t.id = b.tweet_id
+            WHERE NOT EXISTS (SELECT 1 FROM word_daily_seen ws WHERE ws.collection_id = ? AND ws.tweet_id = b.tweet_id)
+            """, (coll_id,)).fetchall()
+            self._conn.execute("""
+            INSERT OR IGNORE INTO word_daily_seen(collection_id, tweet_id, day, tokens)
+            SELECT ?, b.tweet_id, DATE(COALESCE(t.created_at, t.fetched_at)), b.tokens
+            FROM word_batch b JOIN tweets t ON t.id = b.tweet_id
+            """, (coll_id,))
+            self._conn.execute("DELETE FROM word_batch")
+            per_day = {}
+            for day, tokens in fresh:
+                cnt = per_day.setdefault(day, {})
+                for tok in tokens.split():
+                    cnt[tok] = cnt.get(tok, 0) + 1
+            self._conn.executemany("""
+            INSERT INTO word_daily(collection_id, day, token, n) VALUES (?, ?, ?, ?)
+            ON CONFLICT(collection_id, day, token) DO UPDATE SET n = n + excluded.n
+            """, ((coll_id, day, tok, n) for day, cnt in per_day.items() for tok, n in cnt.items()))
+        return len(fresh)
+
+    @_locked
+    def word_frequencies(self, name: str, since: Optional[str] = None, until: Optional[str] = None,
+                         limit: Optional[int] = None):
+        """Zsumowane częstości słów kolekcji w oknie: {token: n}, malejąco."""
+        self._settle_word_counts()
+        q = """
+        SELECT wd.token, SUM(wd.n) AS total
+        FROM word_daily wd
+        JOIN collections c ON c.id = wd.collection_id
+        WHERE c.name = ?
+          AND (? IS NULL OR wd.day >= DATE(?))
+          AND (? IS NULL OR wd.day <= DATE(?))
+        GROUP BY wd.token
+        ORDER BY total DESC
+        LIMIT ?
+        """
+        cur = self._conn.execute(q, (name, since, since, until, until, -1 if limit is None else int(limit)))
+        return dict(cur.fetchall())
+
+    @_locked
+    def top_terms_by_day(self, name: str, since: Optional[str] = None, until: Optional[str] = None, k: int = 10):
+        """Top-k słów dla każdego dnia: [(day, token, n)]."""
+        self._settle_word_counts()
+        q = """
+        SELECT day, token, n FROM (
+            SELECT wd.day, wd.token, wd.n,
+                   ROW_NUMBER() OVER (PARTITION BY wd.day ORDER BY wd.n DESC, wd.token) AS rk
+            FROM word_daily wd
+            JOIN collections c ON c.id = wd.collection_id
+            WHERE c.name = ?
+              AND (? IS NULL OR wd.day >= DATE(?))
+              AND (? IS NULL OR wd.day <= DATE(?))
+        )
+        WHERE rk <= ?
+        ORDER BY day, n DESC
+        """
+        cur = self._conn.execute(q, (name, since, since, until, until, int(k)))
+        return cur.fetchall()
+
+    # ---------- klastry near-duplikatów (MinHash/LSH, near_dup.py) ----------
+    @_locked
+    def near_dup_members(self, name: str, tweet_ids) -> dict:
+        """{tweet_id: rep_id} dla tweetów już przypisanych do klastrów w kolekcji."""
+        coll_id = self.get_or_create_collection(name)
+        out = {}
+        ids = list(tweet_ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            cur = self._conn.execute(f"""
+            SELECT tweet_id, rep_id FROM near_dup_members
+            WHERE collection_id = ? AND tweet_id IN ({",".join("?" * len(chunk))})
+            """, (coll_id, *chunk))
+            out.update(cur.fetchall())
+        return out
+
+    @_locked
+    def near_dup_index(self, name: str):
+        """Indeks LSH kolekcji: ({(band, bucket): [rep_id]}, {rep_id: podpis BLOB})."""
+        coll_id = self.get_or_create_collection(name)
+        buckets = defaultdict(list)
+        for band, bucket, rep in self._conn.execute(
+                "SELECT band, bucket, rep_id FROM near_dup_buckets WHERE collection_id = ?", (coll_id,)):
+            buckets[(band, bucket)].append(rep)
+        sigs = dict(self._conn.execute("SELECT rep_id, sig FROM near_dup_reps WHERE collection_id = ?", (coll_id,)))
+        return buckets, sigs
+
+    @metrics.timed("db.near_dup_save")
+    @_locked
+    def near_dup_save(self, name: str, members, new_reps):
+        """
+        members: [(tweet_id, rep_id)], new_reps: [(rep_id, sig_bytes, [(band, bucket)])].
+        Rozmiary klastrów (size) są przeliczane dla dotkniętych reprezentantów.
+        """
+        coll_id = self.get_or_create_collection(name)
+        with self._conn:
+            self._conn.executemany("""
+            INSERT OR IGNORE INTO near_dup_reps(collection_id, rep_id, sig, size) VALUES (?, ?, ?, 0)
+            """, ((coll_id, rep, sig) for rep, sig, _ in new_reps))
+            self._conn.executemany("""
+            INSERT OR IGNORE INTO near_dup_buckets(collection_id, band, bucket, rep_id) VALUES (?, ?, ?, ?)
+            """, ((coll_id, band, bucket, rep) for rep, _, keys in new_reps for band, bucket in keys))
+            self._conn.executemany("""
+            INSERT OR IGNORE INTO near_dup_members(collection_id, tweet_id, rep_id) VALUES (?, ?, ?)
+            """, ((coll_id, tid, rep) for tid, rep in members))
+            self._conn.executemany("""
+            UPDATE near_dup_reps SET size = (
+                SELECT COUNT(*) FROM near_dup_members m WHERE m.collection_id = ? AND m.rep_id = ?
+            ) WHERE collection_id = ? AND rep_id = ?
+            """, ((coll_id, rep, coll_id, rep) for rep in {rep for _, rep in members}))
+
+    @_locked
+    def cluster_sizes(self, name: str, since: Optional[str] = None, until: Optional[str] = None):
+        """[(rep_id, size_w_oknie, size_w_kolekcji)] malejąco — tweety bez klastra liczą się jako 1."""
+        lo, hi = self._ts_bounds(since, until)
+        q = """
+        SELECT COALESCE(m.rep_id, t.id) AS rep, COUNT(*) AS n, MAX(COALESCE(r.size, 1))
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        LEFT JOIN near_dup_members m ON m.collection_id = c.id AND m.tweet_id = t.id
+        LEFT JOIN near_dup_reps r    ON r.collection_id = c.id AND r.rep_id = m.rep_id
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        GROUP BY rep
+        ORDER BY n DESC, rep
+        """
+        return self._conn.execute(q, (name, lo, hi)).fetchall()
+
+    @_locked
+    def sentiment_of(self, tweet_ids, model: Optional[str] = None, cascade: bool = True) -> dict:
+        """
+        {tweet_id: (label, score, polarity, source)} dla tweetów z zapisanym wynikiem modelu;
+        cascade=False pomija wyniki pre-klasyfikatora (source='cascade') — policzy je transformer.
+        """
+        model = model or cfg.SENTIMENT_MODEL
+        out = {}
+        ids = list(tweet_ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            cur = self._conn.execute(f"""
+            SELECT tweet_id, label, score, polarity, source FROM tweet_sentiment
+            WHERE model = ? AND tweet_id IN ({",".join("?" * len(chunk))}){"" if cascade else " AND source IS NULL"}
+            """, (model, *chunk))
+            out.update((tid, tuple(v)) for tid, *v in cur.fetchall())
+        return out
+
+    @_locked
+    def sample_texts(self, name: str, n: int):
+        """n losowych tekstów z kolekcji (np. próbka pomiarowa dla autotune)."""
+        cur = self._conn.execute("""
+        SELECT t.text
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        WHERE c.name = ?
+        ORDER BY RANDOM()
+        LIMIT ?
+        """, (name, int(n)))
+        return [r[0] for r in cur.fetchall()]
+
+    @_locked
+    def labelled_texts(self, name: Optional[str] = None, limit: int = None, model: Optional[str] = None):
+        """
+        [(text, label)] — losowe tweety z etykietą policzoną przez transformer (source IS NULL),
+        opcjonalnie tylko z kolekcji name; dane treningowe kaskady.
+        """
+        model = model or cfg.SENTIMENT_MODEL
+        cur = self._conn.execute("""
+        SELECT t.text, s.label
+        FROM tweet_sentiment s
+        JOIN tweets t ON t.id = s.tweet_id
+        WHERE s.model = ? AND s.source IS NULL
+          AND (? IS NULL OR EXISTS (
+              SELECT 1 FROM tweet_collections tc JOIN collections c ON c.id = tc.collection_id
+              WHERE tc.tweet_id = s.tweet_id AND c.name = ?))
+        ORDER BY RANDOM()
+        LIMIT ?
+        """, (model, name, name, -1 if limit is None else int(limit)))
+        return cur.fetchall()
+
+    # ---------- język tweetów (lang_id) ----------
+    @_locked
+    def lang_of(self, tweet_ids) -> dict:
+        """{tweet_id: lang} dla tweetów z zapisanym werdyktem."""
+        out = {}
+        ids = list(tweet_ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            cur = self._conn.execute(f"""
+            SELECT tweet_id, lang FROM tweet_lang WHERE tweet_id IN ({",".join("?" * len(chunk))})
+            """, chunk)
+            out.update(cur.fetchall())
+        return out
+
+    @metrics.timed("db.save_lang")
+    @_locked
+    def save_lang(self, rows):
+        """rows: iterable[(tweet_id, lang, conf)]."""
+        with self._conn:
+            self._conn.executemany("""
+            INSERT OR REPLACE INTO tweet_lang(tweet_id, lang, conf) VALUES (?, ?, ?)
+            """, ((tid, lang, float(conf)) for tid, lang, conf in rows))
+
+    # ---------- pokrycie scrapowania: zmierzona gęstość osi czasu wyszukiwania per (fraza, dzień) ----------
+    @_locked
+    def coverage_of(self, keyword: str, since: str, until: str) -> dict:
+        """{day: tweety/godzinę} dla dni [since, until] (daty włącznie)."""
+        cur = self._conn.execute("""
+        SELECT day, per_hour FROM scrape_coverage WHERE keyword = ? AND day >= ? AND day <= ?
+        """, (keyword, since, until))
+        return dict(cur.fetchall())
+
+    @_locked
+    def save_coverage(self, keyword: str, day: str, per_hour: float):
+        """Zapamiętuje gęstość dnia (maksimum z pomiarów — wolumen minionego dnia nie maleje)."""
+        with self._conn:
+            self._conn.execute("""
+            INSERT INTO scrape_coverage(keyword, day, per_hour) VALUES (?, ?, ?)
+            ON CONFLICT(keyword, day) DO UPDATE SET
+                per_hour = max(per_hour, excluded.per_hour), updated_at = CURRENT_TIMESTAMP
+            """, (keyword, day, float(per_hour)))
+
+    # ---------- cache inferencji (klucz = skrót wejścia modelu) ----------
+    @_locked
+    def memo_get(self, keys, model: Optional[str] = None, with_vec: bool = False) -> dict:
+        """
+        {key: (label, score)} dla znanych kluczy (bytes) danego modelu;
+        with_vec — {key: (label, score, vec)} tylko dla wpisów z zapisanym wektorem zdania.
+        """
+        model = model or cfg.SENTIMENT_MODEL
+        out = {}
+        keys = list(keys)
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            cur = self._conn.execute(f"""
+            SELECT key, label, score{", vec" if with_vec else ""} FROM inference_cache
+            WHERE model = ? AND key IN ({",".join("?" * len(chunk))}){" AND vec IS NOT NULL" if with_vec else ""}
+            """, (model, *chunk))
+            out.update((k, tuple(v)) for k, *v in cur.fetchall())
+        return out
+
+    @metrics.timed("db.memo_put")
+    @_locked
+    def memo_put(self, rows, model: Optional[str] = None):
+        """rows: iterable[(key, label, score)] albo [(key, label, score, vec)]."""
+        model = model or cfg.SENTIMENT_MODEL
+        with self._conn:
+            self._conn.executemany("""
+            INSERT OR REPLACE INTO inference_cache(model, key, label, score, vec) VALUES (?, ?, ?, ?, ?)
+            """, ((model, r[0], r[1], float(r[2]), r[3] if len(r) > 3 else None) for r in rows))
+
+    # ---------- wektory zdań (float16, z przebiegu modelu sentymentu) ----------
+    @metrics.timed("db.save_embeddings")
+    @_locked
+    def save_embeddings(self, rows, model: Optional[str] = None):
+        """rows: iterable[(tweet_id, vec_bytes)]."""
+        model = model or cfg.SENTIMENT_MODEL
+        with self._conn:
+            self._conn.executemany("""
+            INSERT OR REPLACE INTO tweet_embeddings(tweet_id, model, vec) VALUES (?, ?, ?)
+            """, ((tid, model, vec) for tid, vec in rows))
+
+    @metrics.timed("db.window_embeddings")
+    @_locked
+    def window_embeddings(self, name: str, since: Optional[str] = None, until: Optional[str] = None,
+                          model: Optional[str] = None):
+        """[(tweet_id, vec_bytes)] tweetów kolekcji z okna, które mają wektor."""
+        model = model or cfg.SENTIMENT_MODEL
+        lo, hi = self._ts_bounds(since, until)
+        cur = self._conn.execute("""
+        SELECT t.id, e.vec
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        JOIN tweet_embeddings e   ON e.tweet_id = t.id AND e.model = ?
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        ORDER BY COALESCE(t.created_at, t.fetched_at), t.id
+        """, (model, name, lo, hi))
+        return cur.fetchall()
+
+    # ---------- odczyty dla API ----------
+    @_locked
+    def tweets_by_ids(self, tweet_ids) -> dict:
+        """{tweet_id: (text, ts, url)}."""
+        out = {}
+        ids = list(tweet_ids)
+        for i in range(0, len(ids), 500):
+            chunk = ids[i:i + 500]
+            cur = self._conn.execute(f"""
+            SELECT id, text, COALESCE(created_at, fetched_at), url FROM tweets
+            WHERE id IN ({",".join("?" * len(chunk))})
+            """, chunk)
+            out.update((tid, (text, ts, url)) for tid, text, ts, url in cur.fetchall())
+        return out
+
+    @_locked
+    def data_version(self) -> int:
+        """PRAGMA data_version — zmienia się, gdy inne połączenie zatwierdzi zapis (unieważnianie cache)."""
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    @_locked
+    def list_collections(self):
+        cur = self._conn.execute("""
+        SELECT c.name, c.created_at, COUNT(tc.tweet_id)
+        FROM collections c
+        LEFT JOIN tweet_collections tc ON tc.collection_id = c.id
+        GROUP BY c.id
+        ORDER BY c.name
+        """)
+        return cur.fetchall()
+
+    @staticmethod
+    def _ts_bounds(since: Optional[str], until: Optional[str]):
+        """[since, until] (dni włącznie) → porównania na COALESCE(created_at, fetched_at) korzystające z idx_tweets_ts."""
+        lo = since[:10] if since else ""
+        hi = (date.fromisoformat(until[:10]) + timedelta(days=1)).isoformat() if until else "9999"
+        return lo, hi
+
+    @_locked
+    def day_counts(self, name: str, since: Optional[str] = None, until: Optional[str] = None) -> dict:
+        """{dzień: liczba tweetów kolekcji} w oknie — dzień jak w _ts_bounds (prefiks znacznika czasu)."""
+        lo, hi = self._ts_bounds(since, until)
+        cur = self._conn.execute("""
+        SELECT substr(COALESCE(t.created_at, t.fetched_at), 1, 10) AS day, COUNT(*)
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        GROUP BY day
+        ORDER BY day
+        """, (name, lo, hi))
+        return dict(cur.fetchall())
+
+    @metrics.timed("db.sample_by_day")
+    @_locked
+    def sample_by_day(self, name: str, quotas: dict):
+        """
+        Warstwowa próba losowa: dla każdego {dzień: k} k losowych tweetów kolekcji z tego dnia
+        (ORDER BY RANDOM() LIMIT k w SQLite — niewylosowane wiersze nie trafiają do Pythona).
+        INDEXED BY: bez statystyk ANALYZE planer wybiera skan całej kolekcji dla każdego dnia.
+        Zwraca [(id, text, ts, url, day)].
+        """
+        out = []
+        for day, k in sorted(quotas.items()):
+            if k <= 0:
+                continue
+            lo, hi = self._ts_bounds(day, day)
+            cur = self._conn.execute("""
+            SELECT t.id, t.text, COALESCE(t.created_at, t.fetched_at), t.url
+            FROM tweets t INDEXED BY idx_tweets_ts
+            JOIN tweet_collections tc ON tc.tweet_id = t.id
+            JOIN collections c        ON c.id = tc.collection_id
+            WHERE c.name = ?
+              AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+            ORDER BY RANDOM()
+            LIMIT ?
+            """, (name, lo, hi, int(k)))
+            out.extend((*r, day) for r in cur.fetchall())
+        return out
+
+    @_locked
+    def count_in_range(self, name: str, since: Optional[str] = None, until: Optional[str] = None) -> int:
+        lo, hi = self._ts_bounds(since, until)
+        cur = self._conn.execute("""
+        SELECT COUNT(*)
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        """, (name, lo, hi))
+        return cur.fetchone()[0]
+
+    @_locked
+    def fetch_tweets_page(self, name: str, since: Optional[str] = None, until: Optional[str] = None,
+                          limit: int = 100, after: Optional[Tuple[str, str]] = None, model: Optional[str] = None):
+        """
+        Stronicowanie po kluczu (ts, id): after=(ts, id) ostatniego wiersza poprzedniej strony.
+        Zwraca [(id, text, ts, url, label, score, polarity)].
+        """
+        lo, hi = self._ts_bounds(since, until)
+        a_ts, a_id = after if after else ("", "")
+        cur = self._conn.execute("""
+        SELECT t.id, t.text, COALESCE(t.created_at, t.fetched_at) AS ts, t.url, s.label, s.score, s.polarity
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        LEFT JOIN tweet_sentiment s ON s.tweet_id = t.id AND s.model = ?
+        WHERE c.name = ?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+          AND (COALESCE(t.created_at, t.fetched_at), t.id) > (?, ?)
+        ORDER BY COALESCE(t.created_at, t.fetched_at), t.id
+        LIMIT ?
+        """, (model or cfg.SENTIMENT_MODEL, name, lo, hi, a_ts, a_id, int(limit)))
+        return cur.fetchall()
+
+    # ---------- harmonogram (tryb --serve) ----------
+    @_locked
+    def sync_schedules(self, items, now_iso: str):
+        """
+        items: iterable[(name, spec_json, interval_sec, jitter_sec)]. Nowe zadania startują od razu,
+        istniejące zachowują next_run_at/last_*; zadania spoza listy są wyłączane.
+        """
+        items = list(items)
+        with self._conn:
+            self._conn.execute("UPDATE schedules SET enabled = 0")
+            self._conn.executemany("""
+            INSERT INTO schedules(name, spec, interval_sec, jitter_sec, enabled, next_run_at)
+            VALUES (?, ?, ?, ?, 1, ?)
+            ON CONFLICT(name) DO UPDATE SET
+                spec=excluded.spec,
+                interval_sec=excluded.interval_sec,
+                jitter_sec=excluded.jitter_sec,
+                enabled=1
+            """, ((n, spec, int(iv), int(jt), now_iso) for n, spec, iv, jt in items))
+
+    @_locked
+    def due_schedules(self, now_iso: str):
+        """[(name, spec_json, interval_sec, jitter_sec)] zadań, których next_run_at minął."""
+        cur = self._conn.execute("""
+        SELECT name, spec, interval_sec, jitter_sec FROM schedules
+        WHERE enabled = 1 AND next_run_at <= ?
+        ORDER BY next_run_at
+        """, (now_iso,))
+        return cur.fetchall()
+
+    @_locked
+    def next_schedule_at(self) -> Optional[str]:
+        cur = self._conn.execute("SELECT MIN(next_run_at) FROM schedules WHERE enabled = 1")
+        return cur.fetchone()[0]
+
+    @_locked
+    def mark_schedule_run(self, name: str, started_iso: str, duration_s: float, status: str,
+                          error: Optional[str], next_run_iso: str):
+        with self._conn:
+            self._conn.execute("""
+            UPDATE schedules SET last_run_at=?, last_duration_s=?, last_status=?, last_error=?, next_run_at=?
+            WHERE name=?
+            """, (started_iso, float(duration_s), status, error, next_run_iso, name))
+
+    @_locked
+    def list_schedules(self):
+        cur = self._conn.execute("""
+        SELECT name, interval_sec, enabled, next_run_at, last_run_at, last_status, last_duration_s
+        FROM schedules ORDER BY name
+        """)
+        return cur.fetchall()
+
+    @_locked
+    def stats(self, name: str, since: Optional[str] = None, until: Optional[str] = None,
+              model: Optional[str] = None):
+        """Liczba, zakres dat i sentyment tweetów kolekcji — wszystko z tego samego okna [since, until]."""
+        lo, hi = self._ts_bounds(since, until)
+        q = """
+        SELECT COUNT(*),
+               MIN(COALESCE(t.created_at, t.fetched_at)),
+               MAX(COALESCE(t.created_at, t.fetched_at))
+        FROM tweets t
+        JOIN tweet_collections tc ON tc.tweet_id = t.id
+        JOIN collections c        ON c.id = tc.collection_id
+        WHERE c.name=?
+          AND COALESCE(t.created_at, t.fetched_at) >= ? AND COALESCE(t.created_at, t.fetched_at) < ?
+        """
+        cur = self._conn.execute(q, (name, lo, hi))
+        total, dmin, dmax = cur.fetchone()
+
+        # sentyment z rollupu (O(dni))
+        n_pos = n_neu = n_neg = 0
+        s1 = s2 = 0.0
+        for _day, p, u, n, ps, pss in self.sentiment_daily(name, since, until, model):
+            n_pos += p; n_neu += u; n_neg += n
+            s1 += ps; s2 += pss
+        scored = n_pos + n_neu + n_neg
+        mean = (s1 / scored) if scored else None
+        std = math.sqrt(max(0.0, s2 / scored - mean * mean)) if scored else None
+        return {"count": total, "from": dmin, "to": dmax,
+                "scored": scored,
+                "sentiment": {"positive": n_pos, "neutral": n_neu, "negative": n_neg},
+                "polarity_mean": mean, "polarity_std": std}
+
+    @_locked
+    def close(self):
+        try:
+            self._conn.commit()
+            self._conn.close()
+        except Exception:
+            pass
+
+
+class HybridDeduper:
+    """
+    Opcjonalny deduper: Bloom (szybkie "raczej nie") + potwierdzenie w SQLite (tweets).
+    Trwałość tweetów zapewnia PRIMARY KEY w TweetStore; Bloom jest cachem.
+    scope(collection_id) — potwierdzenie w tweet_collections tej kolekcji: tweet zapisany dla innej
+    kolekcji nie jest duplikatem (ma zostać zebrany i podlinkowany).
+    """
+    def __init__(self, sqlite_path: Optional[str] = None, expected_n=500_000, fp_rate=1e-5,
+                 load_bloom: Optional[str] = None, table='tweets'):
+        self.sqlite_path = sqlite_path or cfg.DB_PATH
+        self.table = table
+        self.collection_id = None
+        self.expected_n = expected_n
+        self.fp_rate = fp_rate
+
+        self._conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+
+        self.n = expected_n
+        self.p = fp_rate
+        # m = - (n * ln p) / (ln 2)^2
+        self.m = max(8, int(- (self.n * math.log(self.p)) / (math.log(2)**2)))
+        self.k = max(1, int(round((self.m / self.n) * math.log(2))))
+        self.bitarray = bytearray((self.m + 7) // 8)
+
+        if load_bloom and os.path.exists(load_bloom):
+            try:
+                data = pickle.load(open(load_bloom, 'rb'))
+                if data.get('m') == self.m and data.get('k') == self.k:
+                    self.bitarray = bytearray(data['bitarray'])
+            except Exception:
+                pass
+
+    def _hashes(self, data: bytes):
+        for i in range(self.k):
+            h = hashlib.sha256(data + i.to_bytes(2, 'big')).digest()
+            yield int.from_bytes(h, 'big') % self.m
+
+    def _bloom_contains(self, uid: str):
+        b = uid.encode('utf-8')
+        for pos in self._hashes(b):
+            byte_idx = pos // 8
+            bit = pos % 8
+            if not (self.bitarray[byte_idx] & (1 << bit)):
+                return False
+        return True
+
+    def _bloom_add(self, uid: str):
+        b = uid.encode('utf-8')
+        for pos in self._hashes(b):
+            byte_idx = pos // 8
+            bit = pos % 8
+            self.bitarray[byte_idx] |= (1 << bit)
+
+    def scope(self, collection_id: Optional[int]):
+        self.collection_id = collection_id
+
+    def _sqlite_contains(self, uid: str):
+        if self.collection_id is not None:
+            cur = self._conn.execute("SELECT 1 FROM tweet_collections WHERE tweet_id=? AND collection_id=? LIMIT 1",
+                                     (uid, self.collection_id))
+        else:
+            cur = self._conn.execute(f"SELECT 1 FROM {self.table} WHERE id=? LIMIT 1", (uid,))
+        return cur.fetchone() is not None
+
+    def contains(self, uid: str):
+        if not self._bloom_contains(uid):
+            return False
+        return self._sqlite_contains(uid)
+
+    def add(self, uid: str):
+        self._bloom_add(uid)
+
+    def bulk_add(self, uids):
+        for u in uids:
+            self._bloom_add(u)
+
+    def save_bloom(self, filename: Optional[str] = None):
+        filename = filename or cfg.BLOOM_SERIAL
+        try:
+            with open(filename, 'wb') as f:
+                pickle.dump({'m': self.m, 'k': self.k, 'bitarray': bytes(self.bitarray)}, f)
+        except Exception:
+            pass
+
+    def close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
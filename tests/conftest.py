@@ -0,0 +1,28 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import config as cfg
+from store import TweetStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Świeża baza w katalogu tymczasowym (cfg.DB_PATH też tam — na wypadek otwierania po ścieżce)."""
+    monkeypatch.setattr(cfg, "DB_PATH", str(tmp_path / "tweets.sqlite"))
+    st = TweetStore(cfg.DB_PATH)
+    yield st
+    st.close()
+
+
+def add_tweets(store, name, rows, labels=None):
+    """rows: [(id, text, created_at)]; labels: {id: (label, polarity)} zapisywane jako wynik modelu."""
+    coll_id = store.get_or_create_collection(name)
+    store.upsert_many([(tid, text, ts, None) for tid, text, ts in rows])
+    store.link_many([tid for tid, _, _ in rows], coll_id)
+    if labels:
+        store.save_sentiment([(tid, label, abs(pol), pol) for tid, (label, pol) in labels.items()])
+    return coll_id
@@ -0,0 +1,43 @@
+import json
+import threading
+import urllib.request
+
+import pytest
+
+import api
+from conftest import add_tweets
+
+
+@pytest.fixture
+def server(store):
+    srv = api.make_server("127.0.0.1", 0, store=store)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def get(srv, path):
+    with urllib.request.urlopen(f"http://127.0.0.1:{srv.server_address[1]}{path}") as resp:
+        return json.loads(resp.read())
+
+
+def test_stats_count_and_sentiment_share_the_window(server, store):
+    add_tweets(store, "a", [("1", "jan", "2024-01-05T10:00:00+00:00"),
+                            ("2", "feb", "2024-02-10T10:00:00+00:00"),
+                            ("3", "feb2", "2024-02-11T10:00:00+00:00")],
+               labels={"1": ("positive", 0.9), "2": ("negative", -0.8), "3": ("neutral", 0.0)})
+
+    st = get(server, "/collections/a/stats?since=2024-01-05&until=2024-01-06")
+    assert st["count"] == st["scored"] == sum(st["sentiment"].values()) == 1
+    assert st["from"] == st["to"] == "2024-01-05T10:00:00+00:00"
+
+    st = get(server, "/collections/a/stats?since=2024-01-07&until=2024-01-31")
+    assert st["count"] == st["scored"] == 0
+    assert st["from"] is None
+
+    st = get(server, "/collections/a/stats?since=2024-02-01")
+    assert st["count"] == st["scored"] == 2
+    assert st["sentiment"] == {"positive": 0, "neutral": 1, "negative": 1}
+    assert get(server, "/collections/a/count?since=2024-02-01")["count"] == 2
+
@@ -0,0 +1,82 @@
+import pytest
+
+import config as cfg
+from conftest import add_tweets
+
+ROWS = [("1", "a", "2024-01-01T08:00:00+00:00"),
+        ("2", "b", "2024-01-01T20:00:00+00:00"),
+        ("3", "c", "2024-01-02T09:00:00+00:00")]
+M = cfg.SENTIMENT_MODEL
+LABELS = {"1": ("positive", 0.8), "2": ("negative", -0.6), "3": ("neutral", 0.1)}
+
+
+def rollup(store):
+    """Niezerowe wiersze sentiment_daily: {(collection_id, day, model): (n_pos, n_neu, n_neg, pol_sum, pol_sumsq)}."""
+    rows = store._conn.execute("""
+    SELECT collection_id, day, model, n_pos, n_neu, n_neg, round(pol_sum, 9), round(pol_sumsq, 9)
+    FROM sentiment_daily WHERE n_pos + n_neu + n_neg > 0
+    """).fetchall()
+    return {r[:3]: r[3:] for r in rows}
+
+
+def assert_matches_rebuild(store):
+    maintained = rollup(store)
+    store.rebuild_sentiment_daily()
+    assert maintained == rollup(store)
+    return maintained
+
+
+@pytest.fixture
+def coll(store):
+    return add_tweets(store, "k", ROWS, labels=LABELS)
+
+
+def test_insert(store, coll):
+    r = assert_matches_rebuild(store)
+    assert r[(coll, "2024-01-01", M)] == (1, 0, 1, 0.2, 1.0)
+    assert r[(coll, "2024-01-02", M)] == (0, 1, 0, 0.1, 0.01)
+
+
+def test_relabel(store, coll):
+    store.save_sentiment([("2", "positive", 0.7, 0.7)])
+    r = assert_matches_rebuild(store)
+    assert r[(coll, "2024-01-01", M)][:3] == (2, 0, 0)
+
+
+def test_link_to_second_collection_and_unlink(store, coll):
+    other = store.get_or_create_collection("other")
+    store.link_many(["1", "3"], other)
+    r = assert_matches_rebuild(store)
+    assert r[(other, "2024-01-01", M)][:3] == (1, 0, 0)
+    assert r[(coll, "2024-01-01", M)][:3] == (1, 0, 1)
+
+    with store._conn:
+        store._conn.execute("DELETE FROM tweet_collections WHERE tweet_id = '1' AND collection_id = ?", (other,))
+    r = assert_matches_rebuild(store)
+    assert (other, "2024-01-01", M) not in r
+    assert r[(coll, "2024-01-01", M)][:3] == (1, 0, 1)
+
+
+def test_redate(store, coll):
+    store.upsert_many([("1", "a", "2024-01-02T07:00:00+00:00", None)])
+    r = assert_matches_rebuild(store)
+    assert r[(coll, "2024-01-01", M)][:3] == (0, 0, 1)
+    assert r[(coll, "2024-01-02", M)][:3] == (1, 1, 0)
+
+
+def test_delete_score_and_tweet(store, coll):
+    with store._conn:
+        store._conn.execute("DELETE FROM tweet_sentiment WHERE tweet_id = '2'")
+    assert_matches_rebuild(store)
+    with store._conn:
+        store._conn.execute("DELETE FROM tweets WHERE id = '3'")
+    r = assert_matches_rebuild(store)
+    assert set(r) == {(coll, "2024-01-01", M)}
+
+
+def test_stats_and_daily_read_the_rollup(store, coll):
+    st = store.stats("k", "2024-01-01", "2024-01-01")
+    assert st["count"] == st["scored"] == 2
+    assert st["sentiment"] == {"positive": 1, "neutral": 0, "negative": 1}
+    assert st["polarity_mean"] == pytest.approx(0.1)
+    assert [d[0] for d in store.sentiment_daily("k", "2024-01-02")] == ["2024-01-02"]
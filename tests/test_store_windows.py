@@ -0,0 +1,61 @@
+from conftest import add_tweets
+from store import TweetStore
+
+ROWS = [("a", "x", "2024-01-05T23:30:00-02:00"),   # 2024-01-06 01:30 UTC
+        ("b", "y", "2024-01-05T23:30:00Z"),
+        ("c", "z", "2024-01-05T10:00:00"),
+        ("d", "w", "2024-02-10T10:00:00+00:00")]
+
+
+def window_sizes(store, since, until):
+    out = {"count_in_range": store.count_in_range("k", since, until),
+           "fetch_collection_in_range": len(store.fetch_collection_in_range("k", since, until)),
+           "day_counts": sum(store.day_counts("k", since, until).values()),
+           "fetch_tweets_page": len(store.fetch_tweets_page("k", since, until, limit=100)),
+           "stats": store.stats("k", since, until)["count"]}
+    try:
+        out["read_window_arrow"] = store.read_window_arrow("k", since, until).num_rows
+    except ImportError:
+        pass
+    return out
+
+
+def test_offset_timestamps_are_stored_in_utc(store):
+    add_tweets(store, "k", ROWS)
+    ts = dict(store._conn.execute("SELECT id, created_at FROM tweets"))
+    assert ts["a"] == "2024-01-06T01:30:00+00:00"
+    assert ts["b"] == "2024-01-05T23:30:00Z"
+    assert ts["c"] == "2024-01-05T10:00:00"
+
+
+def test_all_window_reads_agree(store):
+    add_tweets(store, "k", ROWS)
+    for since, until, expected in (("2024-01-05", "2024-01-05", 2),
+                                   ("2024-01-06", "2024-01-06", 1),
+                                   ("2024-01-05", "2024-01-06", 3),
+                                   ("2024-01-07", "2024-02-09", 0),
+                                   (None, None, 4)):
+        sizes = window_sizes(store, since, until)
+        assert set(sizes.values()) == {expected}, (since, until, sizes)
+
+
+def test_window_day_matches_rollup_day(store):
+    add_tweets(store, "k", ROWS, labels={"a": ("positive", 0.5)})
+    assert [d[0] for d in store.sentiment_daily("k")] == ["2024-01-06"]
+    assert store.stats("k", "2024-01-06", "2024-01-06")["count"] == 1
+
+
+def test_existing_offset_rows_are_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    st = TweetStore(path)
+    st._conn.execute("INSERT INTO tweets(id, text, created_at) VALUES ('a', 'x', '2024-01-05T23:30:00-02:00')")
+    st._conn.execute("PRAGMA user_version = 0")
+    st._conn.commit()
+    st.close()
+
+    st = TweetStore(path)
+    try:
+        assert st._conn.execute("SELECT created_at FROM tweets").fetchone()[0] == "2024-01-06T01:30:00+00:00"
+        assert st._conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    finally:
+        st.close()
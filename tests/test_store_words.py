@@ -0,0 +1,89 @@
+from conftest import add_tweets
+from store import TweetStore
+
+ROWS = [("1", "raw", "2024-01-01T08:00:00+00:00"),
+        ("2", "raw", "2024-01-01T20:00:00+00:00"),
+        ("3", "raw", "2024-01-02T09:00:00+00:00")]
+CLEAN = {"1": "inflacja rośnie", "2": "inflacja spada inflacja", "3": "rząd inflacja"}
+
+
+def count(store, name="k", ids=None):
+    return store.add_word_counts(name, [(tid, CLEAN[tid]) for tid in (ids or CLEAN)])
+
+
+def test_counts_once_per_tweet(store):
+    add_tweets(store, "k", ROWS)
+    assert count(store) == 3
+    assert count(store) == 0
+    assert store.word_frequencies("k") == {"inflacja": 4, "rośnie": 1, "spada": 1, "rząd": 1}
+    assert store.word_frequencies("k", "2024-01-02", "2024-01-02") == {"rząd": 1, "inflacja": 1}
+    assert store.word_frequencies("k", limit=1) == {"inflacja": 4}
+
+
+def test_collections_are_counted_separately(store):
+    add_tweets(store, "k", ROWS)
+    add_tweets(store, "other", ROWS[:1])
+    count(store)
+    assert count(store, "other", ["1"]) == 1
+    assert store.word_frequencies("other") == {"inflacja": 1, "rośnie": 1}
+    assert store.word_frequencies("k")["inflacja"] == 4
+
+
+def test_text_change_is_recounted(store):
+    add_tweets(store, "k", ROWS)
+    count(store)
+    store.upsert_many([("2", "raw edited", "2024-01-01T20:00:00+00:00", None)])
+    edited = dict(CLEAN, **{"2": "deflacja"})
+    assert store.word_frequencies("k") == {"inflacja": 2, "rośnie": 1, "rząd": 1}
+    assert store.add_word_counts("k", [(tid, edited[tid]) for tid in edited]) == 1
+    assert store.word_frequencies("k") == {"inflacja": 2, "rośnie": 1, "rząd": 1, "deflacja": 1}
+
+
+def test_redate_moves_tokens_to_new_day(store):
+    add_tweets(store, "k", ROWS)
+    count(store)
+    store.upsert_many([("1", "raw", "2024-01-02T07:00:00+00:00", None)])
+    assert count(store) == 1
+    assert store.word_frequencies("k", "2024-01-01", "2024-01-01") == {"inflacja": 2, "spada": 1}
+    assert store.word_frequencies("k", "2024-01-02", "2024-01-02") == {"inflacja": 2, "rośnie": 1, "rząd": 1}
+
+
+def test_unlink_and_delete_subtract_tokens(store):
+    coll = add_tweets(store, "k", ROWS)
+    count(store)
+    with store._conn:
+        store._conn.execute("DELETE FROM tweet_collections WHERE tweet_id = '2' AND collection_id = ?", (coll,))
+        store._conn.execute("DELETE FROM tweets WHERE id = '3'")
+    assert store.word_frequencies("k") == {"inflacja": 1, "rośnie": 1}
+    assert store._conn.execute("SELECT COUNT(*) FROM word_daily WHERE n <= 0").fetchone()[0] == 0
+
+
+def test_top_terms_by_day(store):
+    add_tweets(store, "k", ROWS)
+    count(store)
+    top = store.top_terms_by_day("k", k=1)
+    assert top == [("2024-01-01", "inflacja", 3), ("2024-01-02", "inflacja", 1)]
+
+
+def test_migration_without_tokens_clears_index(tmp_path):
+    path = str(tmp_path / "old.sqlite")
+    st = TweetStore(path)
+    coll = add_tweets(st, "k", ROWS[:1])
+    st.add_word_counts("k", [("1", CLEAN["1"])])
+    with st._conn:
+        st._conn.execute("DROP TABLE word_daily_seen")
+        st._conn.execute("""
+        CREATE TABLE word_daily_seen(collection_id INTEGER NOT NULL, tweet_id TEXT NOT NULL, day TEXT NOT NULL,
+                                     PRIMARY KEY (collection_id, tweet_id))
+        """)
+        st._conn.execute("INSERT INTO word_daily_seen VALUES (?, '1', '2024-01-01')", (coll,))
+    st.close()
+
+    st = TweetStore(path)
+    try:
+        assert st.word_frequencies("k") == {}
+        assert st._conn.execute("SELECT COUNT(*) FROM word_daily_seen").fetchone()[0] == 0
+        assert st.add_word_counts("k", [("1", CLEAN["1"])]) == 1
+        assert st.word_frequencies("k") == {"inflacja": 1, "rośnie": 1}
+    finally:
+        st.close()
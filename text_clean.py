@@ -0,0 +1,24 @@
+import re
+
+# ===== Stopwords (PL) =====
+try:
+    import stopwordsiso as _siso
+    STOPWORDS_PL = set(_siso.stopwords("pl") or [])
+    print("✅ Załadowano stopwords z pakietu stopwordsiso (pełna lista).")
+except Exception:
+    STOPWORDS_PL = {
+        "i","w","się","na","z","do","że","to","jest","jak","o","od","dla","nie","a","tak","ale",
+        "czy","po","przez","jego","jej","ich","mnie","mi","ty","on","ona","ono","my","wy","bez",
+        "ten","ta","to","te","tych","tego","tej","jestem","być","byl",
+    }
+    print("⚠️ Nie znaleziono 'stopwordsiso'. Używam ograniczonego fallbacku.")
+
+def remove_stopwords(text: str, stopwords: set) -> str:
+    return " ".join(token for token in text.split() if token not in stopwords)
+
+def clean_tweet(text: str) -> str:
+    text = re.sub(r'http\S+', '', text)
+    text = re.sub(r'@\w+', '', text)
+    text = re.sub(r'[^A-Za-z0-9ąćęłńóśźżĄĆĘŁŃÓŚŹŻ ]', ' ', text)
+    text = re.sub(r'\s{2,}', ' ', text)
+    return text.strip().lower()
@@ -1,693 +1,1050 @@
-import os
-import re
-import time
-import urllib.parse
-import requests
-import platform as _platform
-from zipfile import ZipFile
-from datetime import datetime, timedelta
-from dateutil.relativedelta import relativedelta
-from pathlib import Path
-
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
-from selenium.webdriver.common.keys import Keys
-
-import pandas as pd
-from tqdm.auto import tqdm
-
-import config as cfg
-from store import TweetStore, HybridDeduper
-import checkpoints as ckp
-
-# ====== driver handle + fabryka (do autorestartu) ======
-driver = None
-_driver_factory = None
-
-def set_driver(drv):  # main.py wywoła
-    global driver
-    driver = drv
-
-def register_driver_factory(factory):  # main.py wywoła
-    global _driver_factory
-    _driver_factory = factory
-
-
-# ====== cleaning helpers ======
-def _clean_tweet(text: str) -> str:
-    text = re.sub(r'http\S+', '', text)
-    text = re.sub(r'@\w+', '', text)
-    text = re.sub(r'[^A-Za-z0-9ąćęłńóśźżĄĆĘŁŃÓŚŹŻ ]', ' ', text)
-    text = re.sub(r'\s{2,}', ' ', text)
-    return text.strip().lower()
-
-def _text_fallback_id_from_clean(text):
-    import hashlib
-    h = hashlib.sha1()
-    h.update(_clean_tweet(text).encode('utf-8'))
-    return "txt_" + h.hexdigest()
-
-
-# =========================
-# Chrome for Testing helpery + progres
-# =========================
-PLATFORM_MAP = {
-    'Windows': {
-        'arch_map': {'AMD64': 'win64', 'x86_64': 'win64', 'x86': 'win32', '': 'win64'},
-        'exe_names': ['chrome.exe', 'chrome', 'Chromium.app'],
-        'driver_names': ['chromedriver.exe', 'chromedriver']
-    },
-    'Linux': {
-        'arch_map': {'x86_64': 'linux64', 'aarch64': 'linux-arm64', 'arm64': 'linux-arm64'},
-        'exe_names': ['chrome', 'chromium', 'chromium-browser'],
-        'driver_names': ['chromedriver']
-    },
-    'Darwin': {
-        'arch_map': {'x86_64': 'mac-x64', 'arm64': 'mac-arm64'},
-        'exe_names': ['Chromium.app', 'chrome', 'Chromium'],
-        'driver_names': ['chromedriver']
-    }
-}
-
-def _detect_platform():
-    sys_pl = _platform.system()
-    arch = _platform.machine()
-    if sys_pl not in PLATFORM_MAP:
-        raise RuntimeError(f"Nieobsługiwana platforma: {sys_pl}")
-    arch_map = PLATFORM_MAP[sys_pl]['arch_map']
-    plat_key = arch_map.get(arch, None) or list(arch_map.values())[0]
-    return sys_pl, arch, plat_key
-
-def _fetch_cft_manifest():
-    print("🔎 Pobieram manifest chrome-for-testing ...")
-    r = requests.get(cfg.CFT_JSON, timeout=30); r.raise_for_status()
-    return r.json()
-
-def _find_downloads_for_channel(data, channel_name, desired_platform):
-    res = {'version': None, 'chrome_url': None, 'chromedriver_url': None}
-    if 'channels' in data and channel_name in data['channels']:
-        ch = data['channels'][channel_name]
-        res['version'] = ch.get('version') or ch.get('last_known_good_version')
-        downloads = ch.get('downloads', {})
-        for kind in ('chrome', 'chromedriver'):
-            items = downloads.get(kind, []) or []
-            for it in items:
-                if it.get('platform') == desired_platform:
-                    if kind == 'chrome': res['chrome_url'] = it.get('url')
-                    else: res['chromedriver_url'] = it.get('url')
-    if not res['chrome_url'] or not res['chromedriver_url']:
-        def walk(obj):
-            if isinstance(obj, dict):
-                if 'url' in obj and isinstance(obj.get('url'), str): yield obj
-                for v in obj.values(): yield from walk(v)
-            elif isinstance(obj, list):
-                for el in obj: yield from walk(el)
-        for entry in walk(data):
-            u = entry.get('url'); plat = entry.get('platform') or entry.get('os') or ''
-            if not u: continue
-            if desired_platform in plat or f"-{desired_platform}" in u or f"/{desired_platform}/" in u:
-                if 'chrome' in u and not res['chrome_url']: res['chrome_url'] = u
-                if 'chromedriver' in u and not res['chromedriver_url']: res['chromedriver_url'] = u
-    return res
-
-def _download_with_progress(url: str, dest_zip: Path):
-    dest_zip.parent.mkdir(parents=True, exist_ok=True)
-    with requests.get(url, stream=True, timeout=60) as r:
-        r.raise_for_status()
-        total = int(r.headers.get('content-length', 0))
-        desc = f"Downloading {Path(url).name}"
-        with open(dest_zip, 'wb') as f, tqdm(total=total, unit='B', unit_scale=True, unit_divisor=1024, desc=desc) as pbar:
-            for chunk in r.iter_content(chunk_size=1024 * 256):
-                if chunk:
-                    f.write(chunk)
-                    pbar.update(len(chunk))
-
-def _extract_with_progress(zip_path: Path, target_dir: Path):
-    target_dir.mkdir(parents=True, exist_ok=True)
-    with ZipFile(zip_path) as z:
-        infos = z.infolist()
-        with tqdm(total=len(infos), desc=f"Extracting to {target_dir}", unit="file") as pbar:
-            for info in infos:
-                z.extract(info, target_dir)
-                pbar.update(1)
-
-def _download_and_extract(url, target_dir: Path):
-    temp_zip = target_dir / "_temp_download.zip"
-    _download_with_progress(url, temp_zip)
-    _extract_with_progress(temp_zip, target_dir)
-    try: temp_zip.unlink()
-    except Exception: pass
-
-def _find_file_recursive(base_dir: Path, names):
-    for root, dirs, files in os.walk(base_dir):
-        for n in names:
-            if n in files:
-                return Path(root) / n
-        for d in dirs:
-            if d in names:
-                return Path(root) / d
-    return None
-
-def _find_executable_in_dir(base: Path, names):
-    if base is None: return None
-    base = Path(base)
-    if base.exists() and base.is_file(): return base
-    if base.exists() and base.is_dir():
-        for root, dirs, files in os.walk(base):
-            rootp = Path(root)
-            for n in names:
-                if n in files: return rootp / n
-            for f in files:
-                fn = f.lower()
-                if fn.startswith("chromedriver"): return rootp / f
-                if fn.startswith("chrome") and (fn.endswith(".exe") or not fn.endswith(".dll")): return rootp / f
-    return None
-
-def ensure_chrome_and_driver(chrome_path_hint=None, driver_path_hint=None):
-    chrome_path = None; driver_path = None
-    if chrome_path_hint:
-        p = Path(chrome_path_hint)
-        if p.exists():
-            chrome_path = _find_executable_in_dir(p, PLATFORM_MAP.get(_platform.system(), {}).get('exe_names', ['chrome.exe']))
-            if chrome_path: print(f"Używam CHROME_BINARY (resolved): {chrome_path}")
-    if driver_path_hint:
-        p = Path(driver_path_hint)
-        if p.exists():
-            driver_path = _find_executable_in_dir(p, PLATFORM_MAP.get(_platform.system(), {}).get('driver_names', ['chromedriver.exe']))
-            if driver_path: print(f"Używam CHROMEDRIVER (resolved): {driver_path}")
-    if chrome_path and driver_path:
-        return str(chrome_path), str(driver_path)
-
-    candidate_root = Path(cfg.CFT_OUTDIR)
-    if candidate_root.exists():
-        sys_pl, arch, desired_platform = _detect_platform()
-        exe_names = PLATFORM_MAP[sys_pl]['exe_names']; driver_names = PLATFORM_MAP[sys_pl]['driver_names']
-        found_chrome = _find_file_recursive(candidate_root, exe_names)
-        found_driver = _find_file_recursive(candidate_root, driver_names)
-        if found_chrome:
-            resolved = _find_executable_in_dir(found_chrome, exe_names)
-            if resolved: chrome_path = resolved; print(f"Znaleziono chrome (resolved): {chrome_path}")
-        if found_driver:
-            resolved_drv = _find_executable_in_dir(found_driver, driver_names)
-            if resolved_drv: driver_path = resolved_drv; print(f"Znaleziono chromedriver (resolved): {driver_path}")
-        if chrome_path and driver_path:
-            return str(chrome_path), str(driver_path)
-
-    sys_pl, arch, desired_platform = _detect_platform()
-    manifest = _fetch_cft_manifest()
-    info = _find_downloads_for_channel(manifest, cfg.CFT_CHANNEL, desired_platform)
-    version = info.get('version') or 'unknown'
-    target_base = Path(cfg.CFT_OUTDIR) / f"{cfg.CFT_CHANNEL}_{version}"
-    target_base.mkdir(parents=True, exist_ok=True)
-
-    if info.get('chrome_url'):
-        chrome_dir = target_base / "chrome"
-        _download_and_extract(info['chrome_url'], chrome_dir)
-    else:
-        print("⚠️ Nie znaleziono linku do pliku 'chrome'.")
-    if info.get('chromedriver_url'):
-        driver_dir = target_base / "chromedriver"
-        _download_and_extract(info['chromedriver_url'], driver_dir)
-    else:
-        print("⚠️ Nie znaleziono linku do 'chromedriver'.")
-
-    sys_pl, arch, desired_platform = _detect_platform()
-    exe_names = PLATFORM_MAP[sys_pl]['exe_names']; driver_names = PLATFORM_MAP[sys_pl]['driver_names']
-    found_chrome = _find_file_recursive(target_base, exe_names)
-    found_driver = _find_file_recursive(target_base, driver_names)
-    if found_chrome:
-        resolved_chrome = _find_executable_in_dir(found_chrome, exe_names)
-        if resolved_chrome:
-            chrome_path = resolved_chrome; print(f"✅ Chrome znaleziono: {chrome_path}")
-    else:
-        print("❌ Nie znalazłem pliku wykonywalnego Chrome.")
-    if found_driver:
-        resolved_driver = _find_executable_in_dir(found_driver, driver_names)
-        if resolved_driver:
-            driver_path = resolved_driver; print(f"✅ Chromedriver znaleziono: {driver_path}")
-    else:
-        print("❌ Nie znalazłem chromedrivera.")
-
-    if not chrome_path or not driver_path:
-        raise RuntimeError("Brakuje 'chrome' lub 'chromedriver' po instalacji.")
-    return str(chrome_path), str(driver_path)
-
-
-# =========================
-# overlay / rate-limit / no-results
-# =========================
-def _find_retry_button():
-    X = (
-        "//button[.//span[normalize-space()='Retry']] | "
-        "//div[@role='button'][.//span[normalize-space()='Retry']] | "
-        "//button[.//span[normalize-space()='Reload']] | "
-        "//div[@role='button'][.//span[normalize-space()='Reload']]"
-    )
-    try:
-        btns = driver.find_elements(By.XPATH, X)
-        return btns[0] if btns else None
-    except Exception:
-        return None
-
-def _has_error_overlay():
-    X = (
-        "//span[contains(., 'Something went wrong')] | "
-        "//div[contains(., 'Something went wrong')] | "
-        "//span[contains(., 'Try reloading')] | "
-        "//span[contains(., 'Too many requests')] | "
-        "//span[contains(., 'Rate limit')] | "
-        "//span[contains(., 'Coś poszło nie tak')]"
-    )
-    try:
-        return len(driver.find_elements(By.XPATH, X)) > 0
-    except Exception:
-        return False
-
-def _has_no_results():
-    X = (
-        "//span[contains(., 'No results')] | "
-        "//div[contains(., 'No results')] | "
-        "//span[contains(., 'Brak wyników')] | "
-        "//div[contains(., 'Brak wyników')]"
-    )
-    try:
-        return len(driver.find_elements(By.XPATH, X)) > 0
-    except Exception:
-        return False
-
-def _robust_click(el):
-    try:
-        el.click(); return True
-    except Exception:
-        pass
-    try:
-        driver.execute_script("arguments[0].click();", el); return True
-    except Exception:
-        pass
-    try:
-        el.send_keys(Keys.ENTER); return True
-    except Exception:
-        return False
-
-def _cooldown_with_progress(total_seconds: int, desc: str = "Cooldown (rate limit)"):
-    secs = int(max(0, total_seconds))
-    if secs <= 0:
-        return
-    try:
-        with tqdm(total=secs, desc=desc, unit="s") as pbar:
-            for _ in range(secs):
-                time.sleep(1)
-                pbar.update(1)
-    except KeyboardInterrupt:
-        print("⏭️ Przerwano cooldown — próbuję od razu.")
-    except Exception:
-        time.sleep(secs)
-
-def wait_and_handle_errors(quick_tries=3, quick_interval=3, cooldown_sec=cfg.RATE_LIMIT_COOLDOWN):
-    """
-    Zwraca: 'ok' | 'no_results' | 'blocked_recovered' | 'blocked_still'
-    """
-    try:
-        if driver.find_elements(By.XPATH, "//div[@data-testid='tweetText']"):
-            return 'ok'
-    except Exception:
-        pass
-
-    if _has_no_results():
-        return 'no_results'
-
-    if _has_error_overlay():
-        for _ in range(quick_tries):
-            btn = _find_retry_button()
-            if btn: _robust_click(btn)
-            else:
-                try: driver.refresh()
-                except Exception: pass
-            time.sleep(quick_interval)
-            try:
-                if driver.find_elements(By.XPATH, "//div[@data-testid='tweetText']"):
-                    return 'ok'
-            except Exception:
-                pass
-            if _has_no_results():
-                return 'no_results'
-            if not _has_error_overlay():
-                return 'ok'
-
-        print(f"⏳ Podejrzenie blokady/rate-limit — czekam {cooldown_sec//60} min...")
-        _cooldown_with_progress(int(cooldown_sec), desc="Cooldown (rate limit)")
-
-        btn = _find_retry_button()
-        if btn: _robust_click(btn)
-        else:
-            try: driver.refresh()
-            except Exception: pass
-        time.sleep(5)
-
-        try:
-            if driver.find_elements(By.XPATH, "//div[@data-testid='tweetText']"):
-                return 'blocked_recovered'
-        except Exception:
-            pass
-        if _has_no_results():
-            return 'no_results'
-        if _has_error_overlay():
-            return 'blocked_still'
-        return 'blocked_recovered'
-
-    return 'ok'
-
-
-# =========================
-# odporny get (retry + ewentualny restart drivera)
-# =========================
-def _robust_get(url: str, attempts: int = 3, wait_after: float = 2.0):
-    global driver, _driver_factory
-    for i in range(1, attempts + 1):
-        try:
-            driver.get(url)
-            time.sleep(wait_after)
-            return True
-        except Exception as e:
-            print(f"⚠️ driver.get timeout/err (próba {i}/{attempts}): {e}")
-            try:
-                driver.execute_script("window.stop();")
-            except Exception:
-                pass
-            if i < attempts and _driver_factory is not None:
-                try:
-                    driver.quit()
-                except Exception:
-                    pass
-                try:
-                    driver = _driver_factory()
-                    set_driver(driver)
-                    print("🔁 Odtworzyłem przeglądarkę i spróbuję ponownie...")
-                except Exception as e2:
-                    print(f"❌ Nie udało się odtworzyć drivera: {e2}")
-            else:
-                return False
-
-
-# =========================
-# tweet id + czas + url
-# =========================
-def _get_tweet_id_and_dt(el):
-    tweet_id = None; dt = None; url = None
-    try:
-        link = el.find_element(By.XPATH, ".//ancestor::article//a[contains(@href,'/status/')]")
-        href = link.get_attribute("href") or ""
-        url = href
-        m = re.search(r'/status/(\d+)', href)
-        tweet_id = m.group(1) if m else None
-    except Exception:
-        url = None
-        tweet_id = None
-    try:
-        time_el = el.find_element(By.XPATH, ".//ancestor::article//time")
-        ts = time_el.get_attribute("datetime")
-        dt = datetime.fromisoformat(ts.replace('Z', '+00:00')) if ts else None
-    except Exception:
-        dt = None
-    return tweet_id, dt, url
-
-
-# =========================
-# właściwe scrapowanie (1 podzakres)
-# =========================
-def fetch_tweets(keyword: str, since_incl: str, until_incl: str, max_tweets: int = 200, deduper=None):
-    if deduper is None:
-        class _Local:
-            def __init__(self): self._s = set()
-            def contains(self, u): return u in self._s
-            def add(self, u): self._s.add(u)
-            def bulk_add(self, seq): self._s.update(seq)
-            def close(self): pass
-        deduper = _Local()
-
-    since_dt = datetime.fromisoformat(since_incl)
-    until_dt = datetime.fromisoformat(until_incl)
-    until_excl = (until_dt + timedelta(days=1)).strftime("%Y-%m-%d")
-    query = f"{keyword} since:{since_dt.strftime('%Y-%m-%d')} until:{until_excl}"
-    url   = "https://mobile.twitter.com/search?q=" + urllib.parse.quote(query) + "&f=live"
-    print(f"\n🔗 Otwieram: {url}")
-
-    ok = _robust_get(url)
-    if not ok:
-        print("❌ Nie udało się wczytać strony po próbach — przerywam ten slice.")
-        return [], [], [], []
-
-    # wstępne ogarnięcie overlay
-    status = wait_and_handle_errors()
-    if status == 'no_results':
-        print("ℹ️ Brak wyników dla tego zakresu.")
-        return [], [], [], []
-
-    texts, dates, ids, urls = [], [], [], []
-    seen_ids = set()
-    last_h = driver.execute_script("return document.body.scrollHeight")
-
-    while len(texts) < max_tweets:
-        st = wait_and_handle_errors()
-        if st in ('no_results', 'blocked_still'):
-            break
-
-        els = driver.find_elements(By.XPATH, '//div[@data-testid="tweetText"]')
-        for el in els:
-            try:
-                raw = el.text.strip()
-            except StaleElementReferenceException:
-                continue
-            if not raw:
-                continue
-
-            tweet_id, dt, href = _get_tweet_id_and_dt(el)
-            uid = tweet_id if tweet_id else _text_fallback_id_from_clean(raw)
-            if uid in seen_ids or deduper.contains(uid):
-                continue
-
-            seen_ids.add(uid); deduper.add(uid)
-            texts.append(raw); dates.append(dt); ids.append(uid); urls.append(href)
-            if len(texts) >= max_tweets:
-                break
-
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
-        new_h = driver.execute_script("return document.body.scrollHeight")
-        if new_h == last_h:
-            st2 = wait_and_handle_errors(quick_tries=2, quick_interval=2)
-            if st2 in ('no_results', 'blocked_still'):
-                break
-            new_h = driver.execute_script("return document.body.scrollHeight")
-            if new_h == last_h:
-                break
-        last_h = new_h
-
-    return texts, dates, ids, urls
-
-
-# =========================
-# scrapowanie w podoknach + zapis do DB + checkpoint RAW + ZWRACANIE LIST
-# =========================
-def fetch_tweets_in_periods(keyword: str, since: str, until: str, max_tweets: int = 200,
-                            collection_name: str = None, resume_raw: bool = False):
-    start_dt = datetime.fromisoformat(since)
-    end_dt   = datetime.fromisoformat(until)
-    total_days = (end_dt.date() - start_dt.date()).days + 1
-
-    # dzielimy na miesiące, a miesiące na <=31 slice’y
-    periods = []
-    cur = start_dt
-    while cur <= end_dt:
-        nxt_month = (cur + relativedelta(months=1)).replace(day=1)
-        last_of = min(nxt_month - timedelta(days=1), end_dt)
-        periods.append((cur, last_of))
-        cur = nxt_month
-
-    days_per = [(p[1].date() - p[0].date()).days + 1 for p in periods]
-    quotas = [max(1, round(max_tweets * d / total_days)) for d in days_per]
-    diff = sum(quotas) - max_tweets
-    idx_ord = sorted(range(len(quotas)), key=lambda i: quotas[i], reverse=(diff>0))
-    for i in range(abs(diff)):
-        j = idx_ord[i % len(quotas)]
-        quotas[j] -= 1 if diff>0 else -1
-        if quotas[j] < 0: quotas[j] = 0
-
-    texts_all, dates_all, ids_all, urls_all = [], [], [], []
-
-    # DB i kolekcja (jeśli jest)
-    store = TweetStore(cfg.DB_PATH)
-    coll_id = None
-    if collection_name:
-        try:
-            if hasattr(store, "get_or_create_collection"):
-                coll_id = store.get_or_create_collection(collection_name)
-            elif hasattr(store, "ensure_collection"):
-                coll_id = store.ensure_collection(collection_name)
-        except Exception as e:
-            print(f"⚠️ Nie mogę utworzyć/odczytać kolekcji: {e}")
-
-    # Resume RAW z checkpointa (jeśli ktoś korzysta)
-    if resume_raw:
-        prev_df = ckp.load_raw_progress_latest(collection_name or keyword, since, until)
-        if prev_df is not None and not prev_df.empty:
-            try:
-                ids_all  = prev_df["id"].tolist()
-                texts_all = prev_df["raw_text"].tolist()
-                dates_all = list(prev_df["date"])
-                urls_all  = prev_df.get("url", pd.Series([None]*len(ids_all))).tolist()
-                print(f"↩️ Resume RAW: przywrócono {len(ids_all)} rekordów z checkpointu.")
-                # spróbuj dograć do DB
-                if coll_id is not None and ids_all:
-                    rows = []
-                    for _id, _t, _dt, _u in zip(ids_all, texts_all, dates_all, urls_all):
-                        dt_iso = _dt.isoformat() if isinstance(_dt, datetime) else (None if pd.isna(_dt) else str(_dt))
-                        rows.append((_id, _t, dt_iso, _u))
-                    _db_write_bulk(store, rows, coll_id)
-            except Exception as e:
-                print(f"⚠️ Resume RAW nie powiódł się: {e}")
-
-    # Deduper (Bloom opcjonalnie)
-    deduper = None
-    if cfg.USE_BLOOM:
-        deduper = HybridDeduper(sqlite_path=cfg.DB_PATH.replace(".sqlite","_ids.sqlite"),
-                                expected_n=max(1000, max_tweets*2), fp_rate=1e-5,
-                                load_bloom=cfg.BLOOM_SERIAL)
-        if ids_all:
-            try: deduper.bulk_add(ids_all)
-            except Exception: pass
-    else:
-        class _Local:
-            def __init__(self): self._s=set()
-            def contains(self,u): return u in self._s
-            def add(self,u): self._s.add(u)
-            def bulk_add(self,seq): self._s.update(seq)
-            def close(self): pass
-        deduper = _Local()
-        if ids_all: deduper.bulk_add(ids_all)
-
-    last_raw_save_ts = time.time()
-    pbar = tqdm(total=max_tweets, initial=len(texts_all),
-                desc=f"Scraping '{keyword}' [{since}..{until}]", unit="tw")
-
-    try:
-        if len(texts_all) < max_tweets:
-            for (period, quota) in zip(periods, quotas):
-                if len(texts_all) >= max_tweets: break
-
-                p_start = period[0].date()
-                p_end   = period[1].date()
-                days = (p_end - p_start).days + 1
-
-                slices = min(days, max(1, min(quota, 31)))
-                base, rem = days // slices, days % slices
-                slice_lengths = [base + (1 if i < rem else 0) for i in range(slices)]
-                slice_quotas  = [max(1, round(quota * sl / days)) for sl in slice_lengths]
-                sd = sum(slice_quotas) - quota
-                idx_ord_s = sorted(range(len(slice_quotas)), key=lambda i: slice_quotas[i], reverse=(sd>0))
-                for i in range(abs(sd)):
-                    j = idx_ord_s[i % len(slice_quotas)]
-                    slice_quotas[j] -= 1 if sd>0 else -1
-                    if slice_quotas[j] < 0: slice_quotas[j] = 0
-
-                cur_day = p_start
-                for sl_len, sl_q in zip(slice_lengths, slice_quotas):
-                    if len(texts_all) >= max_tweets: break
-                    if sl_q <= 0:
-                        cur_day = cur_day + timedelta(days=sl_len); continue
-
-                    slice_since = cur_day.isoformat()
-                    slice_until = (cur_day + timedelta(days=sl_len-1)).isoformat()
-                    remaining   = max_tweets - len(texts_all)
-                    need_here   = min(sl_q, remaining)
-                    if need_here <= 0:
-                        cur_day = cur_day + timedelta(days=sl_len); continue
-
-                    attempts = 0
-                    while need_here > 0 and attempts < 3 and len(texts_all) < max_tweets:
-                        want = min(need_here, max_tweets - len(texts_all))
-                        print(f"Pobieram {keyword} {slice_since}..{slice_until} (chcę {want}; próba {attempts+1}/3)")
-                        txts, dts, ids, urls = fetch_tweets(keyword, slice_since, slice_until, want, deduper=deduper)
-
-                        # akumulacja
-                        texts_all.extend(txts); dates_all.extend(dts); ids_all.extend(ids); urls_all.extend(urls)
-                        added = len(txts)
-                        if added > 0:
-                            pbar.update(added)
-                            pbar.set_postfix_str(f"{len(texts_all)}/{max_tweets}")
-
-                            # zapis do DB
-                            if collection_name and ids:
-                                rows = []
-                                for _id, _t, _dt, _u in zip(ids, txts, dts, urls):
-                                    dt_iso = _dt.isoformat() if isinstance(_dt, datetime) else None
-                                    rows.append((_id, _t, dt_iso, _u))
-                                _db_write_bulk(store, rows, coll_id)
-
-                        # checkpoint RAW (tylko gdy wznawiamy)
-                        if resume_raw and added > 0:
-                            now = time.time()
-                            if (now - last_raw_save_ts) >= cfg.RAW_PROGRESS_EVERY_SEC or added >= cfg.RAW_PROGRESS_EVERY_N_TWEETS:
-                                df = pd.DataFrame({"id": ids_all, "raw_text": texts_all, "date": dates_all, "url": urls_all})
-                                ckp.save_raw_progress(collection_name or keyword, since, until, df)
-                                last_raw_save_ts = now
-
-                        need_here -= added
-                        print(f"   → Dodano {added}. Pozostało do zebrania w tym slice: {need_here}")
-
-                        attempts += 1
-                        if need_here > 0 and attempts < 3:
-                            state = wait_and_handle_errors(quick_tries=2, quick_interval=2)
-                            if state in ('no_results', 'blocked_still'): break
-                            time.sleep([2,5,10][min(attempts-1, 2)])
-
-                    cur_day = cur_day + timedelta(days=sl_len)
-
-        print(f"✅ Zebrano łącznie {len(texts_all)}/{max_tweets} tweetów (w tej operacji).")
-    finally:
-        pbar.close()
-        try:
-            if cfg.USE_BLOOM and hasattr(deduper, "close"):
-                try:
-                    deduper.save_bloom(cfg.BLOOM_SERIAL)
-                except Exception:
-                    pass
-                deduper.close()
-        except Exception:
-            pass
-        store.close()
-
-    # ZWRACAMY LISTY dla analyzer.py
-    return texts_all[:max_tweets], dates_all[:max_tweets], ids_all[:max_tweets], urls_all[:max_tweets]
-
-
-def _db_write_bulk(store: TweetStore, rows, coll_id):
-    try:
-        if hasattr(store, "upsert_many") and hasattr(store, "link_many"):
-            store.upsert_many(rows)
-            if coll_id is not None:
-                ids = [r[0] for r in rows]
-                store.link_many(ids, coll_id)
-        elif hasattr(store, "upsert_tweets_bulk"):
-            ids = [r[0] for r in rows]
-            texts = [r[1] for r in rows]
-            dts = [r[2] for r in rows]
-            urls = [r[3] for r in rows]
-            store.upsert_tweets_bulk(coll_id, ids, texts, dts, urls)
-        elif hasattr(store, "insert_tweets_bulk"):
-            ids = [r[0] for r in rows]
-            texts = [r[1] for r in rows]
-            dts = [r[2] for r in rows]
-            urls = [r[3] for r in rows]
-            store.insert_tweets_bulk(coll_id, ids, texts, dts, urls)
-        else:
-            # fallback: pojedynczo
-            for _id, _t, _dt, _u in rows:
-                if hasattr(store, "upsert_tweet"):
-                    store.upsert_tweet(coll_id, _id, _t, _dt, _u)
-                elif hasattr(store, "insert_tweet"):
-                    store.insert_tweet(coll_id, _id, _t, _dt, _u)
-    except Exception as e:
+import os
+import re
+import json
+import time
+import hashlib
+import tempfile
+import urllib.parse
+import requests
+import platform as _platform
+from zipfile import ZipFile
+from datetime import datetime, timedelta, timezone
+from dateutil.relativedelta import relativedelta
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import StaleElementReferenceException, WebDriverException
+from selenium.webdriver.common.keys import Keys
+
+from tqdm.auto import tqdm
+
+import config as cfg
+import metrics
+from store import TweetStore, HybridDeduper
+
+# ====== driver handle + fabryka (do autorestartu) ======
+driver = None
+_driver_factory = None
+
+def set_driver(drv):  # main.py wywoła
+    global driver
+    driver = drv
+
+def register_driver_factory(factory):  # main.py wywoła
+    global _driver_factory
+    _driver_factory = factory
+
+
+# ====== cleaning helpers ======
+from text_clean import clean_tweet as _clean_tweet
+
+def _text_fallback_id_from_clean(text):
+    import hashlib
+    h = hashlib.sha1()
+    h.update(_clean_tweet(text).encode('utf-8'))
+    return "txt_" + h.hexdigest()
+
+
+# =========================
+# Chrome for Testing helpery + progres
+# =========================
+PLATFORM_MAP = {
+    'Windows': {
+        'arch_map': {'AMD64': 'win64', 'x86_64': 'win64', 'x86': 'win32', '': 'win64'},
+        'exe_names': ['chrome.exe', 'chrome', 'Chromium.app'],
+        'driver_names': ['chromedriver.exe', 'chromedriver']
+    },
+    'Linux': {
+        'arch_map': {'x86_64': 'linux64', 'aarch64': 'linux-arm64', 'arm64': 'linux-arm64'},
+        'exe_names': ['chrome', 'chromium', 'chromium-browser'],
+        'driver_names': ['chromedriver']
+    },
+    'Darwin': {
+        'arch_map': {'x86_64': 'mac-x64', 'arm64': 'mac-arm64'},
+        'exe_names': ['Chromium.app', 'chrome', 'Chromium'],
+        'driver_names': ['chromedriver']
+    }
+}
+
+def _detect_platform():
+    sys_pl = _platform.system()
+    arch = _platform.machine()
+    if sys_pl not in PLATFORM_MAP:
+        raise RuntimeError(f"Nieobsługiwana platforma: {sys_pl}")
+    arch_map = PLATFORM_MAP[sys_pl]['arch_map']
+    plat_key = arch_map.get(arch, None) or list(arch_map.values())[0]
+    return sys_pl, arch, plat_key
+
+def _fetch_cft_manifest(max_age: float = None):
+    """
+    Manifest CfT z cache (browser/cft_manifest.json) jeśli młodszy niż CFT_MANIFEST_TTL_SEC;
+    bez sieci używamy przeterminowanej kopii zamiast się wywracać.
+    """
+    max_age = cfg.CFT_MANIFEST_TTL_SEC if max_age is None else max_age
+    cache = Path(cfg.CFT_MANIFEST_CACHE)
+    cached = None
+    try:
+        st = cache.stat()
+        cached = json.loads(cache.read_text(encoding="utf-8"))
+        if time.time() - st.st_mtime < max_age:
+            return cached
+    except (OSError, ValueError):
+        cached = None
+    print("🔎 Pobieram manifest chrome-for-testing ...")
+    try:
+        r = requests.get(cfg.CFT_JSON, timeout=30); r.raise_for_status()
+        data = r.json()
+    except Exception as e:
+        if cached is not None:
+            print(f"⚠️ Manifest niedostępny ({e}) — używam kopii z {cache}")
+            return cached
+        raise
+    try:
+        cache.write_text(json.dumps(data), encoding="utf-8")
+    except Exception as e:
+        print(f"⚠️ Nie udało się zapisać cache manifestu: {e}")
+    return data
+
+def _find_downloads_for_channel(data, channel_name, desired_platform):
+    res = {'version': None, 'chrome_url': None, 'chromedriver_url': None}
+    if 'channels' in data and channel_name in data['channels']:
+        ch = data['channels'][channel_name]
+        res['version'] = ch.get('version') or ch.get('last_known_good_version')
+        downloads = ch.get('downloads', {})
+        for kind in ('chrome', 'chromedriver'):
+            items = downloads.get(kind, []) or []
+            for it in items:
+                if it.get('platform') == desired_platform:
+                    if kind == 'chrome': res['chrome_url'] = it.get('url')
+                    else: res['chromedriver_url'] = it.get('url')
+    if not res['chrome_url'] or not res['chromedriver_url']:
+        def walk(obj):
+            if isinstance(obj, dict):
+                if 'url' in obj and isinstance(obj.get('url'), str): yield obj
+                for v in obj.values(): yield from walk(v)
+            elif isinstance(obj, list):
+                for el in obj: yield from walk(el)
+        for entry in walk(data):
+            u = entry.get('url'); plat = entry.get('platform') or entry.get('os') or ''
+            if not u: continue
+            if desired_platform in plat or f"-{desired_platform}" in u or f"/{desired_platform}/" in u:
+                if 'chrome' in u and not res['chrome_url']: res['chrome_url'] = u
+                if 'chromedriver' in u and not res['chromedriver_url']: res['chromedriver_url'] = u
+    return res
+
+def _pinned_downloads(version: str, desired_platform: str):
+    """URL-e archiwów przypiętej wersji (cfg.CFT_VERSION) — bez manifestu, układ jak w repozytorium CfT."""
+    base = f"{cfg.CFT_DOWNLOAD_BASE}/{version}/{desired_platform}"
+    return {'version': version,
+            'chrome_url': f"{base}/chrome-{desired_platform}.zip",
+            'chromedriver_url': f"{base}/chromedriver-{desired_platform}.zip"}
+
+def _known_checksums() -> dict:
+    """{URL: sha256}: zapamiętane przy wcześniejszych pobraniach, nadpisane przez cfg.CFT_SHA256."""
+    try:
+        known = json.loads(Path(cfg.CFT_CHECKSUMS).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        known = {}
+    known.update(cfg.CFT_SHA256 or {})
+    return known
+
+def _remember_checksum(url: str, digest: str):
+    path = Path(cfg.CFT_CHECKSUMS)
+    try:
+        try:
+            known = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            known = {}
+        known[url] = digest
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(known, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"⚠️ Nie udało się zapisać {path.name}: {e}")
+
+def _download_with_progress(url: str, fobj) -> str:
+    """Strumieniuje url do fobj; sprawdza długość z content-length i zwraca sha256 pobranych bajtów."""
+    sha = hashlib.sha256()
+    size = 0
+    with requests.get(url, stream=True, timeout=60) as r:
+        r.raise_for_status()
+        total = int(r.headers.get('content-length', 0))
+        desc = f"Downloading {Path(url).name}"
+        with tqdm(total=total, unit='B', unit_scale=True, unit_divisor=1024, desc=desc) as pbar:
+            for chunk in r.iter_content(chunk_size=1024 * 256):
+                if chunk:
+                    fobj.write(chunk)
+                    sha.update(chunk)
+                    size += len(chunk)
+                    pbar.update(len(chunk))
+    if total and size != total:
+        raise RuntimeError(f"Niepełne pobranie {Path(url).name}: {size}/{total} B")
+    return sha.hexdigest()
+
+def _extract_with_progress(z: ZipFile, target_dir: Path):
+    target_dir.mkdir(parents=True, exist_ok=True)
+    infos = z.infolist()
+    with tqdm(total=len(infos), desc=f"Extracting to {target_dir}", unit="file") as pbar:
+        for info in infos:
+            out = z.extract(info, target_dir)
+            mode = (info.external_attr >> 16) & 0o777
+            if mode and not info.is_dir():
+                os.chmod(out, mode)  # ZipFile gubi bity wykonywalności (chrome, chromedriver)
+            pbar.update(1)
+
+def _download_and_extract(url, target_dir: Path, names=None):
+    """
+    Pobiera archiwum do pliku tymczasowego (poza drzewem instalacji), porównuje sha256 ze znaną sumą
+    (cfg.CFT_SHA256 albo zapamiętaną przy pierwszym pobraniu tego URL) — przy niezgodności nic nie
+    jest rozpakowywane — sprawdza CRC (testzip) i rozpakowuje prosto do target_dir.
+    Zwraca (sha256, ścieżka pliku z names wg listy archiwum).
+    """
+    name = Path(urllib.parse.urlsplit(url).path).name
+    expected = _known_checksums().get(url)
+    if expected is None and cfg.CFT_REQUIRE_CHECKSUM:
+        raise RuntimeError(f"Brak znanej sumy sha256 dla {name} (CFT_REQUIRE_CHECKSUM) — dopisz ją do CFT_SHA256.")
+    target_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryFile(dir=target_dir.parent) as tmp:
+        digest = _download_with_progress(url, tmp)
+        if expected is None:
+            print(f"⚠️ Brak znanej sumy dla {name} — zapamiętuję sha256 {digest[:16]}… do kolejnych pobrań.")
+        elif digest != expected.lower():
+            raise RuntimeError(f"Suma sha256 {name} się nie zgadza ({digest} ≠ {expected}) — nie rozpakowuję.")
+        tmp.seek(0)
+        with ZipFile(tmp) as z:
+            bad = z.testzip()
+            if bad:
+                raise RuntimeError(f"Uszkodzone archiwum {Path(url).name}: {bad}")
+            _extract_with_progress(z, target_dir)
+            member = None
+            for n in (names or []):
+                hits = sorted((i.filename for i in z.infolist()
+                               if not i.is_dir() and Path(i.filename).name == n), key=len)
+                if hits:
+                    member = target_dir / hits[0]
+                    break
+    if expected is None:
+        _remember_checksum(url, digest)
+    return digest, member
+
+def _find_file_recursive(base_dir: Path, names):
+    for root, dirs, files in os.walk(base_dir):
+        for n in names:
+            if n in files:
+                return Path(root) / n
+        for d in dirs:
+            if d in names:
+                return Path(root) / d
+    return None
+
+def _find_executable_in_dir(base: Path, names):
+    if base is None: return None
+    base = Path(base)
+    if base.exists() and base.is_file(): return base
+    if base.exists() and base.is_dir():
+        for root, dirs, files in os.walk(base):
+            rootp = Path(root)
+            for n in names:
+                if n in files: return rootp / n
+            for f in files:
+                fn = f.lower()
+                if fn.startswith("chromedriver"): return rootp / f
+                if fn.startswith("chrome") and (fn.endswith(".exe") or not fn.endswith(".dll")): return rootp / f
+    return None
+
+def _load_resolved(desired_platform: str):
+    """
+    (chrome, driver, version) z browser/resolved.json — tylko stat() zamiast przeszukiwania drzewa.
+    Rekord innej platformy, kanału albo przypiętej wersji (cfg.CFT_VERSION) to brak trafienia.
+    """
+    try:
+        rec = json.loads(Path(cfg.CFT_RESOLVED).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if (rec.get("platform") != desired_platform or rec.get("channel") != cfg.CFT_CHANNEL
+            or rec.get("pinned") != cfg.CFT_VERSION):
+        return None
+    try:
+        for key in ("chrome", "chromedriver"):
+            st = os.stat(rec[key])
+            if not (st.st_size and os.access(rec[key], os.X_OK)):
+                return None
+    except (OSError, KeyError, TypeError):
+        return None
+    return rec["chrome"], rec["chromedriver"], rec.get("version")
+
+def _save_resolved(version, desired_platform, chrome_path, driver_path, **extra):
+    rec = {"version": version, "platform": desired_platform, "channel": cfg.CFT_CHANNEL,
+           "pinned": cfg.CFT_VERSION, "chrome": str(chrome_path), "chromedriver": str(driver_path),
+           "resolved_at": datetime.now().isoformat(timespec="seconds"), **extra}
+    path = Path(cfg.CFT_RESOLVED)
+    try:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(rec, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    except Exception as e:
+        print(f"⚠️ Nie udało się zapisać {path.name}: {e}")
+
+@metrics.timed("browser.ensure_chrome_and_driver")
+def ensure_chrome_and_driver(chrome_path_hint=None, driver_path_hint=None):
+    chrome_path = None; driver_path = None
+    sys_pl, arch, desired_platform = _detect_platform()
+    exe_names = PLATFORM_MAP[sys_pl]['exe_names']; driver_names = PLATFORM_MAP[sys_pl]['driver_names']
+
+    # jawne ścieżki z config/CLI — plik sprawdzamy stat(), katalog przeszukujemy jak dotąd
+    if chrome_path_hint:
+        p = Path(chrome_path_hint)
+        if p.exists():
+            chrome_path = _find_executable_in_dir(p, exe_names)
+            if chrome_path: print(f"Używam CHROME_BINARY (resolved): {chrome_path}")
+    if driver_path_hint:
+        p = Path(driver_path_hint)
+        if p.exists():
+            driver_path = _find_executable_in_dir(p, driver_names)
+            if driver_path: print(f"Używam CHROMEDRIVER (resolved): {driver_path}")
+    if chrome_path and driver_path:
+        return str(chrome_path), str(driver_path)
+
+    # ciepły start: zapisany wynik poprzedniej instalacji
+    rec = _load_resolved(desired_platform)
+    if rec:
+        print(f"✅ Chrome {rec[2] or ''} z {Path(cfg.CFT_RESOLVED).name}: {rec[0]}")
+        return rec[0], rec[1]
+
+    # brak rekordu (np. instalacja sprzed tej wersji) — jednorazowe przeszukanie katalogów
+    # instalacji bieżącego kanału (<kanał>_<wersja>, najnowsze najpierw) albo przypiętej wersji
+    candidate_root = Path(cfg.CFT_OUTDIR)
+    pattern = f"{cfg.CFT_CHANNEL}_{cfg.CFT_VERSION}" if cfg.CFT_VERSION else f"{cfg.CFT_CHANNEL}_*"
+    candidates = sorted((d for d in candidate_root.glob(pattern) if d.is_dir()),
+                        key=lambda d: d.stat().st_mtime, reverse=True) if candidate_root.exists() else []
+    for base in candidates:
+        found_chrome = _find_file_recursive(base, exe_names)
+        found_driver = _find_file_recursive(base, driver_names)
+        chrome_path = _find_executable_in_dir(found_chrome, exe_names) if found_chrome else None
+        driver_path = _find_executable_in_dir(found_driver, driver_names) if found_driver else None
+        if chrome_path and driver_path:
+            print(f"Znaleziono chrome (resolved): {chrome_path}")
+            print(f"Znaleziono chromedriver (resolved): {driver_path}")
+            _save_resolved(base.name.split("_", 1)[1], desired_platform, chrome_path, driver_path)
+            return str(chrome_path), str(driver_path)
+    chrome_path = driver_path = None
+
+    if cfg.CFT_VERSION:
+        info = _pinned_downloads(cfg.CFT_VERSION, desired_platform)
+    else:
+        manifest = _fetch_cft_manifest()
+        info = _find_downloads_for_channel(manifest, cfg.CFT_CHANNEL, desired_platform)
+    version = info.get('version') or 'unknown'
+    target_base = Path(cfg.CFT_OUTDIR) / f"{cfg.CFT_CHANNEL}_{version}"
+    target_base.mkdir(parents=True, exist_ok=True)
+    sums = {}
+
+    if info.get('chrome_url'):
+        sums['chrome_sha256'], chrome_path = _download_and_extract(info['chrome_url'], target_base / "chrome", exe_names)
+    else:
+        print("⚠️ Nie znaleziono linku do pliku 'chrome'.")
+    if info.get('chromedriver_url'):
+        sums['chromedriver_sha256'], driver_path = _download_and_extract(info['chromedriver_url'], target_base / "chromedriver", driver_names)
+    else:
+        print("⚠️ Nie znaleziono linku do 'chromedriver'.")
+
+    # archiwa o nietypowym układzie (np. .app na macOS) — szukamy jak wcześniej
+    if not chrome_path:
+        found_chrome = _find_file_recursive(target_base, exe_names)
+        chrome_path = _find_executable_in_dir(found_chrome, exe_names) if found_chrome else None
+    if not driver_path:
+        found_driver = _find_file_recursive(target_base, driver_names)
+        driver_path = _find_executable_in_dir(found_driver, driver_names) if found_driver else None
+    if chrome_path: print(f"✅ Chrome znaleziono: {chrome_path}")
+    else: print("❌ Nie znalazłem pliku wykonywalnego Chrome.")
+    if driver_path: print(f"✅ Chromedriver znaleziono: {driver_path}")
+    else: print("❌ Nie znalazłem chromedrivera.")
+
+    if not chrome_path or not driver_path:
+        raise RuntimeError("Brakuje 'chrome' lub 'chromedriver' po instalacji.")
+    _save_resolved(version, desired_platform, chrome_path, driver_path, **sums)
+    return str(chrome_path), str(driver_path)
+
+
+# =========================
+# overlay / rate-limit / no-results
+# =========================
+def _find_retry_button():
+    X = (
+        "//button[.//span[normalize-space()='Retry']] | "
+        "//div[@role='button'][.//span[normalize-space()='Retry']] | "
+        "//button[.//span[normalize-space()='Reload']] | "
+        "//div[@role='button'][.//span[normalize-space()='Reload']]"
+    )
+    try:
+        btns = driver.find_elements(By.XPATH, X)
+        return btns[0] if btns else None
+    except Exception:
+        return None
+
+def _has_error_overlay():
+    X = (
+        "//span[contains(., 'Something went wrong')] | "
+        "//div[contains(., 'Something went wrong')] | "
+        "//span[contains(., 'Try reloading')] | "
+        "//span[contains(., 'Too many requests')] | "
+        "//span[contains(., 'Rate limit')] | "
+        "//span[contains(., 'Coś poszło nie tak')]"
+    )
+    try:
+        return len(driver.find_elements(By.XPATH, X)) > 0
+    except Exception:
+        return False
+
+def _has_no_results():
+    X = (
+        "//span[contains(., 'No results')] | "
+        "//div[contains(., 'No results')] | "
+        "//span[contains(., 'Brak wyników')] | "
+        "//div[contains(., 'Brak wyników')]"
+    )
+    try:
+        return len(driver.find_elements(By.XPATH, X)) > 0
+    except Exception:
+        return False
+
+def _robust_click(el):
+    try:
+        el.click(); return True
+    except Exception:
+        pass
+    try:
+        driver.execute_script("arguments[0].click();", el); return True
+    except Exception:
+        pass
+    try:
+        el.send_keys(Keys.ENTER); return True
+    except Exception:
+        return False
+
+def _cooldown_with_progress(total_seconds: int, desc: str = "Cooldown (rate limit)"):
+    secs = int(max(0, total_seconds))
+    if secs <= 0:
+        return
+    metrics.incr("scrape.cooldowns")
+    metrics.incr("scrape.cooldown_seconds", secs)
+    try:
+        with tqdm(total=secs, desc=desc, unit="s") as pbar:
+            for _ in range(secs):
+                time.sleep(1)
+                pbar.update(1)
+    except KeyboardInterrupt:
+        print("⏭️ Przerwano cooldown — próbuję od razu.")
+    except Exception:
+        time.sleep(secs)
+
+@metrics.timed("scrape.wait_and_handle_errors")
+def wait_and_handle_errors(quick_tries=3, quick_interval=3, cooldown_sec=cfg.RATE_LIMIT_COOLDOWN):
+    """
+    Zwraca: 'ok' | 'no_results' | 'blocked_recovered' | 'blocked_still'
+    """
+    try:
+        if driver.find_elements(By.XPATH, "//div[@data-testid='tweetText']"):
+            return 'ok'
+    except Exception:
+        pass
+
+    if _has_no_results():
+        return 'no_results'
+
+    if _has_error_overlay():
+        for _ in range(quick_tries):
+            btn = _find_retry_button()
+            if btn: _robust_click(btn)
+            else:
+                try: driver.refresh()
+                except Exception: pass
+            time.sleep(quick_interval)
+            try:
+                if driver.find_elements(By.XPATH, "//div[@data-testid='tweetText']"):
+                    return 'ok'
+            except Exception:
+                pass
+            if _has_no_results():
+                return 'no_results'
+            if not _has_error_overlay():
+                return 'ok'
+
+        print(f"⏳ Podejrzenie blokady/rate-limit — czekam {cooldown_sec//60} min...")
+        _cooldown_with_progress(int(cooldown_sec), desc="Cooldown (rate limit)")
+
+        btn = _find_retry_button()
+        if btn: _robust_click(btn)
+        else:
+            try: driver.refresh()
+            except Exception: pass
+        time.sleep(5)
+
+        try:
+            if driver.find_elements(By.XPATH, "//div[@data-testid='tweetText']"):
+                return 'blocked_recovered'
+        except Exception:
+            pass
+        if _has_no_results():
+            return 'no_results'
+        if _has_error_overlay():
+            return 'blocked_still'
+        return 'blocked_recovered'
+
+    return 'ok'
+
+
+# =========================
+# odporny get (retry + ewentualny restart drivera)
+# =========================
+def _robust_get(url: str, attempts: int = 3, wait_after: float = 2.0):
+    global driver, _driver_factory
+    for i in range(1, attempts + 1):
+        try:
+            metrics.incr("webdriver.rpc")
+            with metrics.span("scrape.page_load"):
+                driver.get(url)
+                time.sleep(wait_after)
+            return True
+        except Exception as e:
+            print(f"⚠️ driver.get timeout/err (próba {i}/{attempts}): {e}")
+            try:
+                driver.execute_script("window.stop();")
+            except Exception:
+                pass
+            if i < attempts and _driver_factory is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+                try:
+                    metrics.incr("scrape.driver_restarts")
+                    driver = _driver_factory()
+                    set_driver(driver)
+                    print("🔁 Odtworzyłem przeglądarkę i spróbuję ponownie...")
+                except Exception as e2:
+                    print(f"❌ Nie udało się odtworzyć drivera: {e2}")
+            else:
+                return False
+
+
+# =========================
+# tweet id + czas + url
+# =========================
+def _get_tweet_id_and_dt(el):
+    tweet_id = None; dt = None; url = None
+    try:
+        link = el.find_element(By.XPATH, ".//ancestor::article//a[contains(@href,'/status/')]")
+        href = link.get_attribute("href") or ""
+        url = href
+        m = re.search(r'/status/(\d+)', href)
+        tweet_id = m.group(1) if m else None
+    except Exception:
+        url = None
+        tweet_id = None
+    try:
+        time_el = el.find_element(By.XPATH, ".//ancestor::article//time")
+        ts = time_el.get_attribute("datetime")
+        dt = datetime.fromisoformat(ts.replace('Z', '+00:00')) if ts else None
+    except Exception:
+        dt = None
+    return tweet_id, dt, url
+
+
+# =========================
+# zużycie strony: bajty z sieci + pamięć JS + węzły DOM
+# =========================
+_PAGE_USAGE_JS = """
+const e = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+return [e.reduce((s, x) => s + (x.transferSize || 0), 0),
+        (performance.memory || {}).usedJSHeapSize || 0,
+        document.getElementsByTagName('*').length];
+"""
+
+def _record_page_usage():
+    """Dolicza bajty bieżącej strony (Resource Timing) i szczyt pamięci JS/DOM do metryk."""
+    try:
+        usage = driver.execute_script(_PAGE_USAGE_JS)
+        metrics.incr("webdriver.rpc")
+    except Exception:
+        return None
+    if not usage:
+        return None
+    nbytes, heap, nodes = (int(v or 0) for v in usage)
+    metrics.incr("browser.bytes_transferred", nbytes)
+    metrics.incr("browser.pages")
+    metrics.set_max("browser.js_heap_peak_bytes", heap)
+    metrics.set_max("browser.dom_nodes_peak", nodes)
+    return nbytes, heap, nodes
+
+
+# =========================
+# DOM: zwijanie zebranych artykułów + recykling karty
+# =========================
+# Zwija artykuły już przetworzone (arguments[0] = elementy tweetText z tego przebiegu):
+# treść jest usuwana, wysokość zostaje, więc pozycja scrolla i kotwica się nie przesuwają,
+# a kolejne find_elements widzą tylko nowe tweety. Zwraca [zwinięte, liczba węzłów DOM].
+_DOM_PRUNE_JS = """
+const els = arguments[0] || [], prune = arguments[1];
+let n = 0;
+if (prune) {
+  for (const el of els) {
+    const art = el && el.closest ? el.closest('article') : null;
+    if (!art || art.dataset.sxPruned) continue;
+    const h = art.offsetHeight;
+    art.replaceChildren();
+    art.dataset.sxPruned = '1';
+    art.style.height = h + 'px';
+    n++;
+  }
+}
+return [n, document.getElementsByTagName('*').length];
+"""
+
+def _dom_maintenance(els, prune: bool):
+    try:
+        res = driver.execute_script(_DOM_PRUNE_JS, els, prune)
+        metrics.incr("webdriver.rpc")
+    except Exception:
+        return None
+    if not res:
+        return None
+    pruned, nodes = int(res[0] or 0), int(res[1] or 0)
+    metrics.incr("scrape.dom_pruned", pruned)
+    metrics.set_max("browser.dom_nodes_peak", nodes)
+    return nodes
+
+def _search_url(query: str) -> str:
+    return "https://mobile.twitter.com/search?q=" + urllib.parse.quote(query) + "&f=live"
+
+def _search_query(keyword: str, start: datetime, end: datetime) -> str:
+    """Zapytanie dla [start, end) w UTC: pełne dni → since:/until:, inaczej since_time:/until_time: (epoch)."""
+    if start.time() == end.time() == datetime.min.time():
+        return f"{keyword} since:{start.strftime('%Y-%m-%d')} until:{end.strftime('%Y-%m-%d')}"
+    return f"{keyword} since_time:{int(start.timestamp())} until_time:{int(end.timestamp())}"
+
+
+# =========================
+# właściwe scrapowanie (1 podzakres)
+# =========================
+@metrics.timed("scrape.fetch_tweets")
+def iter_fetch_tweets(keyword: str, since_incl: str, until_incl: str, max_tweets: int = 200, deduper=None,
+                      window=None):
+    """
+    Generator: dla każdego przebiegu scrolla zwraca listę nowych wierszy (id, text, datetime|None, url).
+    Nic nie jest akumulowane poza zbiorem id bieżącego slice'a.
+    window — (od, do) jako datetime UTC, [od, do): zamiast pełnych dni since_incl..until_incl (okna godzinowe).
+    """
+    if deduper is None:
+        class _Local:
+            def __init__(self): self._s = set()
+            def contains(self, u): return u in self._s
+            def add(self, u): self._s.add(u)
+            def bulk_add(self, seq): self._s.update(seq)
+            def close(self): pass
+        deduper = _Local()
+
+    if window is None:
+        start = datetime.fromisoformat(since_incl).replace(tzinfo=timezone.utc)
+        end = datetime.fromisoformat(until_incl).replace(tzinfo=timezone.utc) + timedelta(days=1)
+    else:
+        start, end = window
+    url   = _search_url(_search_query(keyword, start, end))
+    print(f"\n🔗 Otwieram: {url}")
+
+    ok = _robust_get(url)
+    if not ok:
+        print("❌ Nie udało się wczytać strony po próbach — przerywam ten slice.")
+        return
+
+    # wstępne ogarnięcie overlay
+    status = wait_and_handle_errors()
+    if status == 'no_results':
+        print("ℹ️ Brak wyników dla tego zakresu.")
+        _record_page_usage()
+        return
+
+    collected = 0
+    seen_ids = set()
+    oldest = None
+    recycled_from = None
+    last_h = driver.execute_script("return document.body.scrollHeight")
+
+    while collected < max_tweets:
+        st = wait_and_handle_errors()
+        if st in ('no_results', 'blocked_still'):
+            break
+
+        els = driver.find_elements(By.XPATH, '//div[@data-testid="tweetText"]')
+        metrics.incr("webdriver.rpc", 1 + 5 * len(els))  # find_elements + text/link/href/time/datetime per element
+        page = []
+        for el in els:
+            try:
+                raw = el.text.strip()
+            except StaleElementReferenceException:
+                continue
+            if not raw:
+                continue
+
+            tweet_id, dt, href = _get_tweet_id_and_dt(el)
+            uid = tweet_id if tweet_id else _text_fallback_id_from_clean(raw)
+            if uid in seen_ids or deduper.contains(uid):
+                continue
+
+            seen_ids.add(uid); deduper.add(uid)
+            page.append((uid, raw, dt, href))
+            if dt is not None and (oldest is None or dt < oldest):
+                oldest = dt
+            metrics.incr("scrape.tweets")
+            if collected + len(page) >= max_tweets:
+                break
+
+        if page:
+            collected += len(page)
+            yield page
+        if collected >= max_tweets:
+            break
+        if els and (cfg.DOM_PRUNE or cfg.DOM_MAX_NODES):
+            nodes = _dom_maintenance(els, cfg.DOM_PRUNE)
+            if cfg.DOM_MAX_NODES and nodes and nodes > cfg.DOM_MAX_NODES:
+                # karta za ciężka — świeże wyszukiwanie od najstarszego zebranego tweeta w dół
+                if oldest is None or oldest == recycled_from:
+                    break
+                recycled_from = oldest
+                _record_page_usage()
+                metrics.incr("scrape.tab_recycles")
+                print(f"♻️ {nodes} węzłów DOM > {cfg.DOM_MAX_NODES} — nowa karta od {oldest.isoformat()}")
+                q2 = _search_query(keyword, start, oldest + timedelta(seconds=1))
+                if not _robust_get(_search_url(q2)) or wait_and_handle_errors() == 'no_results':
+                    break
+                last_h = driver.execute_script("return document.body.scrollHeight")
+                continue
+
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        metrics.incr("scrape.scrolls")
+        metrics.incr("webdriver.rpc", 2)
+        with metrics.span("scrape.scroll_sleep"):
+            time.sleep(2)
+        new_h = driver.execute_script("return document.body.scrollHeight")
+        if new_h == last_h:
+            st2 = wait_and_handle_errors(quick_tries=2, quick_interval=2)
+            if st2 in ('no_results', 'blocked_still'):
+                break
+            new_h = driver.execute_script("return document.body.scrollHeight")
+            if new_h == last_h:
+                break
+        last_h = new_h
+
+    usage = _record_page_usage()
+    if usage:
+        print(f"📦 Strona: {usage[0] / 1024:.0f} KB z sieci | heap JS {usage[1] / 2**20:.1f} MB | {usage[2]} węzłów DOM")
+
+def fetch_tweets(keyword: str, since_incl: str, until_incl: str, max_tweets: int = 200, deduper=None):
+    """Wersja listowa iter_fetch_tweets: (texts, dates, ids, urls)."""
+    texts, dates, ids, urls = [], [], [], []
+    for page in iter_fetch_tweets(keyword, since_incl, until_incl, max_tweets, deduper=deduper):
+        for uid, raw, dt, href in page:
+            ids.append(uid); texts.append(raw); dates.append(dt); urls.append(href)
+    return texts, dates, ids, urls
+
+
+def make_bloom_deduper(max_tweets: int = 0) -> HybridDeduper:
+    """
+    Bloom o stałym rozmiarze (cfg.BLOOM_EXPECTED_N), żeby zapisany plik pasował między
+    uruchomieniami; potwierdzenia w głównej bazie (tabela tweets).
+    """
+    return HybridDeduper(sqlite_path=cfg.DB_PATH,
+                         expected_n=max(cfg.BLOOM_EXPECTED_N, max_tweets*2), fp_rate=1e-5,
+                         load_bloom=cfg.BLOOM_SERIAL)
+
+
+# =========================
+# scrapowanie w podoknach + zapis do DB + checkpoint RAW + ZWRACANIE LIST
+# =========================
+def _split_quotas(total: int, weights):
+    """Rozdział total proporcjonalnie do weights; suma dokładnie total (korekta od największych)."""
+    wsum = sum(weights)
+    quotas = [max(1, round(total * w / wsum)) for w in weights]
+    diff = sum(quotas) - total
+    idx_ord = sorted(range(len(quotas)), key=lambda i: quotas[i], reverse=(diff>0))
+    for i in range(abs(diff)):
+        j = idx_ord[i % len(quotas)]
+        quotas[j] -= 1 if diff>0 else -1
+        if quotas[j] < 0: quotas[j] = 0
+    return quotas
+
+def iter_tweets_in_periods(keyword: str, since: str, until: str, max_tweets: int = 200,
+                           collection_name: str = None, resume_raw: bool = False,
+                           store: TweetStore = None, deduper=None):
+    """
+    Generator partii (po jednej na przebieg scrolla): lista wierszy (id, text, datetime|None, url),
+    zwracana PO zapisie do DB (write-through). Pamięć nie rośnie z długością crawla —
+    trzymany jest tylko licznik i deduper.
+    resume_raw — tweety kolekcji już zapisane w oknie trafiają do dedupera (nie są zbierane drugi raz).
+    deduper — współdzielony HybridDeduper (tryb --serve: Bloom żyje w pamięci między przebiegami);
+    zamyka go właściciel, tu jest tylko zapisywany na dysk.
+    """
+    start_dt = datetime.fromisoformat(since)
+    end_dt   = datetime.fromisoformat(until)
+
+    # dzielimy na miesiące, a miesiące na <=31 slice’y
+    periods = []
+    cur = start_dt
+    while cur <= end_dt:
+        nxt_month = (cur + relativedelta(months=1)).replace(day=1)
+        last_of = min(nxt_month - timedelta(days=1), end_dt)
+        periods.append((cur, last_of))
+        cur = nxt_month
+    quotas = _split_quotas(max_tweets, [(p[1].date() - p[0].date()).days + 1 for p in periods])
+
+    # DB i kolekcja (jeśli jest) — współdzielony store (tryb wsadowy) zamyka właściciel
+    own_store = store is None
+    if own_store:
+        store = TweetStore(cfg.DB_PATH)
+    coll_id = None
+    if collection_name:
+        try:
+            if hasattr(store, "get_or_create_collection"):
+                coll_id = store.get_or_create_collection(collection_name)
+            elif hasattr(store, "ensure_collection"):
+                coll_id = store.ensure_collection(collection_name)
+        except Exception as e:
+            print(f"⚠️ Nie mogę utworzyć/odczytać kolekcji: {e}")
+
+    # Deduper (Bloom opcjonalnie)
+    own_deduper = deduper is None
+    if own_deduper and cfg.USE_BLOOM:
+        deduper = make_bloom_deduper(max_tweets)
+    elif own_deduper:
+        class _Local:
+            def __init__(self): self._s=set()
+            def contains(self,u): return u in self._s
+            def add(self,u): self._s.add(u)
+            def bulk_add(self,seq): self._s.update(seq)
+            def close(self): pass
+        deduper = _Local()
+    if hasattr(deduper, "scope"):
+        deduper.scope(coll_id)  # współdzielony Bloom (--serve): duplikat = już w TEJ kolekcji
+
+    # Resume RAW: DB jest zapisywana na bieżąco, więc to ona jest punktem wznowienia
+    if resume_raw and collection_name:
+        try:
+            done = [r[0] for r in store.fetch_collection_in_range(collection_name, since, until)]
+            deduper.bulk_add(done)
+            if done:
+                print(f"↩️ Resume RAW: {len(done)} tweetów okna już w DB — pomijam je przy scrollowaniu.")
+        except Exception as e:
+            print(f"⚠️ Resume RAW nie powiódł się: {e}")
+
+    # rekord pokrycia: dni, których gęstość osi czasu zmierzył już wcześniejszy crawl
+    density = {}
+    if cfg.HOUR_SLICES:
+        try:
+            density = store.coverage_of(keyword, start_dt.date().isoformat(), end_dt.date().isoformat())
+        except Exception as e:
+            print(f"⚠️ Nie mogę odczytać pokrycia dni z DB: {e}")
+
+    collected = 0
+    bytes_at_start = metrics.counter("browser.bytes_transferred")
+    pbar = tqdm(total=max_tweets, desc=f"Scraping '{keyword}' [{since}..{until}]", unit="tw")
+
+    def harvest(slice_since, slice_until, want, window=None):
+        """Partie jednej osi czasu, zapisane do DB przed oddaniem dalej."""
+        nonlocal collected
+        for page in iter_fetch_tweets(keyword, slice_since, slice_until, want, deduper=deduper, window=window):
+            if collection_name:
+                _db_write_bulk(store, [(_id, _t, _dt.isoformat() if isinstance(_dt, datetime) else None, _u)
+                                       for _id, _t, _dt, _u in page], coll_id)
+            collected += len(page)
+            pbar.update(len(page))
+            pbar.set_postfix_str(f"{collected}/{max_tweets}")
+            yield page
+
+    def hour_slices(start, end, need):
+        """
+        Okna po cfg.HOUR_SLICE_HOURS h w [start, end), kwota proporcjonalna do długości okna;
+        niedobór okna (np. noc) przechodzi na następne. Między oknami kontrola blokady i odstęp
+        jak między próbami slice'a (rośnie po pustych oknach); 'blocked_still' kończy okna tego dnia.
+        Okna kończą się najpóźniej teraz (dzisiejszy dzień) — przyszłe godziny nic by nie zwróciły.
+        Zwraca liczbę dodanych tweetów.
+        """
+        step = timedelta(hours=cfg.HOUR_SLICE_HOURS)
+        end = min(end, datetime.now(timezone.utc))
+        bounds = []
+        t = start
+        while t < end:
+            bounds.append((t, min(t + step, end)))
+            t += step
+        if not bounds:
+            return 0
+        got = carry = empty = 0
+        quotas_h = _split_quotas(need, [(b - a).total_seconds() for a, b in bounds])
+        for i, ((a, b), q) in enumerate(zip(bounds, quotas_h)):
+            want = min(q + carry, max_tweets - collected)
+            if want <= 0:
+                carry += q
+                continue
+            print(f"Pobieram {keyword} {a.strftime('%Y-%m-%d %H:%M')}..{b.strftime('%H:%M')} UTC (chcę {want})")
+            added = 0
+            for page in harvest(a.date().isoformat(), a.date().isoformat(), want, window=(a, b)):
+                added += len(page)
+                yield page
+            metrics.incr("scrape.hour_slices")
+            got += added
+            carry = q + carry - added
+            empty = 0 if added else empty + 1
+            if i + 1 < len(bounds) and collected < max_tweets:
+                if wait_and_handle_errors(quick_tries=2, quick_interval=2) == 'blocked_still':
+                    print(f"⛔ Blokada nie ustąpiła — przerywam okna godzinowe od {b.strftime('%H:%M')} UTC.")
+                    break
+                time.sleep([2, 5, 10][min(empty, 2)])
+        return got
+
+    try:
+        for (period, quota) in zip(periods, quotas):
+            if collected >= max_tweets: break
+
+            p_start = period[0].date()
+            p_end   = period[1].date()
+            days = (p_end - p_start).days + 1
+
+            slices = min(days, max(1, min(quota, 31)))
+            base, rem = days // slices, days % slices
+            slice_lengths = [base + (1 if i < rem else 0) for i in range(slices)]
+            slice_quotas  = _split_quotas(quota, slice_lengths)
+
+            cur_day = p_start
+            for sl_len, sl_q in zip(slice_lengths, slice_quotas):
+                if collected >= max_tweets: break
+                if sl_q <= 0:
+                    cur_day = cur_day + timedelta(days=sl_len); continue
+
+                slice_since = cur_day.isoformat()
+                slice_until = (cur_day + timedelta(days=sl_len-1)).isoformat()
+                need_here   = min(sl_q, max_tweets - collected)
+
+                # dzień z dużą kwotą: płytka próbka mierzy gęstość osi czasu; nasycony → okna godzinowe
+                day_start = datetime.combine(cur_day, datetime.min.time(), tzinfo=timezone.utc)
+                day_end = day_start + timedelta(days=1)
+                hourly = cfg.HOUR_SLICES and sl_len == 1 and need_here > cfg.HOUR_SLICE_DEPTH
+                if hourly and density.get(slice_since, 0) * 24 >= need_here:
+                    print(f"🕐 {slice_since}: ~{density[slice_since]:.0f} tw/h wg rekordu pokrycia — "
+                          f"{need_here} w oknach godzinowych")
+                    need_here -= yield from hour_slices(day_start, day_end, need_here)
+                    print(f"   → Pozostało do zebrania w tym slice: {need_here}")
+                    cur_day = cur_day + timedelta(days=sl_len)
+                    continue
+
+                attempts = 0
+                while need_here > 0 and attempts < 3 and collected < max_tweets:
+                    want = min(need_here, max_tweets - collected)
+                    if hourly and attempts == 0:
+                        want = min(want, cfg.HOUR_SLICE_DEPTH)
+                    print(f"Pobieram {keyword} {slice_since}..{slice_until} (chcę {want}; próba {attempts+1}/3)")
+                    added = 0
+                    oldest = None
+                    for page in harvest(slice_since, slice_until, want):
+                        added += len(page)
+                        for _, _, _dt, _ in page:
+                            if isinstance(_dt, datetime) and (oldest is None or _dt < oldest):
+                                oldest = _dt
+                        yield page
+
+                    need_here -= added
+                    print(f"   → Dodano {added}. Pozostało do zebrania w tym slice: {need_here}")
+
+                    attempts += 1
+                    if hourly and attempts == 1 and oldest is not None:
+                        span_h = (min(day_end, datetime.now(timezone.utc)) - oldest).total_seconds() / 3600
+                        per_hour = added / max(span_h, 1 / 60)
+                        try:
+                            store.save_coverage(keyword, slice_since, per_hour)
+                        except Exception as e:
+                            print(f"⚠️ Nie mogę zapisać pokrycia dnia do DB: {e}")
+                        # oś czasu nie doszła do początku dnia, a kwota niepełna — reszta dnia godzinami
+                        if need_here > 0 and oldest - day_start >= timedelta(hours=cfg.HOUR_SLICE_HOURS):
+                            print(f"🕐 {slice_since}: ~{per_hour:.0f} tw/h, oś czasu do {oldest.strftime('%H:%M')} UTC — "
+                                  f"{need_here} w oknach godzinowych")
+                            need_here -= yield from hour_slices(day_start, oldest, need_here)
+                            print(f"   → Pozostało do zebrania w tym slice: {need_here}")
+                            break
+                    if need_here > 0 and attempts < 3:
+                        state = wait_and_handle_errors(quick_tries=2, quick_interval=2)
+                        if state in ('no_results', 'blocked_still'): break
+                        time.sleep([2,5,10][min(attempts-1, 2)])
+
+                cur_day = cur_day + timedelta(days=sl_len)
+
+        print(f"✅ Zebrano łącznie {collected}/{max_tweets} tweetów (w tej operacji).")
+        sess_bytes = metrics.counter("browser.bytes_transferred") - bytes_at_start
+        if sess_bytes:
+            print(f"📦 Sesja: {sess_bytes / 2**20:.1f} MB z sieci "
+                  f"({'lekki profil' if cfg.LEAN_BROWSER else 'pełny profil'}), "
+                  f"szczyt heap JS {metrics.counter('browser.js_heap_peak_bytes') / 2**20:.1f} MB")
+    finally:
+        pbar.close()
+        try:
+            if hasattr(deduper, "save_bloom"):
+                try:
+                    deduper.save_bloom(cfg.BLOOM_SERIAL)
+                except Exception:
+                    pass
+            if own_deduper and hasattr(deduper, "close"):
+                deduper.close()
+        except Exception:
+            pass
+        if own_store:
+            store.close()
+
+def fetch_tweets_in_periods(keyword: str, since: str, until: str, max_tweets: int = 200,
+                            collection_name: str = None, resume_raw: bool = False,
+                            store: TweetStore = None, on_batch=None, deduper=None):
+    """
+    Wersja listowa iter_tweets_in_periods: zwraca (texts, dates, ids, urls) całego crawla.
+    on_batch(ids, texts, dates, urls) — opcjonalny callback wołany po zapisie każdej partii do DB.
+    Przy dużych crawlach lepiej iterować iter_tweets_in_periods (stała pamięć).
+    """
+    texts_all, dates_all, ids_all, urls_all = [], [], [], []
+    for page in iter_tweets_in_periods(keyword, since, until, max_tweets, collection_name=collection_name,
+                                       resume_raw=resume_raw, store=store, deduper=deduper):
+        ids, txts, dts, urls = (list(c) for c in zip(*page))
+        texts_all.extend(txts); dates_all.extend(dts); ids_all.extend(ids); urls_all.extend(urls)
+        if on_batch is not None:
+            try:
+                on_batch(ids, txts, dts, urls)
+            except Exception as e:
+                print(f"⚠️ Błąd przekazania partii do analizy: {e}")
+    return texts_all, dates_all, ids_all, urls_all
+
+
+@metrics.timed("db.write_raw")
+def _db_write_bulk(store: TweetStore, rows, coll_id):
+    try:
+        if hasattr(store, "upsert_many") and hasattr(store, "link_many"):
+            store.upsert_many(rows)
+            if coll_id is not None:
+                ids = [r[0] for r in rows]
+                store.link_many(ids, coll_id)
+        elif hasattr(store, "upsert_tweets_bulk"):
+            ids = [r[0] for r in rows]
+            texts = [r[1] for r in rows]
+            dts = [r[2] for r in rows]
+            urls = [r[3] for r in rows]
+            store.upsert_tweets_bulk(coll_id, ids, texts, dts, urls)
+        elif hasattr(store, "insert_tweets_bulk"):
+            ids = [r[0] for r in rows]
+            texts = [r[1] for r in rows]
+            dts = [r[2] for r in rows]
+            urls = [r[3] for r in rows]
+            store.insert_tweets_bulk(coll_id, ids, texts, dts, urls)
+        else:
+            # fallback: pojedynczo
+            for _id, _t, _dt, _u in rows:
+                if hasattr(store, "upsert_tweet"):
+                    store.upsert_tweet(coll_id, _id, _t, _dt, _u)
+                elif hasattr(store, "insert_tweet"):
+                    store.insert_tweet(coll_id, _id, _t, _dt, _u)
+    except Exception as e:
         print(f"⚠️ Błąd zapisu do DB: {e}")
\ No newline at end of file